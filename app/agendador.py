@@ -0,0 +1,83 @@
+import time
+
+class AgendadorPeriodico:
+    """Agenda execuções em período fixo usando relógio monotônico, sem deriva.
+
+    Os instantes seguem uma grade fixa (inicio + n * periodo), então atrasos de
+    um ciclo não se acumulam nos seguintes. Quando um ciclo estoura o período,
+    os instantes perdidos são pulados e contabilizados, e o jitter (atraso ao
+    acordar em relação ao instante agendado) é medido a cada ciclo.
+    """
+
+    def __init__(self, periodo: float):
+        self.periodo = periodo
+        self.proximo = None
+        self.zerar_estatisticas()
+
+    def iniciar(self):
+        """Ancora a grade no instante atual (também usado para reancorar após falhas)."""
+        self.proximo = time.monotonic()
+
+    def aguardar(self):
+        """Dorme até o próximo instante da grade."""
+        if self.proximo is None:
+            self.iniciar()
+            return
+        time.sleep(self.avancar())
+        self.registrar_despertar()
+
+    def avancar(self):
+        """Avança para o próximo instante da grade e devolve quanto falta até ele (s).
+
+        Separado de aguardar() para quem dorme de outro jeito (ex.: asyncio.sleep,
+        cujo relógio também é o monotônico).
+        """
+        if self.proximo is None:
+            self.iniciar()
+            return 0.0
+
+        self.proximo += self.periodo
+        agora = time.monotonic()
+        if agora > self.proximo:
+            # Estouro: pula para o próximo instante ainda no futuro
+            perdidos = int((agora - self.proximo) // self.periodo) + 1
+            self.proximo += perdidos * self.periodo
+            self.estouros += 1
+            self.perdidos += perdidos
+
+        return max(0.0, self.proximo - time.monotonic())
+
+    def registrar_despertar(self):
+        """Mede o jitter do despertar em relação ao instante agendado."""
+        jitter = time.monotonic() - self.proximo
+        self.ciclos += 1
+        self._soma_jitter += jitter
+        if jitter > self.jitter_maximo:
+            self.jitter_maximo = jitter
+
+    def estatisticas(self):
+        """Resumo desde o último zerar_estatisticas (jitter em segundos)."""
+        return {
+            'periodo': self.periodo,
+            'ciclos': self.ciclos,
+            'estouros': self.estouros,
+            'perdidos': self.perdidos,
+            'jitter_medio': self._soma_jitter / self.ciclos if self.ciclos else 0.0,
+            'jitter_maximo': self.jitter_maximo,
+        }
+
+    def zerar_estatisticas(self):
+        self.ciclos = 0
+        self.estouros = 0
+        self.perdidos = 0
+        self.jitter_maximo = 0.0
+        self._soma_jitter = 0.0
+
+    def relatorio(self):
+        """Texto curto com as estatísticas, para log e barra de status."""
+        e = self.estatisticas()
+        return (
+            f"período {e['periodo'] * 1000:.1f} ms, {e['ciclos']} ciclos, "
+            f"{e['estouros']} estouros ({e['perdidos']} perdidos), "
+            f"jitter médio {e['jitter_medio'] * 1000:.2f} ms, máx {e['jitter_maximo'] * 1000:.2f} ms"
+        )
@@ -0,0 +1,77 @@
+import time
+import numpy as np
+
+def _sequencia(mascara, seguidas: int, tamanho: int):
+    """Onde `tamanho` verdadeiros seguidos se completam na máscara.
+
+    `seguidas` são os verdadeiros que vieram no fim do bloco anterior.
+    Devolve (índice ou None, verdadeiros seguidos no fim da máscara).
+    """
+    n = len(mascara)
+    if n == 0:
+        return None, seguidas
+    posicoes = np.arange(1, n + 1)
+    ultimo_falso = np.maximum.accumulate(np.where(mascara, 0, posicoes))
+    corrida = posicoes - ultimo_falso
+    corrida[ultimo_falso == 0] += seguidas
+    atingiu = np.flatnonzero(corrida >= tamanho)
+    return (int(atingiu[0]) if len(atingiu) else None), int(corrida[-1])
+
+class MonitorAlarme:
+    """Verifica um canal contra o seu limite (em |valor|), bloco a bloco.
+
+    O alarme dispara depois de `confirmacao` amostras seguidas acima do
+    limite e volta ao normal depois de `confirmacao` amostras seguidas dentro
+    dele, então ruído em torno do limite não gera uma rajada de eventos. Ao
+    disparar, fica travado até reconhecer(), mesmo que o sinal normalize.
+    Limite <= 0 desliga o alarme. O laço é por transição, não por amostra.
+    """
+
+    def __init__(self, limite: float, confirmacao: int):
+        self.limite = limite
+        self.confirmacao = max(1, confirmacao)
+        self.ativo = False  # sinal fora do limite agora
+        self.travado = False  # disparou e ainda não foi reconhecido
+        self._seguidas = 0
+
+    def processar(self, tempos, valores):
+        """Processa um bloco e devolve os disparos como [(valor, timestamp)]."""
+        if self.limite <= 0:
+            self.ativo = False
+            self._seguidas = 0
+            return []
+        eventos = []
+        fora = np.abs(valores) > self.limite
+        n = len(valores)
+        i = 0
+        while i < n:
+            # Procura a próxima transição: fora do limite (se normal) ou dentro (se ativo)
+            mascara = fora[i:] if not self.ativo else ~fora[i:]
+            indice, self._seguidas = _sequencia(mascara, self._seguidas, self.confirmacao)
+            if indice is None:
+                break
+            j = i + indice
+            self.ativo = not self.ativo
+            if self.ativo:
+                self.travado = True
+                eventos.append((float(valores[j]), float(tempos[j])))
+            self._seguidas = 0
+            i = j + 1
+        return eventos
+
+    def reconhecer(self):
+        self.travado = False
+
+class LimitadorAlertas:
+    """Deixa passar no máximo um alerta a cada `intervalo` segundos."""
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self._ultimo = float('-inf')
+
+    def permitir(self, agora: float = None) -> bool:
+        agora = time.monotonic() if agora is None else agora
+        if agora - self._ultimo < self.intervalo:
+            return False
+        self._ultimo = agora
+        return True
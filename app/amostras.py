@@ -0,0 +1,57 @@
+import time
+import numpy as np
+from app.settings import NUM_CANAIS, BLOCO_SINAL_AMOSTRAS, BLOCO_SINAL_MS
+
+# Layout dos blocos de amostras trocados entre aquisição e consumidores:
+# array float64 (n, 1 + NUM_CANAIS); coluna 0 = timestamp (epoch, na aquisição),
+# coluna c = valor do Canal c (NaN = canal sem leitura naquela amostra).
+COLUNA_TEMPO = 0
+
+def novo_bloco(linhas: int):
+    return np.full((linhas, 1 + NUM_CANAIS), np.nan)
+
+class AcumuladorBlocos:
+    """Acumula amostras num bloco NumPy pré-alocado e entrega blocos inteiros.
+
+    O bloco é entregue a `destino` (ex.: o emit de um sinal Qt) quando enche
+    (`tamanho` amostras) ou quando a primeira amostra dele completa `intervalo`
+    segundos. Com `periodo` (o período do produtor), o bloco sai já na amostra
+    cuja sucessora passaria do prazo, em vez de esperar por ela.
+
+    Não é thread-safe: cada produtor (thread ou event loop) usa o seu.
+    """
+
+    def __init__(self, destino, tamanho: int = BLOCO_SINAL_AMOSTRAS,
+                 intervalo: float = BLOCO_SINAL_MS / 1000, periodo: float = 0.0):
+        self.destino = destino
+        self.tamanho = tamanho
+        self.intervalo = intervalo
+        self.periodo = periodo
+        self._bloco = novo_bloco(tamanho)
+        self._n = 0
+        self._inicio = 0.0
+
+    def adicionar(self, timestamp: float, valores):
+        if self._n == 0:
+            self._inicio = time.monotonic()
+        linha = self._bloco[self._n]
+        linha[COLUNA_TEMPO] = timestamp
+        linha[1:1 + len(valores)] = valores
+        self._n += 1
+
+        if self._n >= self.tamanho or self.vencido(self.periodo):
+            self.descarregar()
+
+    def vencido(self, folga: float = 0.0) -> bool:
+        """True se o bloco pendente já passou (ou passará em `folga` s) do prazo."""
+        return self._n > 0 and time.monotonic() - self._inicio + folga >= self.intervalo
+
+    def descarregar(self):
+        """Entrega o bloco pendente (se houver) e passa a preencher um novo."""
+        if self._n == 0:
+            return
+        # O bloco preenchido segue para o consumidor sem cópia; um novo é alocado
+        bloco = self._bloco[:self._n]
+        self._bloco = novo_bloco(self.tamanho)
+        self._n = 0
+        self.destino(bloco)
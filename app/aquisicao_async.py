@@ -0,0 +1,207 @@
+import asyncio
+import threading
+import time
+from pymodbus.client import AsyncModbusSerialClient
+from app.agendador import AgendadorPeriodico
+from app.amostras import AcumuladorBlocos
+from app.controller import planejar_leituras, registros_para_float
+from app.settings import NUM_CANAIS, RELATORIO_AQUISICAO_S
+
+# Mesmo mapa de variáveis do ModbusController (float32 = 2 registros)
+VARIAVEIS = {
+    'torque' : (0x0606, 2),
+    'pico' : (0x0608, 2),
+    'vale' : (0x060A, 2),
+}
+REGISTRO_CALIBRACAO = 0x0FB8
+
+def criar_cliente_serial(porta, baud_rate):
+    """Cliente Modbus RTU assíncrono padrão para uma porta serial."""
+    return AsyncModbusSerialClient(
+        port = porta,
+        baudrate = baud_rate,
+        parity = 'N',
+        stopbits = 1,
+        timeout = 1,
+    )
+
+class MotorAquisicaoAsync:
+    """Aquisição Modbus com asyncio, alternativa ao backend de threads.
+
+    Um único event loop roda numa thread dedicada, com uma tarefa por barramento
+    serial: os barramentos são lidos em paralelo e os escravos de um barramento
+    em round-robin, como no GerenciadorAquisicao. As amostras de todos os
+    barramentos vão para um mesmo AcumuladorBlocos e chegam à GUI em blocos
+    (sinal atualizar_canais), e desconectar() cancela as tarefas na hora, sem
+    esperar o timeout da leitura.
+
+    `fabrica_cliente(porta, baud_rate)` permite trocar o transporte, por
+    exemplo por um AsyncModbusTcpClient apontando para o simulador do pymodbus.
+    """
+
+    def __init__(self, dispositivos, baud_rate, comunicador, logger, intervalo=1.0,
+                 fabrica_cliente=criar_cliente_serial):
+        self.baud_rate = baud_rate
+        self.comunicador = comunicador
+        self.logger = logger
+        self.intervalo = intervalo
+        self.fabrica_cliente = fabrica_cliente
+        self.plano_leitura = planejar_leituras(VARIAVEIS)
+
+        self.barramentos = {}
+        for dispositivo in dispositivos:
+            self.barramentos.setdefault(dispositivo['porta'], []).append(
+                (dispositivo['slave'], dispositivo['canal'])
+            )
+
+        self.loop = None
+        self.thread = None
+        self.clientes = {}
+        self.tarefas = []
+        self.ultimas_variaveis = {}  # (porta, slave_id) -> {nome: valor}
+        # Só é usado de dentro do event loop, então um acumulador basta para todos
+        self.acumulador = AcumuladorBlocos(comunicador.atualizar_canais.emit)
+
+    # --- API síncrona (chamada pela GUI) ---
+
+    def conectar(self):
+        """Sobe o event loop e conecta todos os barramentos (levanta exceção se algum falhar)."""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._rodar_loop, name="AquisicaoAsync", daemon=True)
+        self.thread.start()
+        try:
+            asyncio.run_coroutine_threadsafe(self._iniciar(), self.loop).result()
+        except Exception as e:
+            self.logger.error(f"Erro na conexão: {str(e)}")
+            self.desconectar()
+            raise
+
+    def desconectar(self):
+        """Cancela as tarefas, fecha os clientes e encerra o event loop."""
+        if self.loop is None or not self.loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._parar(), self.loop).result(timeout=2)
+        except Exception as e:
+            self.logger.error(f"Erro ao desconectar: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2)
+
+    def ler_key(self):
+        """Lê a chave do dispositivo principal (primeiro escravo do primeiro barramento)."""
+        return asyncio.run_coroutine_threadsafe(self._ler_key(), self.loop).result(timeout=5)
+
+    def gravar_key(self, new_key):
+        """Grava a chave no dispositivo principal, pelo mesmo barramento de `ler_key`."""
+        if len(new_key) > 16:
+            raise ValueError("Chave deve ter no máximo 16 caracteres")
+        return asyncio.run_coroutine_threadsafe(self._gravar_key(new_key), self.loop).result(timeout=5)
+
+    # --- Event loop ---
+
+    def _rodar_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self.loop.close()
+
+    async def _iniciar(self):
+        for porta in self.barramentos:
+            cliente = self.fabrica_cliente(porta, self.baud_rate)
+            if not await cliente.connect():
+                raise Exception(f"Falha ao conectar o dispositivo em {porta}")
+            self.clientes[porta] = cliente
+
+        for porta, dispositivos in self.barramentos.items():
+            self.tarefas.append(asyncio.create_task(self._ler_barramento(porta, dispositivos)))
+        self.tarefas.append(asyncio.create_task(self._entregar_blocos()))
+
+    async def _parar(self):
+        for tarefa in self.tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self.tarefas, return_exceptions=True)
+        self.tarefas = []
+        self.acumulador.descarregar()
+        for cliente in self.clientes.values():
+            cliente.close()
+        self.clientes = {}
+
+    async def _ler_variaveis(self, cliente, slave_id):
+        valores = {}
+        for leitura in self.plano_leitura:
+            response = await cliente.read_holding_registers(
+                leitura['endereco'],
+                count=leitura['quantidade'],
+                device_id=slave_id
+            )
+            if response.isError():
+                raise Exception(f"Erro Modbus: {response}")
+            for nome, deslocamento, quantidade in leitura['campos']:
+                valores[nome] = registros_para_float(response.registers[deslocamento:deslocamento + quantidade])
+        return valores
+
+    async def _ler_barramento(self, porta, dispositivos):
+        """Lê os escravos de um barramento em round-robin, em grade de tempo fixa."""
+        cliente = self.clientes[porta]
+        agendador = AgendadorPeriodico(self.intervalo / len(dispositivos))
+        agendador.iniciar()
+        proximo_relatorio = time.monotonic() + RELATORIO_AQUISICAO_S
+        suspensos = {}
+        indice = 0
+        while True:
+            slave_id, canal = dispositivos[indice]
+            indice = (indice + 1) % len(dispositivos)
+            if suspensos.get(slave_id, 0) <= time.monotonic():
+                try:
+                    variaveis = await self._ler_variaveis(cliente, slave_id)
+                    # Carimbo de tempo no momento da aquisição, não na chegada à GUI
+                    timestamp = time.time()
+                    self.ultimas_variaveis[(porta, slave_id)] = variaveis
+
+                    valores = [float('nan')] * NUM_CANAIS
+                    valores[canal - 1] = variaveis['torque']
+                    self.acumulador.adicionar(timestamp, valores)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.logger.error(f"Erro na leitura ({porta}, escravo {slave_id}): {str(e)}")
+                    suspensos[slave_id] = time.monotonic() + 1
+
+            if time.monotonic() >= proximo_relatorio:
+                self.logger.info(f"Aquisição {porta} (async): {agendador.relatorio()}")
+                agendador.zerar_estatisticas()
+                proximo_relatorio = time.monotonic() + RELATORIO_AQUISICAO_S
+
+            await asyncio.sleep(agendador.avancar())
+            agendador.registrar_despertar()
+
+    async def _entregar_blocos(self):
+        """Garante a entrega de blocos parciais quando as leituras rareiam."""
+        while True:
+            await asyncio.sleep(self.acumulador.intervalo / 4)
+            if self.acumulador.vencido():
+                self.acumulador.descarregar()
+
+    async def _ler_key(self):
+        porta, dispositivos = next(iter(self.barramentos.items()))
+        response = await self.clientes[porta].read_holding_registers(
+            REGISTRO_CALIBRACAO,
+            count=8,
+            device_id=dispositivos[0][0]
+        )
+        if response.isError():
+            raise Exception("Erro na leitura da chave")
+        key_bytes = b''.join([reg.to_bytes(2, 'big') for reg in response.registers])
+        return key_bytes.decode('ascii').strip('\x00')
+
+    async def _gravar_key(self, new_key):
+        porta, dispositivos = next(iter(self.barramentos.items()))
+        key_bytes = new_key.ljust(16).encode('ascii')
+        registers = [int.from_bytes(key_bytes[i:i+2], 'big') for i in range(0, 16, 2)]
+        response = await self.clientes[porta].write_registers(
+            REGISTRO_CALIBRACAO,
+            values=registers,
+            device_id=dispositivos[0][0]
+        )
+        if response.isError():
+            raise Exception("Erro ao gravar chave")
+        return True
@@ -0,0 +1,220 @@
+import logging
+import multiprocessing
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from app.settings import NUM_CANAIS, BARRAMENTO_CAPACIDADE
+from app.logger import configurar_logs
+
+class AnelAmostras:
+    """Anel de linhas de amostras (ver app.amostras) em memória compartilhada.
+
+    Um único processo publica; qualquer processo abre o anel pelo nome e lê
+    sem cópia nem serialização. O cabeçalho guarda a sequência (total de
+    linhas já publicadas), a capacidade e o número de colunas. A sequência só
+    avança depois que as linhas foram escritas, então um leitor nunca vê linha
+    pela metade, a não ser que fique uma volta inteira para trás (ver
+    LeitorBarramento).
+    """
+
+    CABECALHO = 3  # sequência, capacidade, colunas (int64)
+
+    def __init__(self, nome: str = None, capacidade: int = BARRAMENTO_CAPACIDADE, colunas: int = 1 + NUM_CANAIS):
+        self.dono = nome is None
+        if self.dono:
+            tamanho = 8 * (self.CABECALHO + capacidade * colunas)
+            self.memoria = shared_memory.SharedMemory(create=True, size=tamanho)
+        else:
+            self.memoria = shared_memory.SharedMemory(name=nome)
+        self._cabecalho = np.ndarray((self.CABECALHO,), np.int64, self.memoria.buf)
+        if self.dono:
+            self._cabecalho[:] = (0, capacidade, colunas)
+        self.capacidade = int(self._cabecalho[1])
+        self.colunas = int(self._cabecalho[2])
+        self._linhas = np.ndarray(
+            (self.capacidade, self.colunas), np.float64, self.memoria.buf, offset=8 * self.CABECALHO
+        )
+
+    @property
+    def nome(self):
+        return self.memoria.name
+
+    @property
+    def sequencia(self) -> int:
+        return int(self._cabecalho[0])
+
+    def publicar(self, bloco):
+        """Copia o bloco para o anel e só então avança a sequência."""
+        for i in range(0, len(bloco), self.capacidade):
+            parte = bloco[i:i + self.capacidade]
+            sequencia = self.sequencia
+            posicao = sequencia % self.capacidade
+            primeira = min(len(parte), self.capacidade - posicao)
+            self._linhas[posicao:posicao + primeira] = parte[:primeira]
+            self._linhas[:len(parte) - primeira] = parte[primeira:]
+            self._cabecalho[0] = sequencia + len(parte)
+
+    def ler(self, desde: int):
+        """Linhas publicadas a partir da sequência `desde`.
+
+        Devolve (linhas ou None, sequência seguinte, linhas perdidas por
+        atraso). `linhas` é uma view da memória compartilhada, exceto quando
+        o trecho dá a volta no anel (aí são concatenadas).
+        """
+        sequencia = self.sequencia
+        perdidas = max(0, sequencia - self.capacidade - desde)
+        desde += perdidas
+        if desde >= sequencia:
+            return None, sequencia, perdidas
+        posicao = desde % self.capacidade
+        n = sequencia - desde
+        if posicao + n <= self.capacidade:
+            linhas = self._linhas[posicao:posicao + n]
+        else:
+            linhas = np.concatenate((self._linhas[posicao:], self._linhas[:posicao + n - self.capacidade]))
+        return linhas, sequencia, perdidas
+
+    def fechar(self):
+        """Solta o mapeamento (e remove o segmento, se foi este objeto que o criou)."""
+        self._cabecalho = self._linhas = None
+        self.memoria.close()
+        if self.dono:
+            self.memoria.unlink()
+
+class LeitorBarramento:
+    """Consome um AnelAmostras a partir da sequência atual, bloco a bloco."""
+
+    def __init__(self, anel: AnelAmostras):
+        self.anel = anel
+        self.sequencia = anel.sequencia
+        self.perdidas = 0
+
+    def ler(self):
+        """Linhas novas desde a última leitura, como um bloco próprio (ou None).
+
+        A cópia é a única do caminho: o bloco segue para filas e buffers que
+        vivem mais que a volta do anel. Linhas sobrescritas pelo publicador
+        durante a cópia são descartadas e contadas como perdidas.
+        """
+        linhas, seguinte, perdidas = self.anel.ler(self.sequencia)
+        inicio = self.sequencia + perdidas
+        self.sequencia = seguinte
+        self.perdidas += perdidas
+        if linhas is None:
+            return None
+        bloco = np.array(linhas)
+        sobrescritas = self.anel.sequencia - self.anel.capacidade - inicio
+        if sobrescritas > 0:
+            self.perdidas += sobrescritas
+            bloco = bloco[sobrescritas:]
+        return bloco if len(bloco) else None
+
+class _Publicador:
+    """Faz o anel passar pelo `comunicador` que os backends de aquisição esperam."""
+
+    def __init__(self, anel: AnelAmostras):
+        self.atualizar_canais = self
+        self._anel = anel
+        self._lock = threading.Lock()  # o anel tem um único publicador; as threads dos barramentos se revezam
+
+    def emit(self, bloco):
+        with self._lock:
+            self._anel.publicar(bloco)
+
+def _executar_aquisicao(nome_anel, tipo, parametros, parar, status):
+    """Corpo do processo de aquisição: roda o backend publicando no anel até `parar`."""
+    anel = AnelAmostras(nome_anel)
+    comunicador = _Publicador(anel)
+    # Processo novo (spawn): sem isso o logger não teria handlers e as mensagens se perderiam
+    logger = configurar_logs("Processo de aquisição iniciado")
+    try:
+        from app.controller import GerenciadorAquisicao, SimuladorController
+        from app.aquisicao_async import MotorAquisicaoAsync
+        if tipo == "simulado":
+            controlador = SimuladorController(comunicador, parametros['intervalo'])
+            controlador.iniciar()
+            encerrar = controlador.parar
+        else:
+            backend = MotorAquisicaoAsync if tipo == "async" else GerenciadorAquisicao
+            controlador = backend(comunicador=comunicador, logger=logger, **parametros)
+            controlador.conectar()
+            encerrar = controlador.desconectar
+    except Exception as e:
+        status.send(("erro", str(e)))
+        anel.fechar()
+        return
+    status.send(("ok", ""))
+
+    parar.wait()
+    encerrar()
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread():
+            thread.join(2.0)
+    anel.fechar()
+
+class ProcessoAquisicao:
+    """Roda a aquisição num processo próprio, publicando num AnelAmostras.
+
+    O tempo da aquisição fica livre do GIL da GUI (relatórios, gráfico,
+    gravação). `tipo` é "simulado", "threads" ou "async"; os demais
+    parâmetros vão para o backend. Quem consome chama ler(), inclusive uma
+    última vez depois de desconectar() para não perder o fim da sessão.
+    """
+
+    def __init__(self, tipo: str, logger=None, capacidade: int = BARRAMENTO_CAPACIDADE, **parametros):
+        self.tipo = tipo
+        self.parametros = parametros
+        self.logger = logger or logging.getLogger('TorqView')
+        self.capacidade = capacidade
+        self.anel = None
+        self.leitor = None
+        self.processo = None
+        self._parar = None
+        self._restante = None  # publicado entre a última leitura e o fim do processo
+
+    def conectar(self, timeout: float = 15.0):
+        contexto = multiprocessing.get_context("spawn")  # sem herdar threads e estado Qt da GUI
+        self.anel = AnelAmostras(capacidade=self.capacidade)
+        self.leitor = LeitorBarramento(self.anel)
+        self._parar = contexto.Event()
+        recebe, envia = contexto.Pipe(duplex=False)
+        self.processo = contexto.Process(
+            target=_executar_aquisicao,
+            args=(self.anel.nome, self.tipo, self.parametros, self._parar, envia),
+            name="TorqViewAquisicao",
+            daemon=True,
+        )
+        self.processo.start()
+        prazo = time.monotonic() + timeout
+        situacao, mensagem = "erro", "Processo de aquisição não respondeu"
+        while self.processo.is_alive() and time.monotonic() < prazo:
+            if recebe.poll(0.1):
+                situacao, mensagem = recebe.recv()
+                break
+        if situacao != "ok":
+            self.desconectar()
+            raise Exception(mensagem)
+
+    def ler(self):
+        """Bloco com as amostras publicadas desde a última chamada (ou None)."""
+        if self.leitor is None:
+            restante, self._restante = self._restante, None
+            return restante
+        return self.leitor.ler()
+
+    def desconectar(self, timeout: float = 5.0):
+        if self.processo is None:
+            return
+        self._parar.set()
+        self.processo.join(timeout)
+        if self.processo.is_alive():
+            self.logger.warning("Processo de aquisição não encerrou; finalizando")
+            self.processo.terminate()
+            self.processo.join()
+        self._restante = self.leitor.ler()
+        if self.leitor.perdidas:
+            self.logger.warning(f"Barramento: {self.leitor.perdidas} amostras perdidas por atraso da GUI")
+        self.processo = self.leitor = None
+        self.anel.fechar()
+        self.anel = None
@@ -0,0 +1,325 @@
+from collections import deque
+import numpy as np
+
+class MinMaxDeslizante:
+    """Mínimo e máximo de uma janela deslizante, via deques monotônicos.
+
+    Cada valor entra e sai de cada deque no máximo uma vez, então o custo
+    amortizado por amostra é O(1), independente do tamanho da janela.
+    """
+
+    def __init__(self, janela: int):
+        self.janela = janela
+        self._minimos = deque()  # (indice, valor) com valores crescentes
+        self._maximos = deque()  # (indice, valor) com valores decrescentes
+        self._indice = 0
+
+    def adicionar(self, valor: float):
+        indice = self._indice
+        self._indice += 1
+
+        while self._minimos and self._minimos[-1][1] >= valor:
+            self._minimos.pop()
+        self._minimos.append((indice, valor))
+
+        while self._maximos and self._maximos[-1][1] <= valor:
+            self._maximos.pop()
+        self._maximos.append((indice, valor))
+
+        # Descarta o que saiu da janela
+        limite = indice - self.janela
+        if self._minimos[0][0] <= limite:
+            self._minimos.popleft()
+        if self._maximos[0][0] <= limite:
+            self._maximos.popleft()
+
+    def adicionar_bloco(self, valores):
+        """Equivalente a adicionar() para cada valor do bloco, com o filtro feito em NumPy.
+
+        Dentro do bloco só sobrevivem como candidatos a mínimo os valores menores
+        que todos os posteriores (e a máximo, os maiores); o resto nunca entraria
+        nos deques, então só esses são empilhados.
+        """
+        valores = np.asarray(valores, dtype=float)
+        n = len(valores)
+        if n == 0:
+            return
+        indices = self._indice + np.arange(n)
+        self._indice += n
+
+        for deque_, acumular, comparar in (
+            (self._minimos, np.minimum, np.less),
+            (self._maximos, np.maximum, np.greater),
+        ):
+            posteriores = acumular.accumulate(valores[::-1])[::-1]
+            candidatos = np.ones(n, dtype=bool)
+            candidatos[:-1] = comparar(valores[:-1], posteriores[1:])
+            primeiro = valores[candidatos][0]
+            while deque_ and not comparar(deque_[-1][1], primeiro):
+                deque_.pop()
+            deque_.extend(zip(indices[candidatos].tolist(), valores[candidatos].tolist()))
+
+            limite = self._indice - 1 - self.janela
+            while deque_[0][0] <= limite:
+                deque_.popleft()
+
+    @property
+    def minimo(self):
+        return self._minimos[0][1] if self._minimos else None
+
+    @property
+    def maximo(self):
+        return self._maximos[0][1] if self._maximos else None
+
+    def limpar(self):
+        self._minimos.clear()
+        self._maximos.clear()
+        self._indice = 0
+
+class BufferCircular:
+    """Buffer circular de capacidade fixa para pares (x, y) de um canal.
+
+    Cada amostra é gravada duas vezes (posição p e p + capacidade), de modo que
+    a janela em ordem cronológica é sempre uma fatia contígua dos arrays:
+    dados() devolve visões NumPy sem cópia, prontas para o setData do gráfico.
+    """
+
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        self._x = np.zeros(2 * capacidade)
+        self._y = np.zeros(2 * capacidade)
+        self._pos = 0
+        self.tamanho = 0
+        self.total = 0  # amostras recebidas desde o início (ou último limpar)
+        self.extremos = MinMaxDeslizante(capacidade)
+
+    def adicionar(self, x: float, y: float):
+        p = self._pos
+        self._x[p] = self._x[p + self.capacidade] = x
+        self._y[p] = self._y[p + self.capacidade] = y
+        self._pos = (p + 1) % self.capacidade
+        self.tamanho = min(self.tamanho + 1, self.capacidade)
+        self.total += 1
+        self.extremos.adicionar(y)
+
+    def adicionar_bloco(self, xs, ys):
+        """Adiciona várias amostras de uma vez (escrita vetorizada no buffer)."""
+        n = len(ys)
+        if n == 0:
+            return
+        self.total += n
+        if n > self.capacidade:
+            xs, ys = xs[-self.capacidade:], ys[-self.capacidade:]
+        self._pos = _escrever_circular((self._x, self._y), self._pos, self.capacidade, (xs, ys))
+        self.tamanho = min(self.tamanho + len(ys), self.capacidade)
+        self.extremos.adicionar_bloco(ys)
+
+    def dados(self):
+        """Visões (x, y) da janela atual, da amostra mais antiga para a mais nova."""
+        if self.tamanho < self.capacidade:
+            return self._x[:self.tamanho], self._y[:self.tamanho]
+        fim = self._pos + self.capacidade
+        return self._x[self._pos:fim], self._y[self._pos:fim]
+
+    def limpar(self):
+        self._pos = 0
+        self.tamanho = 0
+        self.total = 0
+        self.extremos.limpar()
+
+class _NivelEnvelope:
+    """Um nível da pirâmide: envelopes (x, mínimo, máximo) em buffer circular."""
+
+    def __init__(self, capacidade: int):
+        self.capacidade = capacidade
+        self._x = np.zeros(2 * capacidade)
+        self._min = np.zeros(2 * capacidade)
+        self._max = np.zeros(2 * capacidade)
+        self._pos = 0
+        self.tamanho = 0
+        self.total = 0
+        # Envelope parcial, ainda acumulando entradas do nível anterior
+        self.parcial = None
+        self._n_parcial = 0
+
+    def acumular(self, x: float, minimo: float, maximo: float, fator: int):
+        """Agrega uma entrada do nível anterior; devolve o envelope quando completa `fator`."""
+        if self._n_parcial == 0:
+            self.parcial = [x, minimo, maximo]
+        else:
+            if minimo < self.parcial[1]:
+                self.parcial[1] = minimo
+            if maximo > self.parcial[2]:
+                self.parcial[2] = maximo
+        self._n_parcial += 1
+        if self._n_parcial < fator:
+            return None
+
+        envelope = tuple(self.parcial)
+        self._n_parcial = 0
+        self.parcial = None
+        p = self._pos
+        self._x[p] = self._x[p + self.capacidade] = envelope[0]
+        self._min[p] = self._min[p + self.capacidade] = envelope[1]
+        self._max[p] = self._max[p + self.capacidade] = envelope[2]
+        self._pos = (p + 1) % self.capacidade
+        self.tamanho = min(self.tamanho + 1, self.capacidade)
+        self.total += 1
+        return envelope
+
+    def acumular_bloco(self, xs, minimos, maximos, fator: int):
+        """Versão vetorizada de acumular(); devolve os envelopes completados (arrays)."""
+        n = len(xs)
+        if n == 0:
+            return None
+        i = 0
+        novos_x, novos_min, novos_max = [], [], []
+
+        # Completa o envelope parcial pendente
+        if self._n_parcial > 0:
+            i = min(fator - self._n_parcial, n)
+            self.parcial[1] = min(self.parcial[1], float(minimos[:i].min()))
+            self.parcial[2] = max(self.parcial[2], float(maximos[:i].max()))
+            self._n_parcial += i
+            if self._n_parcial == fator:
+                novos_x.append([self.parcial[0]])
+                novos_min.append([self.parcial[1]])
+                novos_max.append([self.parcial[2]])
+                self.parcial = None
+                self._n_parcial = 0
+
+        # Grupos completos de `fator` entradas
+        grupos = (n - i) // fator if self._n_parcial == 0 else 0
+        if grupos:
+            fim = i + grupos * fator
+            novos_x.append(xs[i:fim:fator])
+            novos_min.append(minimos[i:fim].reshape(grupos, fator).min(axis=1))
+            novos_max.append(maximos[i:fim].reshape(grupos, fator).max(axis=1))
+            i = fim
+
+        # A sobra inicia um novo envelope parcial
+        if i < n:
+            self.parcial = [float(xs[i]), float(minimos[i:].min()), float(maximos[i:].max())]
+            self._n_parcial = n - i
+
+        if not novos_x:
+            return None
+        envelopes = tuple(np.concatenate(partes) for partes in (novos_x, novos_min, novos_max))
+        quantidade = len(envelopes[0])
+        self.total += quantidade
+        gravar = tuple(e[-self.capacidade:] for e in envelopes)
+        self._pos = _escrever_circular((self._x, self._min, self._max), self._pos, self.capacidade, gravar)
+        self.tamanho = min(self.tamanho + len(gravar[0]), self.capacidade)
+        return envelopes
+
+    def dados(self):
+        if self.tamanho < self.capacidade:
+            fatia = slice(0, self.tamanho)
+        else:
+            fatia = slice(self._pos, self._pos + self.capacidade)
+        return self._x[fatia], self._min[fatia], self._max[fatia]
+
+    def limpar(self):
+        self._pos = 0
+        self.tamanho = 0
+        self.total = 0
+        self.parcial = None
+        self._n_parcial = 0
+
+class SerieDecimada(BufferCircular):
+    """Buffer circular com pirâmide de envelopes mín/máx para níveis de detalhe.
+
+    O nível 0 são as amostras brutas; cada nível seguinte guarda um envelope
+    (mínimo, máximo) a cada `fator` entradas do anterior, com a mesma capacidade.
+    Assim a sessão inteira cabe nos níveis grossos, e visao() devolve só
+    aproximadamente tantos pontos quanto há pixels na tela, sem perder picos.
+    """
+
+    def __init__(self, capacidade: int, niveis: int = 4, fator: int = 8):
+        super().__init__(capacidade)
+        self.fator = fator
+        self.niveis = [_NivelEnvelope(capacidade) for _ in range(niveis)]
+
+    def adicionar(self, x: float, y: float):
+        super().adicionar(x, y)
+        envelope = (x, y, y)
+        for nivel in self.niveis:
+            envelope = nivel.acumular(*envelope, self.fator)
+            if envelope is None:
+                break
+
+    def adicionar_bloco(self, xs, ys):
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        super().adicionar_bloco(xs, ys)
+        envelopes = (xs, ys, ys)
+        for nivel in self.niveis:
+            envelopes = nivel.acumular_bloco(*envelopes, self.fator)
+            if envelopes is None:
+                break
+
+    def limpar(self):
+        super().limpar()
+        for nivel in self.niveis:
+            nivel.limpar()
+
+    def visao(self, x_inicio: float, x_fim: float, pontos: int):
+        """Pontos (x, y) para desenhar o intervalo [x_inicio, x_fim] em `pontos` pixels.
+
+        Usa o nível mais fino que cobre o intervalo dentro do orçamento de
+        pontos; nos níveis de envelope, cada entrada vira um segmento vertical
+        do mínimo ao máximo.
+        """
+        x, y = self.dados()
+        if len(x) == 0:
+            return x, y
+
+        i0, i1 = _faixa(x, x_inicio, x_fim)
+        cobre = x[0] <= x_inicio or self.total <= self.capacidade
+        if cobre and i1 - i0 <= 2 * pontos:
+            return x[i0:i1], y[i0:i1]
+
+        escolhido = None
+        for indice, nivel in enumerate(self.niveis):
+            nx, nmin, nmax = nivel.dados()
+            if len(nx) == 0:
+                break
+            escolhido = indice
+            j0, j1 = _faixa(nx, x_inicio, x_fim)
+            cobre = nx[0] <= x_inicio or nivel.total <= nivel.capacidade
+            if cobre and j1 - j0 <= pontos:
+                break
+
+        if escolhido is None:
+            # Ainda não há envelopes: deixa o downsampling do pyqtgraph cuidar
+            return x[i0:i1], y[i0:i1]
+        return self._envelope(escolhido, x_inicio, x_fim)
+
+    def _envelope(self, indice: int, x_inicio: float, x_fim: float):
+        nx, nmin, nmax = self.niveis[indice].dados()
+        j0, j1 = _faixa(nx, x_inicio, x_fim)
+        xs, mins, maxs = nx[j0:j1], nmin[j0:j1], nmax[j0:j1]
+
+        # Fecha a borda direita com os envelopes parciais dos níveis mais finos,
+        # que juntos cobrem as amostras ainda não consolidadas neste nível.
+        parciais = [n.parcial for n in self.niveis[:indice + 1] if n.parcial is not None]
+        if parciais and j1 == len(nx):
+            xs = np.append(xs, min(p[0] for p in parciais))
+            mins = np.append(mins, min(p[1] for p in parciais))
+            maxs = np.append(maxs, max(p[2] for p in parciais))
+
+        return np.repeat(xs, 2), np.column_stack((mins, maxs)).ravel()
+
+def _escrever_circular(destinos, pos: int, capacidade: int, fontes):
+    """Grava `fontes` (até `capacidade` itens) a partir de `pos` nos arrays duplicados; devolve a nova posição."""
+    n = len(fontes[0])
+    indices = (pos + np.arange(n)) % capacidade
+    for destino, fonte in zip(destinos, fontes):
+        destino[indices] = fonte
+        destino[indices + capacidade] = fonte
+    return (pos + n) % capacidade
+
+def _faixa(x, x_inicio: float, x_fim: float):
+    """Índices [i0, i1) de x (crescente) cobrindo o intervalo, com um ponto de folga em cada lado."""
+    i0, i1 = np.searchsorted(x, (x_inicio, x_fim))
+    return max(int(i0) - 1, 0), min(int(i1) + 1, len(x))
@@ -0,0 +1,54 @@
+import numpy as np
+from app.picos import _SegmentadorLimiar
+
+class DetectorCiclos(_SegmentadorLimiar):
+    """Segmenta os apertos (ciclos) de um canal, bloco a bloco.
+
+    Um ciclo começa quando |valor| atinge `limiar_inicio` e termina na primeira
+    amostra com |valor| abaixo de `limiar_fim` (histerese entre os dois). De
+    cada ciclo saem só as características: início, fim, pico (com sinal) e seu
+    instante, média e integral de |valor| no tempo (Nm·s; com a ferramenta em
+    velocidade constante, duração e integral servem de indicador do ângulo) e
+    número de amostras. Ciclos mais curtos que `duracao_minima` são
+    descartados. processar() devolve os ciclos encerrados como dicts.
+    """
+
+    def __init__(self, limiar_inicio: float, limiar_fim: float, duracao_minima: float = 0.0):
+        super().__init__(limiar_inicio, min(limiar_fim, limiar_inicio))
+        self.duracao_minima = duracao_minima
+        self._iniciar(None)
+
+    def _iniciar(self, inicio: float):
+        self._inicio = inicio
+        self._anterior = inicio  # instante da última amostra já acumulada
+        self._pico = 0.0
+        self._instante_pico = None
+        self._soma = 0.0
+        self._integral = 0.0
+        self._amostras = 0
+
+    def _acumular(self, tempos, valores, magnitude):
+        anteriores = np.empty_like(tempos)
+        anteriores[0] = self._anterior
+        anteriores[1:] = tempos[:-1]
+        self._integral += float(np.dot(magnitude, tempos - anteriores))
+        self._soma += float(valores.sum())
+        self._amostras += len(valores)
+        self._anterior = float(tempos[-1])
+        j = int(np.argmax(magnitude))
+        if self._instante_pico is None or magnitude[j] > abs(self._pico):
+            self._pico = float(valores[j])
+            self._instante_pico = float(tempos[j])
+
+    def _encerrar(self, fim: float):
+        if fim - self._inicio < self.duracao_minima:
+            return None
+        return {
+            'inicio': self._inicio,
+            'fim': fim,
+            'pico': self._pico,
+            'instante_pico': self._instante_pico,
+            'media': self._soma / self._amostras,
+            'integral': self._integral,
+            'amostras': self._amostras,
+        }
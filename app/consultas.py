@@ -0,0 +1,93 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+from app.database import conectar_leitura
+from app.settings import CONSULTAS_THREADS
+
+class ExecutorConsultas(QObject):
+    """Executa consultas ao banco fora da thread da GUI.
+
+    Cada worker usa sua própria conexão somente leitura. Consultas têm uma
+    chave (ex.: "filtro", "total_resultados"): uma nova consulta com a mesma chave substitui
+    a anterior, que é cancelada se ainda estiver na fila ou interrompida
+    (conn.interrupt) se já estiver rodando. O resultado volta pelo sinal
+    `concluida(chave, resultado)`, sempre na thread da GUI; resultados de
+    consultas substituídas são descartados.
+    """
+
+    concluida = pyqtSignal(str, object)
+    falhou = pyqtSignal(str, str)
+    _resultado = pyqtSignal(str, int, object, str)
+
+    def __init__(self, logger=None, threads=CONSULTAS_THREADS, parent=None):
+        super().__init__(parent)
+        self.logger = logger
+        self._pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="consultas")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._geracoes = {}  # chave -> geração da consulta mais recente
+        self._futuros = {}  # chave -> future da consulta mais recente
+        self._em_execucao = {}  # chave -> (geração, conexão) enquanto roda
+        self._resultado.connect(self._entregar)
+
+    def executar(self, chave, funcao, *args, **kwargs):
+        """Agenda `funcao(*args, conn=<conexão somente leitura>, **kwargs)`."""
+        self.cancelar(chave)
+        geracao = self._geracoes.get(chave, 0) + 1
+        self._geracoes[chave] = geracao
+        self._futuros[chave] = self._pool.submit(self._rodar, chave, geracao, funcao, args, kwargs)
+
+    def cancelar(self, chave):
+        """Descarta a consulta pendente da chave, interrompendo-a se já estiver rodando."""
+        if chave not in self._geracoes:
+            return
+        self._geracoes[chave] += 1
+        futuro = self._futuros.pop(chave, None)
+        if futuro is not None and not futuro.cancel():
+            with self._lock:
+                rodando = self._em_execucao.get(chave)
+                if rodando is not None:
+                    rodando[1].interrupt()
+
+    def encerrar(self):
+        for chave in list(self._geracoes):
+            self.cancelar(chave)
+        self._pool.shutdown(wait=False)
+
+    def _conexao(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = conectar_leitura()
+        return conn
+
+    def _rodar(self, chave, geracao, funcao, args, kwargs):
+        if self._geracoes.get(chave) != geracao:
+            return
+        conn = self._conexao()
+        with self._lock:
+            self._em_execucao[chave] = (geracao, conn)
+        try:
+            resultado, erro = funcao(*args, conn=conn, **kwargs), ""
+        except sqlite3.OperationalError as e:
+            if self._geracoes.get(chave) != geracao:
+                return  # interrompida por uma consulta mais nova
+            resultado, erro = None, str(e)
+        except Exception as e:
+            resultado, erro = None, str(e)
+        finally:
+            with self._lock:
+                if self._em_execucao.get(chave, (None,))[0] == geracao:
+                    del self._em_execucao[chave]
+        self._resultado.emit(chave, geracao, resultado, erro)
+
+    def _entregar(self, chave, geracao, resultado, erro):
+        if self._geracoes.get(chave) != geracao:
+            return
+        self._futuros.pop(chave, None)
+        if erro:
+            if self.logger:
+                self.logger.error(f"Erro na consulta '{chave}': {erro}")
+            self.falhou.emit(chave, erro)
+        else:
+            self.concluida.emit(chave, resultado)
@@ -5,24 +5,78 @@ import struct
 from PyQt5.QtMultimedia import QSoundEffect
 from PyQt5.QtCore import QUrl
 from pymodbus.client import ModbusSerialClient
-from app.settings import SOUND_PATH
+from app.settings import SOUND_PATH, RELATORIO_AQUISICAO_S, NUM_CANAIS
+from app.agendador import AgendadorPeriodico
+from app.amostras import AcumuladorBlocos
+
+# Limite de registros por requisição de leitura (Modbus: 125 holding registers)
+MAX_REGISTROS_POR_LEITURA = 125
+
+def planejar_leituras(variaveis, max_lacuna=0, max_registros=MAX_REGISTROS_POR_LEITURA):
+    """Agrupa variáveis de registros vizinhos no menor número de requisições.
+
+    `variaveis` mapeia nome -> (endereço, quantidade de registros). Devolve uma
+    lista de leituras {'endereco', 'quantidade', 'campos'}, em que cada campo é
+    (nome, deslocamento na resposta, quantidade). Lacunas de até `max_lacuna`
+    registros são lidas junto quando isso economiza um quadro RTU.
+    """
+    leituras = []
+    for nome, (endereco, quantidade) in sorted(variaveis.items(), key=lambda item: item[1][0]):
+        if leituras:
+            atual = leituras[-1]
+            fim_atual = atual['endereco'] + atual['quantidade']
+            novo_fim = max(fim_atual, endereco + quantidade)
+            if endereco - fim_atual <= max_lacuna and novo_fim - atual['endereco'] <= max_registros:
+                atual['quantidade'] = novo_fim - atual['endereco']
+                atual['campos'].append((nome, endereco - atual['endereco'], quantidade))
+                continue
+        leituras.append({
+            'endereco': endereco,
+            'quantidade': quantidade,
+            'campos': [(nome, 0, quantidade)],
+        })
+    return leituras
+
+def registros_para_float(registros):
+    """Converte dois registros de 16 bits (big-endian) em float32."""
+    return struct.unpack('>f', struct.pack('>HH', *registros))[0]
 
 class ModbusController:
-    def __init__(self, porta, baud_rate, comunicador, logger):
+    """Aquisição de um barramento serial, com um ou mais escravos em round-robin.
+
+    `dispositivos` é a lista de (slave_id, canal) deste barramento. A cada ciclo
+    um escravo é lido, e o período do ciclo é dividido pelo número de escravos
+    para que cada canal seja amostrado a `intervalo`.
+    """
+
+    def __init__(self, porta, baud_rate, comunicador, logger, intervalo=1.0, dispositivos=None):
         self.porta = porta
         self.baud_rate = baud_rate
         self.comunicador = comunicador
         self.logger = logger
         self.client = None
+        self.thread = None
         self.thread_rodando = False
+        self.dispositivos = dispositivos or [(1, 1)]
+        self.agendador = AgendadorPeriodico(intervalo / len(self.dispositivos))
 
-        self.slave_id = 1
+        self.slave_id = self.dispositivos[0][0]
         self.registros = {
             'torque' : 0x0606,
             'pico' : 0x0608,
             'vale' : 0x060A,
             'calibracao' : 0x0FB8
         }
+        # Variáveis lidas a cada amostra (float32 = 2 registros), agrupadas em
+        # uma única requisição quando os endereços são vizinhos
+        self.variaveis = {
+            'torque' : (self.registros['torque'], 2),
+            'pico' : (self.registros['pico'], 2),
+            'vale' : (self.registros['vale'], 2),
+        }
+        self.plano_leitura = planejar_leituras(self.variaveis)
+        self.ultimas_variaveis = {}  # slave_id -> {nome: valor}
+        self._suspensos = {}  # slave_id -> instante (monotônico) para tentar de novo
 
     def conectar(self):
         """Estabelece conexão Modbus RTU"""
@@ -38,46 +92,92 @@ class ModbusController:
                 raise Exception("Falha ao conectar o dispositivo")
             
             self.thread_rodando = True
-            thread = threading.Thread(target=self.ler_dados_modbus, daemon=True)
-            thread.start()
+            self.thread = threading.Thread(target=self.ler_dados_modbus, daemon=True)
+            self.thread.start()
 
         except Exception as e:
             self.logger.error(f"Erro na conexão: {str(e)}")
             raise
 
     def desconectar(self):
-        """Encerra a conexão Modbus"""
+        """Encerra a conexão Modbus depois que a thread entregou o último bloco"""
         self.thread_rodando = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            # No pior caso, uma espera do agendador e uma leitura em curso (timeout de 1 s)
+            self.thread.join(self.agendador.periodo + 2)
         if self.client:
             try:
                 self.client.close()
             except Exception as e:
                 self.logger.error(f"Erro ao desconectar: {str(e)}")
 
+    def ler_variaveis(self, slave_id=None):
+        """Lê todas as variáveis do plano de leitura e devolve {nome: valor}."""
+        valores = {}
+        for leitura in self.plano_leitura:
+            response = self.client.read_holding_registers(
+                address=leitura['endereco'],
+                count=leitura['quantidade'],
+                device_id=self.slave_id if slave_id is None else slave_id
+            )
+            if response.isError():
+                raise Exception(f"Erro Modbus: {response}")
+
+            for nome, deslocamento, quantidade in leitura['campos']:
+                valores[nome] = registros_para_float(response.registers[deslocamento:deslocamento + quantidade])
+        return valores
+
+    def _proximo_dispositivo(self, indice):
+        """Próximo (índice, dispositivo) no round-robin, pulando escravos suspensos por erro."""
+        agora = time.monotonic()
+        for passo in range(len(self.dispositivos)):
+            candidato = (indice + passo) % len(self.dispositivos)
+            slave_id, canal = self.dispositivos[candidato]
+            if self._suspensos.get(slave_id, 0) <= agora:
+                return candidato, (slave_id, canal)
+        return indice, None
+
     def ler_dados_modbus(self):
+        # Amostras seguem para a GUI em blocos, não uma emissão por leitura
+        acumulador = AcumuladorBlocos(self.comunicador.atualizar_canais.emit, periodo=self.agendador.periodo)
+        self.agendador.iniciar()
+        proximo_relatorio = time.monotonic() + RELATORIO_AQUISICAO_S
+        indice = 0
         while self.thread_rodando:
-            try:
-                if not self.client.connected:
-                    self.client.connect()
-                    
-                response = self.client.read_holding_registers(
-                    address=self.registros['torque'],
-                    count=2,
-                    slave=self.slave_id
-                )
-                
-                if response.isError():
-                    self.logger.error(f"Erro Modbus: {response}")
-                    time.sleep(1)
-                    continue
-                    
-                torque = struct.unpack('>f', struct.pack('>HH', *response.registers))[0]
-                self.comunicador.atualizar_canais.emit([torque, 0, 0, 0])
-                
-            except Exception as e:
-                self.logger.error(f"Erro na leitura: {str(e)}")
-            finally:
-                time.sleep(1)
+            indice, dispositivo = self._proximo_dispositivo(indice)
+            indice = (indice + 1) % len(self.dispositivos)
+            if dispositivo is not None:
+                slave_id, canal = dispositivo
+                try:
+                    if not self.client.connected:
+                        self.client.connect()
+
+                    variaveis = self.ler_variaveis(slave_id)
+                    # Carimbo de tempo no momento da aquisição, não na chegada à GUI
+                    timestamp = time.time()
+                    self.ultimas_variaveis[slave_id] = variaveis
+
+                    # Canais sem leitura neste ciclo vão como NaN
+                    valores = [float('nan')] * NUM_CANAIS
+                    valores[canal - 1] = variaveis['torque']
+                    acumulador.adicionar(timestamp, valores)
+
+                except Exception as e:
+                    self.logger.error(f"Erro na leitura ({self.porta}, escravo {slave_id}): {str(e)}")
+                    # Suspende só este escravo por 1 s; os demais do barramento seguem
+                    self._suspensos[slave_id] = time.monotonic() + 1
+
+            if time.monotonic() >= proximo_relatorio:
+                self.logger.info(f"Aquisição {self.porta}: {self.agendador.relatorio()}")
+                self.agendador.zerar_estatisticas()
+                proximo_relatorio = time.monotonic() + RELATORIO_AQUISICAO_S
+
+            # Sem leituras (escravos suspensos) o bloco pendente não pode ficar parado
+            if acumulador.vencido(self.agendador.periodo):
+                acumulador.descarregar()
+            self.agendador.aguardar()
+
+        acumulador.descarregar()
 
     def ler_key(self):
         """Lê a chave do dispositivo via Modbus"""
@@ -86,7 +186,7 @@ class ModbusController:
             response = self.client.read_holding_registers(
                 address=self.registros['calibracao'],
                 count=8,
-                slave=self.slave_id
+                device_id=self.slave_id
             )
             
             if response.isError():
@@ -119,7 +219,7 @@ class ModbusController:
             response = self.client.write_registers(
                 address=self.registros['calibracao'],
                 values=registers,
-                slave=self.slave_id
+                device_id=self.slave_id
             )
             
             if response.isError():
@@ -131,26 +231,83 @@ class ModbusController:
             self.logger.error(f"Erro ao gravar chave: {str(e)}")
             raise
 
+class GerenciadorAquisicao:
+    """Aquisição de vários dispositivos Modbus espalhados por barramentos seriais.
+
+    Cria um ModbusController (com sua própria thread) por porta serial, então os
+    barramentos são lidos em paralelo e os escravos de um mesmo barramento em
+    round-robin. Cada dispositivo é mapeado para um canal de medição.
+    """
+
+    def __init__(self, dispositivos, baud_rate, comunicador, logger, intervalo=1.0):
+        por_porta = {}
+        for dispositivo in dispositivos:
+            por_porta.setdefault(dispositivo['porta'], []).append(
+                (dispositivo['slave'], dispositivo['canal'])
+            )
+        self.logger = logger
+        self.controladores = {
+            porta: ModbusController(porta, baud_rate, comunicador, logger, intervalo, lista)
+            for porta, lista in por_porta.items()
+        }
+
+    def conectar(self):
+        """Conecta todos os barramentos; se algum falhar, desfaz os já conectados."""
+        conectados = []
+        try:
+            for controlador in self.controladores.values():
+                controlador.conectar()
+                conectados.append(controlador)
+        except Exception:
+            for controlador in conectados:
+                controlador.desconectar()
+            raise
+
+    def desconectar(self):
+        # Sinaliza todos antes de esperar: os barramentos encerram em paralelo
+        for controlador in self.controladores.values():
+            controlador.thread_rodando = False
+        for controlador in self.controladores.values():
+            controlador.desconectar()
+
+    @property
+    def principal(self):
+        """Controlador do primeiro barramento (usado para leitura/gravação da key)."""
+        return next(iter(self.controladores.values()))
+
+    def ler_key(self):
+        return self.principal.ler_key()
+
+    def gravar_key(self, new_key):
+        return self.principal.gravar_key(new_key)
+
 class SimuladorController:
     def __init__(self, comunicador, intervalo):
         self.comunicador = comunicador
         self.intervalo = intervalo
         self.thread_rodando = False
+        self.thread = None
+        self.agendador = AgendadorPeriodico(intervalo)
 
     def iniciar(self):
         self.thread_rodando = True
-        thread = threading.Thread(target=self.ler_dados_simulados)
-        thread.start()
+        self.thread = threading.Thread(target=self.ler_dados_simulados)
+        self.thread.start()
 
     def parar(self):
+        """Encerra a simulação depois que a thread entregou o último bloco."""
         self.thread_rodando = False
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(self.intervalo + 2)
 
     def ler_dados_simulados(self):
+        acumulador = AcumuladorBlocos(self.comunicador.atualizar_canais.emit, periodo=self.intervalo)
+        self.agendador.iniciar()
         while self.thread_rodando:
-            valor = round(random.uniform(5.0, 25.0), 2)
             valores_simulados = [random.uniform(0, 1400) for _ in range(4)]  # Simula 4 canais
-            self.comunicador.atualizar_canais.emit(valores_simulados)
-            time.sleep(self.intervalo)
+            acumulador.adicionar(time.time(), valores_simulados)
+            self.agendador.aguardar()
+        acumulador.descarregar()
 
 def configurar_alerta_sonoro():
     alerta_sonoro = QSoundEffect()
@@ -1,11 +1,546 @@
 import sqlite3
+import sys
+import heapq
+import queue
+import threading
+import time
+import logging
+import gzip
+import os
+import shutil
+import tempfile
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager, closing
 from pathlib import Path
-from app.settings import DB_PATH
-from datetime import datetime
+from app.settings import (
+    DB_PATH, ARQUIVO_DIR, PARTICOES_DIR, PARTICIONAMENTO, PARTICOES_MMAP, GRAVADOR_TAMANHO_LOTE, GRAVADOR_INTERVALO_S, GRAVADOR_CAPACIDADE_FILA,
+    GRAVADOR_INTERVALO_AVISO_S, BLOCO_JANELA_S, BLOCO_MAX_AMOSTRAS, ARQUIVO_CACHE_HORAS
+)
+from app.alarmes import LimitadorAlertas
+from datetime import datetime, timezone
+
+# Nenhum bloco cobre mais que isso: permite filtrar blocos por faixa só pelo índice de início
+DURACAO_MAXIMA_BLOCO = 60.0
+
+# Pragmas aplicados a cada conexão (synchronous e cache_size valem por conexão)
+PRAGMAS_CONEXAO = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -20000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",
+)
+
+# Migrações de esquema, aplicadas em ordem conforme PRAGMA user_version
+MIGRACOES = [
+    # 1: índices para consultas por canal/data e por pico
+    (
+        "CREATE INDEX IF NOT EXISTS idx_leituras_porta_timestamp ON leituras (porta, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_leituras_timestamp ON leituras (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_leituras_valor ON leituras (valor)",
+    ),
+    # 2: armazenamento em blocos float32 (ver _migrar_leituras_para_blocos)
+    lambda conn: _migrar_leituras_para_blocos(conn),
+    # 3: agregados por canal e balde de tempo (ver _criar_agregados)
+    lambda conn: _criar_agregados(conn),
+    # 4: catálogo dos arquivos de blocos antigos (ver app.retencao)
+    (
+        """
+        CREATE TABLE IF NOT EXISTS arquivos (
+            periodo TEXT PRIMARY KEY,
+            inicio REAL NOT NULL,
+            fim REAL NOT NULL,
+            fim_dados REAL NOT NULL,
+            maximo REAL NOT NULL,
+            blocos INTEGER NOT NULL,
+            arquivo TEXT NOT NULL
+        )
+        """,
+    ),
+    # 5: catálogo das partições de blocos por dia/mês (ver PARTICIONAMENTO)
+    (
+        """
+        CREATE TABLE IF NOT EXISTS particoes (
+            periodo TEXT PRIMARY KEY,
+            inicio REAL NOT NULL,
+            fim REAL NOT NULL,
+            fim_dados REAL NOT NULL,
+            maximo REAL NOT NULL,
+            blocos INTEGER NOT NULL,
+            arquivo TEXT NOT NULL,
+            selada INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+    ),
+    # 6: eventos de alarme de limite (ver app.alarmes)
+    (
+        """
+        CREATE TABLE IF NOT EXISTS alarmes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            porta TEXT NOT NULL,
+            instante REAL NOT NULL,
+            valor REAL NOT NULL,
+            limite REAL NOT NULL,
+            reconhecido_em REAL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_alarmes_instante ON alarmes (instante)",
+    ),
+    # 7: um registro por ciclo de aperto (ver app.ciclos); porta, inicio e fim
+    # apontam para as amostras brutas em blocos
+    (
+        """
+        CREATE TABLE IF NOT EXISTS ciclos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            porta TEXT NOT NULL,
+            inicio REAL NOT NULL,
+            fim REAL NOT NULL,
+            pico REAL NOT NULL,
+            instante_pico REAL NOT NULL,
+            media REAL NOT NULL,
+            integral REAL NOT NULL,
+            amostras INTEGER NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_ciclos_inicio ON ciclos (inicio)",
+        "CREATE INDEX IF NOT EXISTS idx_ciclos_porta_inicio ON ciclos (porta, inicio)",
+    ),
+    # 8: picos em |valor| nos dois sentidos (ver buscar_picos): mínimo nos
+    # catálogos (NULL, desconhecido, nos já existentes) e índice pelo maior
+    # |valor| de cada bloco no lugar do índice pelo máximo
+    (
+        "ALTER TABLE arquivos ADD COLUMN minimo REAL",
+        "ALTER TABLE particoes ADD COLUMN minimo REAL",
+        "DROP INDEX IF EXISTS idx_blocos_maximo",
+        "CREATE INDEX IF NOT EXISTS idx_blocos_pico ON blocos (MAX(maximo, -minimo))",
+    ),
+]
+
+# Uma partição deixa de receber blocos (e pode ser selada) este tempo após o fim do período
+MARGEM_SELO_PARTICAO = 3600.0
+
+# Resoluções (s) dos agregados, da mais fina para a mais grossa
+RESOLUCOES_AGREGADOS = (1, 60, 3600)
+
+def conectar():
+    """Abre uma conexão com o banco já configurada com os pragmas de desempenho."""
+    conn = sqlite3.connect(DB_PATH)
+    for pragma in PRAGMAS_CONEXAO:
+        conn.execute(pragma)
+    return conn
+
+def conectar_leitura():
+    """Conexão somente leitura, para consultas fora da thread da GUI.
+
+    Com WAL os leitores não bloqueiam o gravador nem são bloqueados por ele.
+    """
+    conn = sqlite3.connect(f"{Path(DB_PATH).resolve().as_uri()}?mode=ro", uri=True)
+    for pragma in PRAGMAS_CONEXAO:
+        conn.execute(pragma)
+    return conn
+
+@contextmanager
+def _conexao(conn=None):
+    """Usa a conexão recebida ou abre (e fecha no fim) uma nova."""
+    if conn is not None:
+        yield conn
+        return
+    conn = conectar()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def migrar_db(conn):
+    """Aplica as migrações pendentes, cada uma em sua própria transação."""
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    for numero, comandos in enumerate(MIGRACOES[versao:], start=versao + 1):
+        conn.execute("BEGIN")
+        try:
+            if callable(comandos):
+                comandos(conn)
+            else:
+                for comando in comandos:
+                    conn.execute(comando)
+            conn.execute(f"PRAGMA user_version = {numero}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def _para_epoch(texto: str) -> float:
+    """Converte 'YYYY-MM-DD HH:MM:SS[.fff]' (UTC, como CURRENT_TIMESTAMP) em epoch."""
+    return datetime.fromisoformat(texto).replace(tzinfo=timezone.utc).timestamp()
+
+def _para_texto(epoch: float) -> str:
+    """Converte epoch em texto UTC no formato do CURRENT_TIMESTAMP, com milissegundos."""
+    return datetime.fromtimestamp(round(epoch, 3), timezone.utc).replace(tzinfo=None).isoformat(sep=' ', timespec='milliseconds')
+
+def _codificar(valores) -> bytes:
+    """Serializa uma sequência de floats como float32 little-endian."""
+    dados = array('f', valores)
+    if sys.byteorder == 'big':
+        dados.byteswap()
+    return dados.tobytes()
+
+def _decodificar(blob: bytes) -> array:
+    dados = array('f')
+    dados.frombytes(blob)
+    if sys.byteorder == 'big':
+        dados.byteswap()
+    return dados
+
+class _BlocoAberto:
+    """Amostras de um canal ainda não gravadas, acumuladas até fechar um bloco."""
+
+    __slots__ = ('porta', 'tempos', 'valores', 'aberto_em')
+
+    def __init__(self, porta: str):
+        self.porta = porta
+        self.tempos = []
+        self.valores = []
+        self.aberto_em = time.monotonic()
+
+    def aceita(self, timestamp: float, janela: float) -> bool:
+        if not self.tempos:
+            return True
+        return (len(self.valores) < BLOCO_MAX_AMOSTRAS
+                and self.tempos[-1] <= timestamp < self.tempos[0] + janela)
+
+    def adicionar(self, valor: float, timestamp: float):
+        self.tempos.append(timestamp)
+        self.valores.append(valor)
+
+    def linha(self):
+        """Linha pronta para INSERT na tabela blocos."""
+        inicio = self.tempos[0]
+        return (
+            self.porta, inicio, self.tempos[-1], len(self.valores),
+            min(self.valores), max(self.valores),
+            _codificar([t - inicio for t in self.tempos]),
+            _codificar(self.valores),
+        )
+
+SQL_INSERIR_BLOCO = """
+    INSERT INTO blocos (porta, inicio, fim, quantidade, minimo, maximo, tempos, valores)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_INSERIR_ALARME = "INSERT INTO alarmes (porta, instante, valor, limite) VALUES (?, ?, ?, ?)"
+
+SQL_RECONHECER_ALARME = "UPDATE alarmes SET reconhecido_em = ? WHERE porta = ? AND reconhecido_em IS NULL"
+
+SQL_INSERIR_CICLO = """
+    INSERT INTO ciclos (porta, inicio, fim, pico, instante_pico, media, integral, amostras)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def _janela_bloco() -> float:
+    return min(BLOCO_JANELA_S, DURACAO_MAXIMA_BLOCO)
+
+def criar_tabela_blocos(conn):
+    """Tabela de blocos e seus índices (banco principal e arquivos de blocos antigos)."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS blocos (
+            id INTEGER PRIMARY KEY,
+            porta TEXT NOT NULL,
+            inicio REAL NOT NULL,
+            fim REAL NOT NULL,
+            quantidade INTEGER NOT NULL,
+            minimo REAL NOT NULL,
+            maximo REAL NOT NULL,
+            tempos BLOB NOT NULL,
+            valores BLOB NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_blocos_porta_inicio ON blocos (porta, inicio)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_blocos_inicio ON blocos (inicio)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_blocos_pico ON blocos (MAX(maximo, -minimo))")
+
+def _migrar_leituras_para_blocos(conn):
+    """Cria a tabela blocos e converte as leituras linha-a-linha existentes."""
+    criar_tabela_blocos(conn)
+
+    janela = _janela_bloco()
+    bloco = None
+    linhas = []
+    cursor = conn.execute(
+        "SELECT valor, porta, timestamp FROM leituras WHERE timestamp IS NOT NULL ORDER BY porta, timestamp"
+    )
+    for valor, porta, timestamp in cursor:
+        t = _para_epoch(timestamp)
+        if bloco is None or bloco.porta != porta or not bloco.aceita(t, janela):
+            if bloco is not None:
+                linhas.append(bloco.linha())
+            bloco = _BlocoAberto(porta)
+        bloco.adicionar(valor, t)
+        if len(linhas) >= 1000:
+            conn.executemany(SQL_INSERIR_BLOCO, linhas)
+            linhas = []
+    if bloco is not None:
+        linhas.append(bloco.linha())
+    conn.executemany(SQL_INSERIR_BLOCO, linhas)
+    # A tabela leituras fica vazia, mantida só por compatibilidade
+    conn.execute("DELETE FROM leituras")
+
+SQL_ACUMULAR_AGREGADO = """
+    INSERT INTO agregados
+        (resolucao, porta, balde, minimo, maximo, soma, soma_quadrados, contagem, instante_pico)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (resolucao, porta, balde) DO UPDATE SET
+        minimo = MIN(minimo, excluded.minimo),
+        maximo = MAX(maximo, excluded.maximo),
+        soma = soma + excluded.soma,
+        soma_quadrados = soma_quadrados + excluded.soma_quadrados,
+        contagem = contagem + excluded.contagem,
+        instante_pico = CASE WHEN excluded.maximo > maximo
+                             THEN excluded.instante_pico ELSE instante_pico END
+"""
+
+def _acumular_balde(baldes, chave, minimo, maximo, soma, soma_quadrados, contagem, instante_pico):
+    atual = baldes.get(chave)
+    if atual is None:
+        baldes[chave] = [minimo, maximo, soma, soma_quadrados, contagem, instante_pico]
+        return
+    if minimo < atual[0]:
+        atual[0] = minimo
+    if maximo > atual[1]:
+        atual[1] = maximo
+        atual[5] = instante_pico
+    atual[2] += soma
+    atual[3] += soma_quadrados
+    atual[4] += contagem
+
+def _agregar_blocos(linhas):
+    """Agregados (uma linha por resolução/porta/balde) das linhas de blocos recebidas.
+
+    Cada entrada é (resolucao, porta, balde, minimo, maximo, soma,
+    soma_quadrados, contagem, instante_pico), pronta para SQL_ACUMULAR_AGREGADO.
+    Um bloco que cabe inteiro num balde entra de uma vez, sem percorrer amostras.
+    """
+    baldes = {}
+    for porta, inicio, _, _, _, _, tempos, valores in linhas:
+        amostras = [(inicio + dt, v) for dt, v in zip(_decodificar(tempos), _decodificar(valores))]
+        fim = amostras[-1][0]
+        total = None
+        for resolucao in RESOLUCOES_AGREGADOS:
+            balde = inicio // resolucao * resolucao
+            if fim // resolucao * resolucao == balde:
+                if total is None:
+                    instante_pico, maximo = max(amostras, key=lambda amostra: amostra[1])
+                    soma = sum(v for _, v in amostras)
+                    total = (min(v for _, v in amostras), maximo, soma,
+                             sum(v * v for _, v in amostras), len(amostras), instante_pico)
+                _acumular_balde(baldes, (resolucao, porta, balde), *total)
+                continue
+            for t, v in amostras:
+                _acumular_balde(baldes, (resolucao, porta, t // resolucao * resolucao), v, v, v, v * v, 1, t)
+    return [chave + tuple(valores) for chave, valores in baldes.items()]
+
+SQL_ATUALIZAR_PARTICAO = """
+    INSERT INTO particoes (periodo, inicio, fim, fim_dados, maximo, minimo, blocos, arquivo)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (periodo) DO UPDATE SET
+        fim_dados = MAX(fim_dados, excluded.fim_dados),
+        maximo = MAX(maximo, excluded.maximo),
+        minimo = MIN(minimo, excluded.minimo),
+        blocos = blocos + excluded.blocos
+"""
+
+def _inserir_blocos(conn, linhas):
+    """Grava linhas de blocos e acumula seus agregados (na transação de quem chama)."""
+    conn.executemany(SQL_INSERIR_BLOCO, linhas)
+    conn.executemany(SQL_ACUMULAR_AGREGADO, _agregar_blocos(linhas))
+
+def _criar_agregados(conn):
+    """Cria a tabela agregados e a preenche a partir dos blocos existentes."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS agregados (
+            resolucao INTEGER NOT NULL,
+            porta TEXT NOT NULL,
+            balde REAL NOT NULL,
+            minimo REAL NOT NULL,
+            maximo REAL NOT NULL,
+            soma REAL NOT NULL,
+            soma_quadrados REAL NOT NULL,
+            contagem INTEGER NOT NULL,
+            instante_pico REAL NOT NULL,
+            PRIMARY KEY (resolucao, porta, balde)
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_agregados_balde ON agregados (resolucao, balde)")
+
+    cursor = conn.execute("SELECT porta, inicio, fim, quantidade, minimo, maximo, tempos, valores FROM blocos")
+    while True:
+        linhas = cursor.fetchmany(1000)
+        if not linhas:
+            break
+        conn.executemany(SQL_ACUMULAR_AGREGADO, _agregar_blocos(linhas))
+
+def _segmentos_agregados(inicio: float, fim: float, resolucoes=None):
+    """Cobre [inicio, fim) com o menor número de baldes: (resolucao, de, até).
+
+    Usa baldes grossos no miolo do intervalo e os mais finos só nas bordas.
+    """
+    resolucoes = resolucoes or sorted(RESOLUCOES_AGREGADOS, reverse=True)
+    resolucao, *mais_finas = resolucoes
+    if not mais_finas:
+        return [(resolucao, inicio // resolucao * resolucao, fim)] if fim > inicio else []
+    de = -(-inicio // resolucao) * resolucao
+    ate = fim // resolucao * resolucao
+    if ate <= de:
+        return _segmentos_agregados(inicio, fim, mais_finas)
+    return (_segmentos_agregados(inicio, de, mais_finas)
+            + [(resolucao, de, ate)]
+            + _segmentos_agregados(ate, fim, mais_finas))
+
+# Cópias descompactadas dos arquivos .db.gz, abertas sob demanda pelas consultas
+ARQUIVO_CACHE_DIR = Path(tempfile.gettempdir()) / "torqview-arquivo"
+_lock_cache_arquivos = threading.Lock()
+
+def _abrir_arquivo(nome: str):
+    """Conexão somente leitura com um arquivo de blocos (descompactado em cache)."""
+    compactado = ARQUIVO_DIR / nome
+    copia = ARQUIVO_CACHE_DIR / nome.removesuffix(".gz")
+    with _lock_cache_arquivos:
+        if not copia.exists() or copia.stat().st_mtime < compactado.stat().st_mtime:
+            ARQUIVO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            # O lock só vale dentro do processo: cada escritor (inclusive os processos de
+            # relatorios.py) descompacta no seu próprio temporário e publica a cópia inteira
+            with tempfile.NamedTemporaryFile(dir=ARQUIVO_CACHE_DIR, suffix=".tmp", delete=False) as destino:
+                try:
+                    with gzip.open(compactado, "rb") as origem:
+                        shutil.copyfileobj(origem, destino)
+                except BaseException:
+                    destino.close()
+                    os.unlink(destino.name)
+                    raise
+            try:
+                os.replace(destino.name, copia)
+            except OSError:
+                # Cópia aberta por outro processo (Windows): ela já foi renovada por quem a abriu
+                os.unlink(destino.name)
+    return sqlite3.connect(f"{copia.resolve().as_uri()}?mode=ro", uri=True)
+
+def limpar_cache_arquivos(idade_horas: float = ARQUIVO_CACHE_HORAS, agora: float = None):
+    """Remove do cache as cópias sem arquivo de origem, desatualizadas ou mais velhas que `idade_horas`.
+
+    As consultas descompactam de novo o que precisarem. Cópias ainda abertas
+    (Windows) ficam para a próxima limpeza.
+    """
+    agora = time.time() if agora is None else agora
+    removidas = 0
+    for copia in ARQUIVO_CACHE_DIR.glob("*"):
+        try:
+            idade = agora - copia.stat().st_mtime
+            if copia.suffix == ".tmp":
+                vencida = idade > 3600  # temporário largado por um processo interrompido
+            else:
+                compactado = ARQUIVO_DIR / f"{copia.name}.gz"
+                vencida = (idade > idade_horas * 3600 or not compactado.exists()
+                           or compactado.stat().st_mtime > copia.stat().st_mtime)
+            if vencida:
+                copia.unlink()
+                removidas += 1
+        except OSError:
+            continue
+    return removidas
+
+def periodo_de(epoch: float, tipo: str = "dia"):
+    """Período (UTC) que contém o instante: (nome, início, fim), ex. ('2024-05-01', ...)."""
+    data = datetime.fromtimestamp(epoch, timezone.utc)
+    if tipo == "mes":
+        inicio = data.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        fim = inicio.replace(year=inicio.year + inicio.month // 12, month=inicio.month % 12 + 1)
+        return inicio.strftime("%Y-%m"), inicio.timestamp(), fim.timestamp()
+    inicio = data.replace(hour=0, minute=0, second=0, microsecond=0)
+    return inicio.strftime("%Y-%m-%d"), inicio.timestamp(), inicio.timestamp() + 86400.0
+
+def _abrir_particao(nome: str, selada: bool):
+    """Conexão somente leitura com uma partição, com mmap.
+
+    Partições seladas não mudam mais: abertas como imutáveis, sem travas nem WAL.
+    """
+    uri = f"{(PARTICOES_DIR / nome).resolve().as_uri()}?mode=ro"
+    conn = sqlite3.connect(uri + ("&immutable=1" if selada else ""), uri=True)
+    conn.execute(f"PRAGMA mmap_size = {PARTICOES_MMAP}")
+    return conn
+
+def _fontes(conn, inicio: float = None, fim: float = None, ordem: str = "recentes"):
+    """Bancos com blocos que podem tocar [inicio, fim]: (arquivo, piso, fim_dados, pico, selada).
+
+    O banco principal tem arquivo None e `piso` na fronteira do que já foi
+    arquivado (blocos abaixo dela podem estar sendo apagados e são lidos do
+    arquivo). Os demais vêm dos catálogos de partições e de arquivos. `pico` é
+    o maior |valor| possível no banco (infinito se o catálogo não tem o
+    mínimo). A ordem é "recentes" (fim_dados decrescente) ou "picos" (pico
+    decrescente), para que
+    quem percorre possa parar cedo; abra cada um com _conectar_fonte só se
+    ainda for preciso.
+    """
+    fronteira, = conn.execute("SELECT MAX(fim) FROM arquivos").fetchone()
+    fontes = []
+    # Limites do principal pelos índices (inicio e pico), sem varrer blocos
+    ultimo, = conn.execute("SELECT MAX(inicio) FROM blocos").fetchone()
+    if ultimo is not None and (fronteira is None or ultimo >= fronteira):
+        pico, = conn.execute("SELECT MAX(MAX(maximo, -minimo)) FROM blocos").fetchone()
+        fontes.append((None, fronteira, ultimo + DURACAO_MAXIMA_BLOCO, pico, 0))
+
+    params = []
+    filtro = "WHERE 1 = 1"
+    if inicio is not None:
+        filtro += " AND fim_dados >= ?"
+        params.append(inicio)
+    if fim is not None:
+        filtro += " AND inicio <= ?"
+        params.append(fim)
+    fontes += conn.execute(f"""
+        SELECT arquivo, NULL, fim_dados, COALESCE(MAX(maximo, -minimo), 9e999), 1 FROM arquivos {filtro}
+        UNION ALL
+        SELECT arquivo, NULL, fim_dados, COALESCE(MAX(maximo, -minimo), 9e999), selada FROM particoes {filtro}
+    """, params * 2).fetchall()
+
+    coluna = 3 if ordem == "picos" else 2
+    return sorted(fontes, key=lambda fonte: fonte[coluna], reverse=True)
+
+@contextmanager
+def _conectar_fonte(conn, fonte):
+    arquivo, selada = fonte[0], fonte[4]
+    if arquivo is None:
+        yield conn
+        return
+    abrir = _abrir_arquivo(arquivo) if arquivo.endswith(".gz") else _abrir_particao(arquivo, selada)
+    with closing(abrir) as conn_fonte:
+        yield conn_fonte
+
+def _filtro_blocos(porta: str = None, inicio: float = None, fim: float = None, piso: float = None):
+    """Cláusula WHERE (e parâmetros) para blocos que podem ter amostras em [inicio, fim]."""
+    query = "WHERE 1 = 1"
+    params = []
+    if porta:
+        query += " AND porta = ?"
+        params.append(porta)
+    if fim is not None:
+        query += " AND inicio <= ?"
+        params.append(fim)
+    if inicio is not None:
+        query += " AND inicio >= ? AND fim >= ?"
+        params += [inicio - DURACAO_MAXIMA_BLOCO, inicio]
+    if piso is not None:
+        query += " AND inicio >= ?"
+        params.append(piso)
+    return query, params
+
+def _amostras(linha_bloco):
+    """Expande uma linha (porta, inicio, tempos, valores) em (timestamp, valor, porta)."""
+    porta, inicio, tempos, valores = linha_bloco
+    return [(inicio + dt, v, porta) for dt, v in zip(_decodificar(tempos), _decodificar(valores))]
 
 def init_db():
     DB_PATH.parent.mkdir(exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    conn = conectar()
+    # WAL é persistente no arquivo: leitores não bloqueiam o gravador
+    conn.execute("PRAGMA journal_mode = WAL")
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -25,70 +560,653 @@ def init_db():
     """)
 
     conn.commit()
+    migrar_db(conn)
     conn.close()
 
 def salvar_leitura(valor: float, porta: str):
-    """Salva uma nova leitura no banco."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO leituras (valor, porta) VALUES (?, ?)",
-        (valor, porta)
-    )
-    conn.commit()
+    """Salva uma nova leitura no banco (como um bloco de uma amostra)."""
+    bloco = _BlocoAberto(porta)
+    bloco.adicionar(valor, time.time())
+    conn = conectar()
+    with conn:
+        _inserir_blocos(conn, [bloco.linha()])
     conn.close()
 
-def buscar_leituras(porta: str = None, limite: int = 100):
+def _mais_recentes(conn, limite: int, porta: str = None, inicio: float = None,
+                   fim: float = None, antes=None):
+    """As `limite` amostras (t, porta, valor) mais recentes que passam nos filtros.
+
+    `antes` = (t, porta) restringe a amostras estritamente anteriores a essa
+    chave, o que permite paginar por chave (keyset) em ordem decrescente.
+    """
+    if antes is not None:
+        fim = antes[0] if fim is None else min(fim, antes[0])
+
+    # Fontes e, dentro de cada uma, blocos do mais recente ao mais antigo; para
+    # quando nada restante pode conter amostra mais recente que a mais antiga
+    # já selecionada.
+    selecionadas = []
+    for fonte in _fontes(conn, inicio, fim):
+        _, piso, fim_dados, _, _ = fonte
+        if len(selecionadas) >= limite and fim_dados < selecionadas[0][0]:
+            break
+        filtro, params = _filtro_blocos(porta, inicio, fim, piso)
+        with _conectar_fonte(conn, fonte) as conn_fonte:
+            for linha in conn_fonte.execute(
+                f"SELECT porta, inicio, tempos, valores FROM blocos {filtro} ORDER BY inicio DESC", params
+            ):
+                if len(selecionadas) >= limite and linha[1] + DURACAO_MAXIMA_BLOCO < selecionadas[0][0]:
+                    break
+                for t, valor, p in _amostras(linha):
+                    if (inicio is not None and t < inicio) or (fim is not None and t > fim):
+                        continue
+                    if antes is not None and (t, p) >= antes:
+                        continue
+                    amostra = (t, p, valor)
+                    if len(selecionadas) < limite:
+                        heapq.heappush(selecionadas, amostra)
+                    elif amostra[:2] > selecionadas[0][:2]:
+                        heapq.heapreplace(selecionadas, amostra)
+
+    selecionadas.sort(reverse=True)
+    return selecionadas
+
+def buscar_leituras(porta: str = None, limite: int = 100, conn=None):
     """Busca as últimas leituras, filtradas por porta (opcional)."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    if porta:
-        cursor.execute(
-            "SELECT valor, porta, timestamp FROM leituras WHERE porta = ? ORDER BY timestamp DESC LIMIT ?",
-            (porta, limite)
-        )
-    else:
-        cursor.execute(
-            "SELECT valor, porta, timestamp FROM leituras ORDER BY timestamp DESC LIMIT ?",
-            (limite,)
-        )
-    
-    leituras = cursor.fetchall()
-    conn.close()
-    return leituras
+    with _conexao(conn) as conn:
+        selecionadas = _mais_recentes(conn, limite, porta)
+    return [(valor, p, _para_texto(t)) for t, p, valor in selecionadas]
 
-def buscar_picos(limite: int = 10):
-    """Busca os maiores picos de torque registrados."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT valor, porta, timestamp FROM leituras ORDER BY valor DESC LIMIT ?",
-        (limite,)
-    )
-    picos = cursor.fetchall()
-    conn.close()
-    return picos
+def buscar_pagina_leituras(data_inicio: str = None, data_fim: str = None, porta: str = None,
+                           cursor=None, tamanho: int = 200, conn=None):
+    """Uma página de leituras (mais recentes primeiro) e o cursor da próxima.
 
-def buscar_leituras_por_data(data_inicio: str, data_fim: str, porta: str = None):
-    """Busca leituras entre duas datas (formato: 'YYYY-MM-DD HH:MM:SS')"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    query = """
-        SELECT valor, porta, timestamp 
-        FROM leituras 
-        WHERE timestamp BETWEEN ? AND ?
+    Paginação por chave: o cursor é a chave (t, porta) da última linha
+    entregue, então cada página custa o mesmo, por mais longe que se role.
+    O cursor devolvido é None quando não há mais páginas.
     """
-    params = [data_inicio, data_fim]
-    
+    inicio = _para_epoch(data_inicio) if data_inicio else None
+    fim = _para_epoch(data_fim) if data_fim else None
+    with _conexao(conn) as conn:
+        selecionadas = _mais_recentes(conn, tamanho, porta, inicio, fim, antes=cursor)
+
+    proximo = selecionadas[-1][:2] if len(selecionadas) == tamanho else None
+    return [(valor, p, _para_texto(t)) for t, p, valor in selecionadas], proximo
+
+def contar_leituras_por_data(data_inicio: str = None, data_fim: str = None, porta: str = None,
+                             conn=None):
+    """Estimativa rápida do número de leituras no intervalo.
+
+    Soma a quantidade dos blocos que tocam o intervalo (só índice, sem
+    decodificar); os blocos das bordas podem contar algumas amostras de fora.
+    O trecho já arquivado é estimado pelos agregados, sem abrir os arquivos.
+    """
+    inicio = _para_epoch(data_inicio) if data_inicio else None
+    fim = _para_epoch(data_fim) if data_fim else None
+    total = 0
+    with _conexao(conn) as conn:
+        for fonte in _fontes(conn, inicio, fim):
+            if fonte[0] is not None and fonte[0].endswith(".gz"):
+                continue
+            filtro, params = _filtro_blocos(porta, inicio, fim, fonte[1])
+            with _conectar_fonte(conn, fonte) as conn_fonte:
+                total += conn_fonte.execute(
+                    f"SELECT COALESCE(SUM(quantidade), 0) FROM blocos {filtro}", params
+                ).fetchone()[0]
+
+        # Arquiva-se do mais antigo para o mais novo: abaixo da maior fronteira
+        # arquivada (do principal ou de partições) tudo está compactado
+        de_arquivo, fronteira = conn.execute("""
+            SELECT MIN(inicio), MAX(fim) FROM (
+                SELECT inicio, fim FROM arquivos
+                UNION ALL
+                SELECT inicio, fim FROM particoes WHERE arquivo LIKE '%.gz'
+            )
+        """).fetchone()
+        if fronteira is not None and (inicio is None or inicio < fronteira):
+            ate = fronteira if fim is None else min(fim, fronteira)
+            de = inicio if inicio is not None else de_arquivo
+            query = "SELECT COALESCE(SUM(contagem), 0) FROM agregados WHERE resolucao = ? AND balde >= ? AND balde < ?"
+            if porta:
+                query += " AND porta = ?"
+            for segmento in _segmentos_agregados(de, ate, (3600, 60)):
+                total += conn.execute(query, segmento + ((porta,) if porta else ())).fetchone()[0]
+    return total
+
+def buscar_picos(limite: int = 10, data_inicio: str = None, data_fim: str = None, porta: str = None,
+                 conn=None):
+    """Busca os maiores picos de torque (em |valor|, nos dois sentidos), no intervalo e porta, se informados."""
+    inicio = _para_epoch(data_inicio) if data_inicio else None
+    fim = _para_epoch(data_fim) if data_fim else None
+    # O maior |valor| de cada bloco (e de cada arquivo) limita seus valores: para
+    # quando nada restante pode superar o menor pico já selecionado.
+    picos = []
+    with _conexao(conn) as conn:
+        for fonte in _fontes(conn, inicio, fim, ordem="picos"):
+            _, piso, _, pico_fonte, _ = fonte
+            if len(picos) >= limite and pico_fonte <= picos[0][0]:
+                break
+            filtro, params = _filtro_blocos(porta, inicio, fim, piso)
+            with _conectar_fonte(conn, fonte) as conn_fonte:
+                cursor = conn_fonte.execute(
+                    f"SELECT MAX(maximo, -minimo) AS pico, porta, inicio, tempos, valores FROM blocos {filtro} "
+                    "ORDER BY pico DESC",
+                    params,
+                )
+                for pico, *linha in cursor:
+                    if len(picos) >= limite and pico <= picos[0][0]:
+                        break
+                    for t, valor, p in _amostras(linha):
+                        if (inicio is not None and t < inicio) or (fim is not None and t > fim):
+                            continue
+                        item = (abs(valor), valor, t, p)
+                        if len(picos) < limite:
+                            heapq.heappush(picos, item)
+                        elif item[0] > picos[0][0]:
+                            heapq.heapreplace(picos, item)
+
+    picos.sort(reverse=True)
+    return [(valor, p, _para_texto(t)) for _, valor, t, p in picos]
+
+def buscar_alarmes(limite: int = 100, data_inicio: str = None, data_fim: str = None, porta: str = None,
+                   conn=None):
+    """Alarmes mais recentes: [(porta, instante, valor, limite, reconhecido_em)], instantes em texto UTC."""
+    query = "SELECT porta, instante, valor, limite, reconhecido_em FROM alarmes WHERE 1=1"
+    params = []
+    if data_inicio:
+        query += " AND instante >= ?"
+        params.append(_para_epoch(data_inicio))
+    if data_fim:
+        query += " AND instante <= ?"
+        params.append(_para_epoch(data_fim))
     if porta:
         query += " AND porta = ?"
         params.append(porta)
-    
-    query += " ORDER BY timestamp DESC"
-    cursor.execute(query, params)
-    
-    leituras = cursor.fetchall()
-    conn.close()
-    return leituras
\ No newline at end of file
+    with _conexao(conn) as conn:
+        linhas = conn.execute(query + " ORDER BY instante DESC LIMIT ?", params + [limite]).fetchall()
+    return [
+        (p, _para_texto(instante), valor, lim, None if reconhecido is None else _para_texto(reconhecido))
+        for p, instante, valor, lim, reconhecido in linhas
+    ]
+
+def _filtro_ciclos(data_inicio, data_fim, porta):
+    filtro, params = "WHERE 1=1", []
+    if data_inicio:
+        filtro += " AND inicio >= ?"
+        params.append(_para_epoch(data_inicio))
+    if data_fim:
+        filtro += " AND inicio <= ?"
+        params.append(_para_epoch(data_fim))
+    if porta:
+        filtro += " AND porta = ?"
+        params.append(porta)
+    return filtro, params
+
+def buscar_ciclos(limite: int = 1000, data_inicio: str = None, data_fim: str = None, porta: str = None,
+                  conn=None):
+    """Ciclos mais recentes: [(porta, inicio, duracao, pico, instante_pico, media, integral, amostras)]."""
+    filtro, params = _filtro_ciclos(data_inicio, data_fim, porta)
+    with _conexao(conn) as conn:
+        linhas = conn.execute(
+            "SELECT porta, inicio, fim - inicio, pico, instante_pico, media, integral, amostras "
+            f"FROM ciclos {filtro} ORDER BY inicio DESC LIMIT ?",
+            params + [limite],
+        ).fetchall()
+    return [
+        (p, _para_texto(inicio), duracao, pico, _para_texto(instante), media, integral, amostras)
+        for p, inicio, duracao, pico, instante, media, integral, amostras in linhas
+    ]
+
+def resumir_ciclos(data_inicio: str = None, data_fim: str = None, porta: str = None, conn=None):
+    """Resumo por porta dos ciclos do intervalo (ex.: um turno), calculado só sobre a tabela ciclos.
+
+    Devolve {porta: {'ciclos', 'pico_medio', 'pico_desvio', 'pico_minimo', 'pico_maximo',
+    'duracao_media'}}; os picos em |valor|.
+    """
+    filtro, params = _filtro_ciclos(data_inicio, data_fim, porta)
+    with _conexao(conn) as conn:
+        linhas = conn.execute(
+            "SELECT porta, COUNT(*), SUM(ABS(pico)), SUM(pico * pico), MIN(ABS(pico)), MAX(ABS(pico)), "
+            f"AVG(fim - inicio) FROM ciclos {filtro} GROUP BY porta ORDER BY porta",
+            params,
+        ).fetchall()
+    resumo = {}
+    for p, ciclos, soma, soma_quadrados, minimo, maximo, duracao in linhas:
+        media = soma / ciclos
+        variancia = (soma_quadrados - ciclos * media * media) / (ciclos - 1) if ciclos > 1 else 0.0
+        resumo[p] = {
+            'ciclos': ciclos,
+            'pico_medio': media,
+            'pico_desvio': max(variancia, 0.0) ** 0.5,
+            'pico_minimo': minimo,
+            'pico_maximo': maximo,
+            'duracao_media': duracao,
+        }
+    return resumo
+
+def buscar_leituras_por_data(data_inicio: str, data_fim: str, porta: str = None, conn=None):
+    """Busca leituras entre duas datas (formato: 'YYYY-MM-DD HH:MM:SS')"""
+    inicio, fim = _para_epoch(data_inicio), _para_epoch(data_fim)
+
+    amostras = []
+    with _conexao(conn) as conn:
+        for fonte in _fontes(conn, inicio, fim):
+            filtro, params = _filtro_blocos(porta, inicio, fim, fonte[1])
+            with _conectar_fonte(conn, fonte) as conn_fonte:
+                amostras += [
+                    amostra
+                    for linha in conn_fonte.execute(f"SELECT porta, inicio, tempos, valores FROM blocos {filtro}", params)
+                    for amostra in _amostras(linha)
+                    if inicio <= amostra[0] <= fim
+                ]
+
+    amostras.sort(reverse=True)
+    return [(valor, p, _para_texto(t)) for t, valor, p in amostras]
+
+def iterar_leituras_por_data(data_inicio: str = None, data_fim: str = None, porta: str = None,
+                             conn=None):
+    """Percorre as leituras do intervalo como (epoch, valor, porta), sem carregá-las todas.
+
+    Gerador: lê bloco a bloco, fonte a fonte (da mais antiga para a mais
+    recente), em ordem de bloco e não estritamente de tempo entre portas.
+    """
+    inicio = _para_epoch(data_inicio) if data_inicio else None
+    fim = _para_epoch(data_fim) if data_fim else None
+    with _conexao(conn) as conn:
+        yield from _iterar_amostras(conn, inicio, fim, porta)
+
+def _iterar_amostras(conn, inicio: float = None, fim: float = None, porta: str = None):
+    """Como iterar_leituras_por_data, com os limites em epoch e a conexão já aberta."""
+    for fonte in reversed(_fontes(conn, inicio, fim)):
+        filtro, params = _filtro_blocos(porta, inicio, fim, fonte[1])
+        with _conectar_fonte(conn, fonte) as conn_fonte:
+            cursor = conn_fonte.execute(
+                f"SELECT porta, inicio, tempos, valores FROM blocos {filtro} ORDER BY inicio", params
+            )
+            for linha in cursor:
+                for t, valor, p in _amostras(linha):
+                    if (inicio is None or t >= inicio) and (fim is None or t <= fim):
+                        yield t, valor, p
+
+def _limites_agregados(conn, data_inicio: str = None, data_fim: str = None):
+    """(inicio, fim) em epoch; o que não foi informado vem da extensão dos agregados."""
+    if data_inicio is None or data_fim is None:
+        limites = conn.execute(
+            "SELECT MIN(balde), MAX(balde) + 3600 FROM agregados WHERE resolucao = 3600"
+        ).fetchone()
+        if limites[0] is None:
+            return None
+    inicio = _para_epoch(data_inicio) if data_inicio else limites[0]
+    fim = _para_epoch(data_fim) if data_fim else limites[1]
+    return inicio, fim
+
+def _resolucoes_disponiveis(conn, inicio: float):
+    """Resoluções (da mais grossa) com agregados desde `inicio`: os de 1 s expiram antes."""
+    primeiro_segundo, = conn.execute("SELECT MIN(balde) FROM agregados WHERE resolucao = 1").fetchone()
+    if primeiro_segundo is not None and inicio >= primeiro_segundo:
+        return sorted(RESOLUCOES_AGREGADOS, reverse=True)
+    return sorted((r for r in RESOLUCOES_AGREGADOS if r > 1), reverse=True)
+
+def buscar_serie_agregada(data_inicio: str = None, data_fim: str = None, porta: str = None,
+                          pontos: int = 400, conn=None):
+    """Envoltória mín/máx do intervalo para gráficos, lida dos agregados.
+
+    Devolve {porta: (tempos, valores)} com até `pontos` intervalos por porta,
+    cada um como dois pontos (mínimo e máximo), então picos não somem na escala.
+    """
+    with _conexao(conn) as conn:
+        limites = _limites_agregados(conn, data_inicio, data_fim)
+        if limites is None:
+            return {}
+        inicio, fim = limites
+        largura = max((fim - inicio) / pontos, 1e-9)
+        # A resolução mais grossa que ainda dá `pontos` intervalos
+        resolucoes = _resolucoes_disponiveis(conn, inicio)
+        resolucao = next((r for r in resolucoes if r <= largura), resolucoes[-1])
+
+        query = """
+            SELECT porta, balde, minimo, maximo FROM agregados
+            WHERE resolucao = ? AND balde >= ? AND balde <= ?
+        """
+        params = [resolucao, inicio // resolucao * resolucao, fim]
+        if porta:
+            query += " AND porta = ?"
+            params.append(porta)
+        envelopes = {}
+        for p, balde, minimo, maximo in conn.execute(query + " ORDER BY porta, balde", params):
+            intervalos = envelopes.setdefault(p, {})
+            chave = int((max(balde, inicio) - inicio) // largura)
+            atual = intervalos.get(chave)
+            if atual is None:
+                intervalos[chave] = [balde, minimo, maximo]
+            else:
+                atual[1] = min(atual[1], minimo)
+                atual[2] = max(atual[2], maximo)
+
+    series = {}
+    for p, intervalos in envelopes.items():
+        tempos, valores = [], []
+        for balde, minimo, maximo in intervalos.values():
+            tempos += [balde, balde]
+            valores += [minimo, maximo]
+        series[p] = (tempos, valores)
+    return series
+
+def buscar_estatisticas(data_inicio: str = None, data_fim: str = None, porta: str = None, conn=None):
+    """Estatísticas exatas do intervalo, quase todas lidas dos agregados.
+
+    Devolve {'contagem', 'minimo', 'maximo', 'media', 'desvio', 'instante_pico'}
+    (instante em texto UTC; desvio amostral, como em EstatisticasStream) ou
+    None se não houver leituras. Os baldes inteiros dentro do intervalo vêm
+    dos agregados (de 1 min onde os de 1 s já expiraram); só as sobras das
+    bordas são lidas das amostras, recortadas em [inicio, fim].
+    """
+    minimo = maximo = instante_pico = None
+    soma = soma_quadrados = 0.0
+    contagem = 0
+    with _conexao(conn) as conn:
+        limites = _limites_agregados(conn, data_inicio, data_fim)
+        if limites is None:
+            return None
+        inicio, fim = limites
+        resolucoes = _resolucoes_disponiveis(conn, inicio)
+        fina = resolucoes[-1]
+        de = -(-inicio // fina) * fina
+        ate = fim // fina * fina
+        if ate > de:
+            bordas = [(inicio, de, False), (ate, fim, True)]
+            segmentos = _segmentos_agregados(de, ate, resolucoes)
+        else:
+            bordas, segmentos = [(inicio, fim, True)], []
+
+        query = """
+            SELECT minimo, maximo, soma, soma_quadrados, contagem, instante_pico
+            FROM agregados WHERE resolucao = ? AND balde >= ? AND balde < ?
+        """
+        if porta:
+            query += " AND porta = ?"
+        for segmento in segmentos:
+            for mn, mx, s, sq, n, t in conn.execute(query, segmento + ((porta,) if porta else ())):
+                if minimo is None or mn < minimo:
+                    minimo = mn
+                if maximo is None or mx > maximo:
+                    maximo, instante_pico = mx, t
+                soma += s
+                soma_quadrados += sq
+                contagem += n
+
+        for de_borda, ate_borda, inclui_fim in bordas:
+            if ate_borda < de_borda or (ate_borda == de_borda and not inclui_fim):
+                continue
+            for t, valor, _ in _iterar_amostras(conn, de_borda, ate_borda, porta):
+                if t == ate_borda and not inclui_fim:
+                    continue
+                if minimo is None or valor < minimo:
+                    minimo = valor
+                if maximo is None or valor > maximo:
+                    maximo, instante_pico = valor, t
+                soma += valor
+                soma_quadrados += valor * valor
+                contagem += 1
+
+    if not contagem:
+        return None
+    media = soma / contagem
+    variancia = (soma_quadrados - contagem * media * media) / (contagem - 1) if contagem > 1 else 0.0
+    return {
+        'contagem': contagem,
+        'minimo': minimo,
+        'maximo': maximo,
+        'media': media,
+        'desvio': max(variancia, 0.0) ** 0.5,
+        'instante_pico': _para_texto(instante_pico),
+    }
+
+# Escrita avulsa enfileirada no gravador (ver GravadorLeituras.registrar)
+_Registro = namedtuple('_Registro', 'sql params')
+# Pedido de gravação imediata de tudo o que chegou antes dele (ver GravadorLeituras.descarregar)
+_Descarga = namedtuple('_Descarga', 'pronto')
+
+class GravadorLeituras:
+    """Grava leituras em segundo plano, em lotes, usando uma única conexão.
+
+    As leituras entram numa fila limitada a `capacidade` leituras (um bloco de
+    amostras conta suas linhas, um registro conta um) e são agrupadas por porta em blocos
+    float32. Blocos fechados são gravados com executemany em uma transação por
+    lote, quando o lote enche ou quando o intervalo expira. Com
+    `particionamento` "dia" ou "mes", os blocos vão para o arquivo da partição
+    do seu período e o banco principal guarda o catálogo e os agregados.
+    Outros registros (alarmes, ciclos) passam pela mesma fila com registrar();
+    descarregar() grava na hora até os blocos ainda abertos (ex.: antes de um
+    relatório).
+    """
+
+    _FIM = object()
+
+    def __init__(self, tamanho_lote: int = GRAVADOR_TAMANHO_LOTE,
+                 intervalo: float = GRAVADOR_INTERVALO_S,
+                 capacidade: int = GRAVADOR_CAPACIDADE_FILA,
+                 particionamento: str = PARTICIONAMENTO,
+                 logger=None):
+        self.tamanho_lote = tamanho_lote
+        self.particionamento = particionamento
+        self.intervalo = intervalo
+        self.janela = _janela_bloco()
+        self.capacidade = capacidade
+        self.fila = queue.Queue()
+        self.logger = logger or logging.getLogger('TorqView')
+        self.descartadas = 0
+        self.registros_descartados = 0
+        self._pendentes = 0  # leituras na fila
+        self._lock_pendentes = threading.Lock()
+        self._avisos = LimitadorAlertas(GRAVADOR_INTERVALO_AVISO_S)
+        self.thread = None
+        self._abertos = {}
+        self._prontos = []
+        self._registros = []  # (sql, params) de registrar(), gravados com o próximo lote
+        self._particoes = {}  # periodo -> (conexão, fim do período)
+
+    def iniciar(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._executar, name="GravadorLeituras", daemon=True)
+        self.thread.start()
+
+    def _enfileirar(self, item, linhas: int) -> bool:
+        """Põe o item na fila se as `linhas` couberem na capacidade."""
+        with self._lock_pendentes:
+            if self._pendentes + linhas > self.capacidade:
+                return False
+            self._pendentes += linhas
+        self.fila.put_nowait(item)
+        return True
+
+    def _descartar(self, linhas: int):
+        self.descartadas += linhas
+        if self._avisos.permitir():
+            self.logger.warning(f"Fila de gravação cheia: {self.descartadas} leituras descartadas")
+
+    def adicionar(self, valor: float, porta: str, timestamp: float = None):
+        """Enfileira uma leitura sem bloquear quem chama (descarta se a fila estiver cheia)."""
+        if not self._enfileirar((valor, porta, time.time() if timestamp is None else timestamp), 1):
+            self._descartar(1)
+
+    def adicionar_bloco(self, bloco):
+        """Enfileira um bloco de amostras (ver app.amostras) como um único item da fila."""
+        if not self._enfileirar(bloco, len(bloco)):
+            self._descartar(len(bloco))
+
+    def registrar(self, sql: str, params):
+        """Enfileira uma escrita avulsa, feita na ordem da fila pela conexão do gravador."""
+        if not self._enfileirar(_Registro(sql, params), 1):
+            self.registros_descartados += 1
+            if self._avisos.permitir():
+                self.logger.warning(
+                    f"Fila de gravação cheia: registro descartado ({sql.split()[2]}), "
+                    f"{self.registros_descartados} no total"
+                )
+
+    def descarregar(self, timeout: float = 5.0) -> bool:
+        """Grava tudo o que já foi enfileirado, inclusive blocos abertos, e espera terminar."""
+        if not self.thread or not self.thread.is_alive():
+            return True
+        pronto = threading.Event()
+        self.fila.put(_Descarga(pronto))
+        return pronto.wait(timeout)
+
+    def parar(self, timeout: float = 5.0):
+        """Grava o que estiver pendente e encerra a thread."""
+        if not self.thread or not self.thread.is_alive():
+            return
+        self.fila.put(self._FIM)
+        self.thread.join(timeout)
+
+    def _processar(self, item):
+        if isinstance(item, _Descarga):
+            return
+        with self._lock_pendentes:
+            self._pendentes -= 1 if isinstance(item, (_Registro, tuple)) else len(item)
+        if isinstance(item, _Registro):
+            self._registros.append(item)
+            return
+        if isinstance(item, tuple):
+            self._acumular(*item)
+            return
+        # Bloco de amostras: coluna 0 = timestamp, coluna c = Canal c (NaN = sem leitura)
+        tempos = item[:, 0]
+        for canal in range(1, item.shape[1]):
+            valores = item[:, canal]
+            validos = valores == valores  # falso só para NaN
+            porta = f"Canal {canal}"
+            for timestamp, valor in zip(tempos[validos].tolist(), valores[validos].tolist()):
+                self._acumular(valor, porta, timestamp)
+
+    def _acumular(self, valor, porta, timestamp):
+        bloco = self._abertos.get(porta)
+        if bloco is None or not bloco.aceita(timestamp, self.janela):
+            if bloco is not None:
+                self._prontos.append(bloco.linha())
+            bloco = self._abertos[porta] = _BlocoAberto(porta)
+        bloco.adicionar(valor, timestamp)
+
+    def _fechar_blocos(self, todos=False):
+        """Fecha blocos que já cobriram a janela (ou todos, no encerramento)."""
+        agora = time.monotonic()
+        for porta, bloco in list(self._abertos.items()):
+            if todos or agora - bloco.aberto_em >= self.janela:
+                self._prontos.append(bloco.linha())
+                del self._abertos[porta]
+
+    def _executar(self):
+        conn = conectar()
+        prazo = time.monotonic() + self.intervalo
+        try:
+            while True:
+                try:
+                    item = self.fila.get(timeout=max(0.0, prazo - time.monotonic()))
+                except queue.Empty:
+                    item = None
+
+                if item is self._FIM:
+                    break
+                if item is not None:
+                    self._processar(item)
+
+                descarga = isinstance(item, _Descarga)
+                if (descarga or len(self._prontos) + len(self._registros) >= self.tamanho_lote
+                        or time.monotonic() >= prazo):
+                    self._fechar_blocos(todos=descarga)
+                    self._gravar(conn)
+                    prazo = time.monotonic() + self.intervalo
+                    if descarga:
+                        item.pronto.set()
+
+            # Esvazia o que ainda estiver na fila antes de sair
+            descargas = []
+            while True:
+                try:
+                    item = self.fila.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, _Descarga):
+                    descargas.append(item)
+                elif item is not self._FIM:
+                    self._processar(item)
+            self._fechar_blocos(todos=True)
+            self._gravar(conn)
+            for descarga in descargas:
+                descarga.pronto.set()
+        finally:
+            for particao, _ in self._particoes.values():
+                particao.close()
+            conn.close()
+
+    def _gravar(self, conn):
+        if self._registros:
+            registros, self._registros = self._registros, []
+            try:
+                with conn:
+                    for sql, params in registros:
+                        conn.execute(sql, params)
+            except sqlite3.Error as e:
+                self.logger.error(f"Erro ao gravar {len(registros)} registros: {str(e)}")
+        if not self._prontos:
+            return
+        lote, self._prontos = self._prontos, []
+        try:
+            if self.particionamento in ("dia", "mes"):
+                self._gravar_particionado(conn, lote)
+            else:
+                with conn:
+                    _inserir_blocos(conn, lote)
+        except sqlite3.Error as e:
+            self.logger.error(f"Erro ao gravar lote de {len(lote)} blocos: {str(e)}")
+
+    def _gravar_particionado(self, conn, lote):
+        agora = time.time()
+        por_periodo = {}
+        for linha in lote:
+            periodo = periodo_de(linha[1], self.particionamento)
+            # Período já selado (ou prestes a ser): o bloco atrasado fica no principal
+            if periodo[2] + MARGEM_SELO_PARTICAO <= agora:
+                periodo = None
+            por_periodo.setdefault(periodo, []).append(linha)
+
+        catalogo = []
+        for periodo, linhas in por_periodo.items():
+            if periodo is None:
+                continue
+            nome, inicio, fim = periodo
+            particao = self._particao(nome, fim)
+            with particao:
+                particao.executemany(SQL_INSERIR_BLOCO, linhas)
+            catalogo.append((
+                nome, inicio, fim, max(linha[2] for linha in linhas),
+                max(linha[5] for linha in linhas), min(linha[4] for linha in linhas),
+                len(linhas), f"particao-{nome}.db",
+            ))
+
+        # Catálogo e agregados depois dos blocos: a partição só aparece nas
+        # consultas com os dados já gravados
+        with conn:
+            conn.executemany(SQL_ATUALIZAR_PARTICAO, catalogo)
+            conn.executemany(SQL_INSERIR_BLOCO, por_periodo.get(None, []))
+            conn.executemany(SQL_ACUMULAR_AGREGADO, _agregar_blocos(lote))
+
+        # Solta as partições que não recebem mais blocos, para que possam ser seladas
+        for nome, (particao, fim) in list(self._particoes.items()):
+            if fim + MARGEM_SELO_PARTICAO <= agora:
+                particao.close()
+                del self._particoes[nome]
+
+    def _particao(self, nome, fim):
+        if nome not in self._particoes:
+            PARTICOES_DIR.mkdir(parents=True, exist_ok=True)
+            particao = sqlite3.connect(PARTICOES_DIR / f"particao-{nome}.db")
+            particao.execute("PRAGMA journal_mode = WAL")
+            for pragma in PRAGMAS_CONEXAO:
+                particao.execute(pragma)
+            criar_tabela_blocos(particao)
+            particao.commit()
+            self._particoes[nome] = (particao, fim)
+        return self._particoes[nome][0]
@@ -0,0 +1,148 @@
+import math
+import numpy as np
+
+class QuantilP2:
+    """Estimativa de um quantil em memória constante (algoritmo P², Jain & Chlamtac).
+
+    Mantém só cinco marcadores, ajustados a cada valor; com até cinco valores
+    devolve o quantil exato.
+    """
+
+    __slots__ = ('p', 'q', 'n', 'total', 'incremento')
+
+    def __init__(self, p: float):
+        self.p = p
+        self.q = []  # alturas dos marcadores
+        self.n = [0, 1, 2, 3, 4]  # posições dos marcadores
+        self.total = 0
+        # Posição desejada do marcador i depois de `total` valores: (total - 1) * incremento[i]
+        self.incremento = (0, p / 2, p, (1 + p) / 2, 1)
+
+    def adicionar(self, x: float):
+        q, n = self.q, self.n
+        self.total += 1
+        if len(q) < 5:
+            q.append(x)
+            q.sort()
+            return
+
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+
+        # Ajusta os marcadores centrais que se afastaram da posição desejada
+        passo = self.total - 1
+        for i in (1, 2, 3):
+            d = passo * self.incremento[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                parabolica = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                if q[i - 1] < parabolica < q[i + 1]:
+                    q[i] = parabolica
+                else:
+                    q[i] += d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                n[i] += d
+
+    @property
+    def valor(self):
+        if not self.q:
+            return None
+        if self.total <= 5:
+            return self.q[round(self.p * (len(self.q) - 1))]
+        return self.q[2]
+
+class EstatisticasStream:
+    """Contagem, mínimo, máximo, média e desvio (Welford) e quantis (P²) em uma passada.
+
+    Nenhum valor é guardado: a memória é a mesma para cem ou cem milhões de leituras.
+    """
+
+    def __init__(self, quantis=(0.05, 0.5, 0.95)):
+        self.contagem = 0
+        self.media = 0.0
+        self.m2 = 0.0  # soma dos quadrados dos desvios
+        self.minimo = None
+        self.maximo = None
+        self.quantis = {p: QuantilP2(p) for p in quantis}
+
+    def adicionar(self, x: float):
+        self.contagem += 1
+        delta = x - self.media
+        self.media += delta / self.contagem
+        self.m2 += delta * (x - self.media)
+        if self.minimo is None or x < self.minimo:
+            self.minimo = x
+        if self.maximo is None or x > self.maximo:
+            self.maximo = x
+        for quantil in self.quantis.values():
+            quantil.adicionar(x)
+
+    def adicionar_varios(self, valores):
+        """Consome um iterável (lista, gerador, cursor) uma única vez."""
+        for x in valores:
+            self.adicionar(x)
+
+    def adicionar_bloco(self, valores):
+        """Acrescenta um bloco (array NumPy) de uma vez.
+
+        Média e variância do bloco são combinadas com as acumuladas (Chan et
+        al.), sem laço em Python; só os quantis P² recebem valor a valor.
+        """
+        valores = np.asarray(valores, dtype=float)
+        n = len(valores)
+        if n == 0:
+            return
+        media_bloco = float(valores.mean())
+        m2_bloco = float(np.square(valores - media_bloco).sum())
+        total = self.contagem + n
+        delta = media_bloco - self.media
+        self.m2 += m2_bloco + delta * delta * self.contagem * n / total
+        self.media += delta * n / total
+        self.contagem = total
+        minimo, maximo = float(valores.min()), float(valores.max())
+        if self.minimo is None or minimo < self.minimo:
+            self.minimo = minimo
+        if self.maximo is None or maximo > self.maximo:
+            self.maximo = maximo
+        lista = valores.tolist()
+        for quantil in self.quantis.values():
+            for x in lista:
+                quantil.adicionar(x)
+
+    def cpk(self, superior=None, inferior=None):
+        """Índice de capabilidade contra os limites informados (um ou os dois); None sem dispersão."""
+        desvio = self.desvio
+        if self.contagem < 2 or desvio == 0:
+            return None
+        indices = []
+        if superior is not None:
+            indices.append((superior - self.media) / (3 * desvio))
+        if inferior is not None:
+            indices.append((self.media - inferior) / (3 * desvio))
+        return min(indices) if indices else None
+
+    @property
+    def desvio(self):
+        return math.sqrt(self.m2 / (self.contagem - 1)) if self.contagem > 1 else 0.0
+
+    def resumo(self):
+        return {
+            'contagem': self.contagem,
+            'minimo': self.minimo,
+            'maximo': self.maximo,
+            'media': self.media if self.contagem else None,
+            'desvio': self.desvio,
+            'quantis': {p: quantil.valor for p, quantil in self.quantis.items()},
+        }
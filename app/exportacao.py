@@ -0,0 +1,74 @@
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+from app.database import conectar_leitura
+from app.pdf import gerar_relatorio_periodo, RelatorioCancelado
+
+class ExportadorPdf(QObject):
+    """Gera relatórios PDF numa thread própria, sem travar a GUI nem a aquisição.
+
+    O relatório é montado a partir do banco (ver pdf.gerar_relatorio_periodo),
+    com conexão somente leitura própria, depois de o `gravador` (se houver)
+    gravar o que ainda estava em memória. O andamento chega por
+    `progresso(lidas, total)` e o fim por `concluido(caminho)`,
+    `falhou(mensagem)` ou `cancelado()`, sempre na thread da GUI.
+    """
+
+    progresso = pyqtSignal(int, int)
+    concluido = pyqtSignal(str)
+    falhou = pyqtSignal(str)
+    cancelado = pyqtSignal()
+
+    def __init__(self, logger=None, parent=None, gravador=None):
+        super().__init__(parent)
+        self.logger = logger
+        self.gravador = gravador
+        self.thread = None
+        self._cancelar = threading.Event()
+
+    @property
+    def ocupado(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def exportar(self, caminho, **parametros):
+        """Inicia o relatório; os parâmetros vão para gerar_relatorio_periodo."""
+        if self.ocupado:
+            return False
+        self._cancelar.clear()
+        self.thread = threading.Thread(
+            target=self._executar, args=(caminho, parametros), name="ExportadorPdf", daemon=True
+        )
+        self.thread.start()
+        return True
+
+    def cancelar(self):
+        self._cancelar.set()
+
+    def parar(self, timeout: float = 5.0):
+        self.cancelar()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def _executar(self, caminho, parametros):
+        # Os últimos segundos ainda estão em blocos abertos no gravador
+        if self.gravador is not None and not self.gravador.descarregar():
+            if self.logger:
+                self.logger.warning("Gravador não descarregou a tempo; o PDF pode não ter as últimas leituras")
+        conn = conectar_leitura()
+        try:
+            gerar_relatorio_periodo(
+                caminho,
+                progresso=self.progresso.emit,
+                cancelar=self._cancelar.is_set,
+                conn=conn,
+                **parametros
+            )
+        except RelatorioCancelado:
+            self.cancelado.emit()
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"Erro ao gerar PDF: {str(e)}")
+            self.falhou.emit(str(e))
+        else:
+            self.concluido.emit(caminho)
+        finally:
+            conn.close()
@@ -0,0 +1,194 @@
+import math
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from scipy.signal import lfilter
+except ImportError:  # scipy é opcional: sem ele o IIR roda amostra a amostra
+    lfilter = None
+
+class FiltroIIR:
+    """Filtro IIR genérico (coeficientes b, a), com estado entre blocos.
+
+    Forma direta II transposta, como scipy.signal.lfilter (usado quando
+    instalado). O estado começa em regime para o primeiro valor, sem o
+    transitório de partir do zero.
+    """
+
+    def __init__(self, b, a):
+        a = np.asarray(a, dtype=float)
+        self.b = np.asarray(b, dtype=float) / a[0]
+        self.a = a / a[0]
+        ordem = max(len(self.a), len(self.b))
+        self.b = np.pad(self.b, (0, ordem - len(self.b)))
+        self.a = np.pad(self.a, (0, ordem - len(self.a)))
+        self._estado = None
+
+    @classmethod
+    def passa_baixas(cls, corte_hz: float, taxa_hz: float):
+        """Passa-baixas de primeira ordem (média exponencial) com corte em `corte_hz`."""
+        alfa = 1 - math.exp(-2 * math.pi * corte_hz / taxa_hz)
+        return cls([alfa], [1, alfa - 1])
+
+    def _estado_inicial(self, x0: float):
+        y0 = x0 * self.b.sum() / self.a.sum()
+        termos = self.b[1:] * x0 - self.a[1:] * y0
+        return np.cumsum(termos[::-1])[::-1]
+
+    def processar(self, valores):
+        if len(valores) == 0:
+            return valores
+        if self._estado is None:
+            self._estado = self._estado_inicial(float(valores[0]))
+        if lfilter is not None:
+            saida, self._estado = lfilter(self.b, self.a, valores, zi=self._estado)
+            return saida
+        if len(self.a) == 2 and abs(self.a[1]) < 1:
+            return self._primeira_ordem(np.asarray(valores, dtype=float))
+
+        b, a, z = self.b.tolist(), self.a.tolist(), self._estado.tolist()
+        ordem = len(z)
+        saida = np.empty(len(valores))
+        for n, x in enumerate(valores.tolist()):
+            y = b[0] * x + (z[0] if ordem else 0.0)
+            for i in range(ordem - 1):
+                z[i] = b[i + 1] * x + z[i + 1] - a[i + 1] * y
+            if ordem:
+                z[-1] = b[-1] * x - a[-1] * y
+            saida[n] = y
+        self._estado = np.array(z)
+        return saida
+
+    def _primeira_ordem(self, x):
+        """Primeira ordem (o passa-baixas) sem laço por amostra: y[n] = c·y[n-1] + v[n].
+
+        v[n] = b0·x[n] + b1·x[n-1] (o estado entra em v[0]). Com |c| pequeno a
+        resposta ao impulso some em poucas amostras e vira uma convolução
+        truncada; senão, a recorrência é resolvida em trechos com cumsum,
+        escalados por c^-i, curtos o bastante (c^-i <= 1e6) para não perder
+        precisão.
+        """
+        b0, b1 = self.b
+        c = -self.a[1]
+        v = b0 * x
+        v[1:] += b1 * x[:-1]
+        v[0] += self._estado[0]
+        if c == 0:
+            y = v
+        else:
+            decaimento = -math.log(abs(c))
+            trecho = int(math.log(1e6) / decaimento)
+            if trecho < 32:
+                # c^k abaixo de 1e-17 a partir de k = alcance: o resto não muda o float64
+                alcance = int(math.ceil(39.2 / decaimento))
+                y = np.convolve(v, c ** np.arange(alcance))[:len(v)]
+            else:
+                y = np.empty_like(v)
+                escala = c ** -np.arange(trecho, dtype=float)
+                potencias = 1 / escala
+                anterior = 0.0
+                for inicio in range(0, len(v), trecho):
+                    parte = v[inicio:inicio + trecho]
+                    n = len(parte)
+                    y[inicio:inicio + n] = potencias[:n] * (c * anterior + np.cumsum(parte * escala[:n]))
+                    anterior = y[inicio + n - 1]
+        self._estado = np.array([b1 * x[-1] + c * y[-1]])
+        return y
+
+class _FiltroJanela:
+    """Base dos filtros de janela: guarda as últimas `tamanho - 1` entradas do bloco anterior."""
+
+    def __init__(self, tamanho: int):
+        self.tamanho = max(1, int(tamanho))
+        self._historico = None
+
+    def _janela(self, valores):
+        if self._historico is None:
+            # Começa como se o primeiro valor viesse de antes (sem rampa a partir do zero)
+            self._historico = np.full(self.tamanho - 1, float(valores[0]))
+        x = np.concatenate((self._historico, valores))
+        self._historico = x[len(x) - (self.tamanho - 1):]
+        return x
+
+class FiltroFIR(_FiltroJanela):
+    """Filtro FIR (convolução com `coeficientes`), com estado entre blocos."""
+
+    def __init__(self, coeficientes):
+        self.coeficientes = np.asarray(coeficientes, dtype=float)
+        super().__init__(len(self.coeficientes))
+
+    @classmethod
+    def media_movel(cls, tamanho: int):
+        return cls(np.full(int(tamanho), 1.0 / int(tamanho)))
+
+    def processar(self, valores):
+        if len(valores) == 0:
+            return valores
+        return np.convolve(self._janela(valores), self.coeficientes, mode='valid')
+
+class FiltroMediana(_FiltroJanela):
+    """Mediana móvel de `tamanho` amostras: remove espigas sem achatar degraus."""
+
+    def processar(self, valores):
+        if len(valores) == 0:
+            return valores
+        return np.median(sliding_window_view(self._janela(valores), self.tamanho), axis=1)
+
+class CadeiaFiltros:
+    """Filtros aplicados em sequência aos valores de um canal."""
+
+    def __init__(self, filtros):
+        self.filtros = list(filtros)
+
+    def processar(self, valores):
+        for filtro in self.filtros:
+            valores = filtro.processar(valores)
+        return valores
+
+def criar_cadeia(texto: str, taxa_hz: float) -> CadeiaFiltros:
+    """Monta a cadeia a partir de 'nome:parametro,...', na ordem dada.
+
+    Nomes: 'mediana:N' (mediana móvel de N amostras), 'media:N' (média móvel
+    de N amostras, FIR) e 'passa_baixas:HZ' (IIR de primeira ordem, corte em
+    HZ para a taxa de amostragem `taxa_hz`).
+    """
+    filtros = []
+    for item in (parte.strip() for parte in texto.split(',')):
+        if not item:
+            continue
+        nome, parametro = item.split(':', 1)
+        nome = nome.strip().lower()
+        if nome == "mediana":
+            filtros.append(FiltroMediana(int(parametro)))
+        elif nome == "media":
+            filtros.append(FiltroFIR.media_movel(int(parametro)))
+        elif nome == "passa_baixas":
+            filtros.append(FiltroIIR.passa_baixas(float(parametro), taxa_hz))
+        else:
+            raise ValueError(f"Filtro desconhecido: {nome}")
+    return CadeiaFiltros(filtros)
+
+class EstagioFiltros:
+    """Filtra os blocos de amostras (ver app.amostras) uma vez, antes de todos os consumidores.
+
+    Cada canal tem sua cadeia; só as amostras válidas (não NaN) passam pelos
+    filtros. O bloco é alterado no lugar.
+    """
+
+    def __init__(self, cadeias):
+        self.cadeias = {canal: cadeia for canal, cadeia in cadeias.items() if cadeia.filtros}
+
+    @classmethod
+    def configurar(cls, especificacoes, taxa_hz: float):
+        """`especificacoes`: {canal: texto de criar_cadeia}."""
+        return cls({canal: criar_cadeia(texto, taxa_hz) for canal, texto in especificacoes.items()})
+
+    def processar(self, bloco):
+        for canal, cadeia in self.cadeias.items():
+            if canal >= bloco.shape[1]:
+                continue
+            coluna = bloco[:, canal]
+            validos = ~np.isnan(coluna)
+            if validos.any():
+                coluna[validos] = cadeia.processar(coluna[validos])
+        return bloco
@@ -1,8 +1,8 @@
 import logging
 from .settings import LOG_FILE
 
-def configurar_logs():
-    """Configura o sistema de logging"""
+def configurar_logs(mensagem: str = "Aplicativo iniciado"):
+    """Configura o sistema de logging (também no processo de aquisição, ver app.barramento)"""
     LOG_FILE.parent.mkdir(exist_ok=True)
     logging.basicConfig(
         filename=str(LOG_FILE),
@@ -11,5 +11,5 @@ def configurar_logs():
         datefmt='%d/%m/%Y %H:%M:%S'
     )
     logger = logging.getLogger('TorqView')
-    logger.info("Aplicativo iniciado")
+    logger.info(mensagem)
     return logger
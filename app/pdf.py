@@ -1,75 +1,198 @@
 import os
-import tempfile
 import platform
 import subprocess
+from contextlib import closing
 from datetime import datetime
 from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
 from reportlab.lib.units import cm
 from reportlab.lib import colors
-from reportlab.platypus import Table, TableStyle
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.graphics.charts.lineplots import LinePlot
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, LongTable, TableStyle
+from app.estatisticas import EstatisticasStream
+from app.database import (
+    conectar_leitura, buscar_picos, buscar_serie_agregada,
+    contar_leituras_por_data, iterar_leituras_por_data, resumir_ciclos
+)
 
-def gerar_pdf(caminho, grafico_widget, dados_coletados, porta, intervalo, picos):
-    temp_img = tempfile.NamedTemporaryFile(suffix='.png', delete=False)
-    grafico_widget.grab().save(temp_img.name, 'png')
-    temp_img.close()
+QUANTIS_RELATORIO = (0.05, 0.5, 0.95, 0.99)
+CORES_SERIES = [colors.HexColor(cor) for cor in ('#d32f2f', '#1976d2', '#388e3c', '#f57c00')]
+PROGRESSO_A_CADA = 10000  # leituras entre avisos de progresso (e checagens de cancelamento)
 
-    c = canvas.Canvas(caminho, pagesize=A4)
+class RelatorioCancelado(Exception):
+    pass
+
+class RelatorioVazio(ValueError):
+    """Nenhuma leitura no intervalo/porta pedidos: nenhum arquivo é gerado."""
+
+ESTILO_SECAO = ParagraphStyle('secao', fontName="Helvetica-Bold", fontSize=12, leading=16, spaceBefore=8, spaceAfter=6)
+
+ESTILO_TABELA = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#d32f2f')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+])
+
+def _cabecalho(c, doc):
+    """Desenhado em todas as páginas."""
     largura, altura = A4
+    agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+    c.saveState()
+    c.setFont("Helvetica-Bold", 18)
+    c.setFillColor(colors.red)
+    c.drawCentredString(largura/2, altura - 2.5*cm, "RELATÓRIO DE TORQUE - TORQVIEW")
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 10)
+    c.drawRightString(largura - 2*cm, altura - 2*cm, f"Gerado em: {agora}")
+    c.drawRightString(largura - 2*cm, 1.5*cm, f"Página {doc.page}")
+    c.restoreState()
 
-    def cabecalho(c, altura):
-        agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        c.setFont("Helvetica-Bold", 18)
-        c.setFillColor(colors.red)
-        c.drawCentredString(largura/2, altura - 2.5*cm, "RELATÓRIO DE TORQUE - TORQVIEW")
-        c.setFillColor(colors.black)
-        c.setFont("Helvetica", 10)
-        c.drawRightString(largura - 2*cm, altura - 2*cm, f"Gerado em: {agora}")
-        return altura - 5*cm
+def _fmt(valor):
+    return "--" if valor is None else f"{valor:.2f}"
 
-    y = cabecalho(c, altura)
+def _desenhar_grafico(series, largura=16*cm, altura=8*cm):
+    """Gráfico vetorial de {nome: (tempos, valores)}, eixo X em minutos desde o início."""
+    desenho = Drawing(largura, altura)
+    series = {nome: serie for nome, serie in series.items() if serie[0]}
+    if not series:
+        desenho.add(String(largura / 2, altura / 2, "Sem dados para o gráfico", textAnchor='middle'))
+        return desenho
 
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(2*cm, y, f"Porta: {porta}  Leituras: {len(dados_coletados)}  Intervalo: {intervalo}s")
-    y -= 1*cm
+    origem = min(serie[0][0] for serie in series.values())
+    grafico = LinePlot()
+    grafico.x, grafico.y = 1.5*cm, 1*cm
+    grafico.width, grafico.height = largura - 2*cm, altura - 1.8*cm
+    grafico.data = [
+        list(zip([(t - origem) / 60 for t in tempos], valores))
+        for tempos, valores in series.values()
+    ]
+    for indice in range(len(grafico.data)):
+        grafico.lines[indice].strokeColor = CORES_SERIES[indice % len(CORES_SERIES)]
+        grafico.lines[indice].strokeWidth = 0.6
+    grafico.xValueAxis.labelTextFormat = '%.0f'
+    grafico.xValueAxis.labels.fontSize = 7
+    grafico.yValueAxis.labels.fontSize = 7
+    desenho.add(grafico)
+    desenho.add(String(largura / 2, 0, "Tempo (min)", fontSize=8, textAnchor='middle'))
 
-    c.drawImage(temp_img.name, 2*cm, y - 8*cm, width=16*cm, height=8*cm)
-    y -= 9*cm
+    # Legenda
+    for indice, nome in enumerate(series):
+        x = 1.5*cm + indice * 3.5*cm
+        desenho.add(String(x, altura - 0.5*cm, f"\u25a0 {nome}", fontSize=8,
+                           fillColor=CORES_SERIES[indice % len(CORES_SERIES)]))
+    return desenho
 
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(2*cm, y, "Estatísticas:")
-    y -= 0.7*cm
+def _acompanhar(leituras, total, progresso, cancelar):
+    """Repassa as leituras avisando o progresso e parando se o cancelamento for pedido."""
+    lidas = 0
+    for valor in leituras:
+        yield valor
+        lidas += 1
+        if lidas % PROGRESSO_A_CADA == 0:
+            if cancelar is not None and cancelar():
+                raise RelatorioCancelado()
+            if progresso is not None:
+                progresso(lidas, total)
+    if progresso is not None:
+        progresso(lidas, max(total, lidas))
 
-    c.setFont("Helvetica", 10)
-    c.drawString(2*cm, y, f"Mínimo: {min(dados_coletados):.2f}  Máximo: {max(dados_coletados):.2f}  Média: {sum(dados_coletados)/len(dados_coletados):.2f}")
-    y -= 1*cm
+def gerar_pdf(caminho, leituras, porta, intervalo, picos, grafico=None,
+              total=0, progresso=None, cancelar=None, ciclos=None):
+    """Gera o relatório em streaming.
+
+    `leituras` é qualquer iterável de valores (lista, gerador, cursor): é
+    percorrido uma vez só para as estatísticas (Welford e P²) e nunca
+    guardado, então a memória não cresce com o tamanho do relatório; sem
+    nenhum valor, levanta RelatorioVazio. `grafico` ({nome: (tempos, valores)}) é
+    desenhado como vetor. `progresso(lidas, total)` é chamado durante a passada e
+    `cancelar()` verdadeiro interrompe com RelatorioCancelado. `ciclos` (ver
+    database.resumir_ciclos) acrescenta o resumo dos apertos por porta. As
+    tabelas quebram página com o cabeçalho repetido.
+    """
+    resumo = EstatisticasStream(QUANTIS_RELATORIO)
+    resumo.adicionar_varios(_acompanhar(leituras, total, progresso, cancelar))
+    valores = resumo.resumo()
+    if not valores['contagem']:
+        raise RelatorioVazio("Nenhum dado para gerar PDF.")
+
+    doc = SimpleDocTemplate(caminho, pagesize=A4, leftMargin=2*cm, rightMargin=2*cm,
+                            topMargin=4*cm, bottomMargin=2*cm)
+    historia = [
+        Paragraph(f"Porta: {porta}  Leituras: {valores['contagem']}  Intervalo: {intervalo}s", ESTILO_SECAO),
+        _desenhar_grafico(grafico or {}),
+        Spacer(1, 0.5*cm),
+        Paragraph("Estatísticas:", ESTILO_SECAO),
+    ]
+
+    cabecalhos = ["Mínimo", "Máximo", "Média", "Desvio"] + [f"P{round(p * 100)}" for p in QUANTIS_RELATORIO]
+    linha = [valores['minimo'], valores['maximo'], valores['media'], valores['desvio']]
+    linha += [valores['quantis'][p] for p in QUANTIS_RELATORIO]
+    tabela = Table([cabecalhos, [_fmt(valor) for valor in linha]])
+    tabela.setStyle(ESTILO_TABELA)
+    historia.append(tabela)
+
+    if ciclos:
+        historia.append(Paragraph("Ciclos de Aperto:", ESTILO_SECAO))
+        linhas = [
+            [p, resumo['ciclos']] + [_fmt(resumo[chave]) for chave in
+             ('pico_medio', 'pico_desvio', 'pico_minimo', 'pico_maximo', 'duracao_media')]
+            for p, resumo in ciclos.items()
+        ]
+        tabela = LongTable([["Porta", "Ciclos", "Pico Médio", "Desvio", "Mínimo", "Máximo", "Duração (s)"]] + linhas,
+                           repeatRows=1)
+        tabela.setStyle(ESTILO_TABELA)
+        historia.append(tabela)
 
     if picos:
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(2*cm, y, "Picos Registrados:")
-        y -= 0.7*cm
-
-        dados = [["Pico", "Porta", "Sentido", "Hora"]] + picos
-        tabela = Table(dados, colWidths=[3*cm, 3*cm, 3*cm, 3*cm])
-        estilo = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#d32f2f')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ])
-        tabela.setStyle(estilo)
-        tabela.wrapOn(c, largura, altura)
-        tabela.drawOn(c, 2*cm, y - len(dados)*0.6*cm)
-
-    c.save()
-    os.unlink(temp_img.name)
+        historia.append(Paragraph("Picos Registrados:", ESTILO_SECAO))
+        tabela = LongTable([["Pico", "Porta", "Sentido", "Hora"]] + list(picos),
+                           colWidths=[3*cm, 3*cm, 3*cm, 5*cm], repeatRows=1)
+        tabela.setStyle(ESTILO_TABELA)
+        historia.append(tabela)
+
+    doc.build(historia, onFirstPage=_cabecalho, onLaterPages=_cabecalho)
+
+def gerar_relatorio_periodo(caminho, data_inicio=None, data_fim=None, porta=None, intervalo=None,
+                            limite_picos=25, progresso=None, cancelar=None, conn=None):
+    """Relatório das leituras do banco no intervalo, sem depender da GUI.
+
+    O gráfico vem dos agregados; as estatísticas, de uma passada em streaming
+    pelas leituras do intervalo. Sem leituras, levanta RelatorioVazio.
+    """
+    if conn is None:
+        with closing(conectar_leitura()) as conn:
+            return gerar_relatorio_periodo(caminho, data_inicio, data_fim, porta, intervalo,
+                                           limite_picos, progresso, cancelar, conn)
+    total = contar_leituras_por_data(data_inicio, data_fim, porta, conn=conn)
+    if not total:
+        raise RelatorioVazio("Nenhum dado para gerar PDF.")
+    picos = [
+        [f"{valor:.2f}", p, "Horário" if valor >= 0 else "Anti-horário", timestamp]
+        for valor, p, timestamp in buscar_picos(limite_picos, data_inicio, data_fim, porta, conn=conn)
+    ]
+    gerar_pdf(
+        caminho,
+        (valor for _, valor, _ in iterar_leituras_por_data(data_inicio, data_fim, porta, conn=conn)),
+        porta or "Todas",
+        intervalo if intervalo is not None else "--",
+        picos,
+        buscar_serie_agregada(data_inicio, data_fim, porta, conn=conn),
+        total=total,
+        progresso=progresso,
+        cancelar=cancelar,
+        ciclos=resumir_ciclos(data_inicio, data_fim, porta, conn=conn),
+    )
 
+def abrir_arquivo(caminho):
+    """Abre o arquivo no visualizador padrão sem esperar por ele."""
     try:
         if platform.system() == "Windows":
             os.startfile(caminho)
         elif platform.system() == "Darwin":
-            subprocess.call(["open", caminho])
+            subprocess.Popen(["open", caminho])
         else:
-            subprocess.call(["xdg-open", caminho])
+            subprocess.Popen(["xdg-open", caminho], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     except Exception:
         pass
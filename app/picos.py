@@ -0,0 +1,123 @@
+import heapq
+import itertools
+import numpy as np
+
+class _SegmentadorLimiar:
+    """Base dos detectores por limiar com histerese, bloco a bloco.
+
+    Um evento começa quando |valor| atinge `limiar_inicio` e termina na
+    primeira amostra com |valor| abaixo de `limiar_fim`; depois do fim, novos
+    disparos são ignorados por `refratario` segundos. O estado atravessa os
+    blocos. As subclasses recebem cada evento em _iniciar, _acumular (trechos
+    do evento, possivelmente em vários blocos) e _encerrar. O laço é por
+    evento, não por amostra.
+    """
+
+    def __init__(self, limiar_inicio: float, limiar_fim: float, refratario: float = 0.0):
+        self.limiar_inicio = limiar_inicio
+        self.limiar_fim = limiar_fim
+        self.refratario = refratario
+        self.em_evento = False
+        self._liberado_em = float('-inf')
+
+    def processar(self, tempos, valores):
+        """Processa um bloco e devolve o que _encerrar produziu para os eventos encerrados."""
+        encerrados = []
+        magnitude = np.abs(valores)
+        acima = magnitude >= self.limiar_inicio
+        abaixo = magnitude < self.limiar_fim
+        n = len(valores)
+        i = 0
+        while i < n:
+            if not self.em_evento:
+                disparos = np.flatnonzero(acima[i:] & (tempos[i:] >= self._liberado_em))
+                if len(disparos) == 0:
+                    break
+                i += int(disparos[0])
+                self.em_evento = True
+                self._iniciar(float(tempos[i]))
+
+            fins = np.flatnonzero(abaixo[i:])
+            fim = i + int(fins[0]) if len(fins) else n
+            if fim > i:
+                self._acumular(tempos[i:fim], valores[i:fim], magnitude[i:fim])
+            if fim == n:
+                break  # evento continua no próximo bloco
+
+            self.em_evento = False
+            self._liberado_em = float(tempos[fim]) + self.refratario
+            evento = self._encerrar(float(tempos[fim]))
+            if evento is not None:
+                encerrados.append(evento)
+            i = fim
+        return encerrados
+
+    def _iniciar(self, inicio: float):
+        pass
+
+    def _acumular(self, tempos, valores, magnitude):
+        pass
+
+    def _encerrar(self, fim: float):
+        """Resultado do evento encerrado em `fim` (None o descarta)."""
+        return None
+
+class DetectorPicos(_SegmentadorLimiar):
+    """Detecta eventos de pico (apertos) num canal, bloco a bloco.
+
+    Um evento começa quando |valor| atinge `limiar` e termina quando cai abaixo
+    de `limiar - histerese`; o pico do evento é o maior |valor| entre os dois.
+    Depois do fim de um evento, novos disparos são ignorados por `refratario`
+    segundos. Um evento pode começar num bloco e terminar em outro.
+    processar() devolve os eventos encerrados como [(valor, timestamp)].
+    """
+
+    def __init__(self, limiar: float, histerese: float, refratario: float):
+        super().__init__(limiar, limiar - histerese, refratario)
+        self.limiar = limiar
+        self.histerese = histerese
+        self._pico_valor = 0.0
+        self._pico_tempo = None
+
+    def _iniciar(self, inicio: float):
+        self._pico_valor = 0.0
+        self._pico_tempo = None
+
+    def _acumular(self, tempos, valores, magnitude):
+        j = int(np.argmax(magnitude))
+        if self._pico_tempo is None or magnitude[j] > abs(self._pico_valor):
+            self._pico_valor = float(valores[j])
+            self._pico_tempo = float(tempos[j])
+
+    def _encerrar(self, fim: float):
+        return self._pico_valor, self._pico_tempo
+
+class RastreadorPicos:
+    """Mantém os K maiores picos (em |valor|) de cada canal em heaps limitados.
+
+    registrar() diz o que mudou (registro que entrou e, se algum saiu, qual),
+    para que a tabela atualize só as linhas afetadas.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heaps = {}
+        self._sequencia = itertools.count()
+
+    def registrar(self, canal: int, registro):
+        """Oferece um registro (valor, porta, sentido, tempo); devolve (entrou, saiu)."""
+        heap = self._heaps.setdefault(canal, [])
+        item = (abs(registro[0]), next(self._sequencia), registro)
+        if len(heap) < self.k:
+            heapq.heappush(heap, item)
+            return registro, None
+        if item[0] <= heap[0][0]:
+            return None, None
+        removido = heapq.heapreplace(heap, item)
+        return registro, removido[2]
+
+    def picos(self, canal: int = None):
+        """Registros em ordem decrescente de |valor| (de um canal ou de todos)."""
+        heaps = [self._heaps.get(canal, [])] if canal is not None else self._heaps.values()
+        itens = [item for heap in heaps for item in heap]
+        return [item[2] for item in sorted(itens, key=lambda item: (-item[0], item[1]))]
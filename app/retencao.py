@@ -0,0 +1,248 @@
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from app.database import (
+    conectar, criar_tabela_blocos, periodo_de, limpar_cache_arquivos, SQL_INSERIR_BLOCO, MARGEM_SELO_PARTICAO
+)
+from app.settings import (
+    ARQUIVO_DIR, PARTICOES_DIR, RETENCAO_BRUTO_DIAS, RETENCAO_SEGUNDOS_DIAS, RETENCAO_PERIODO,
+    RETENCAO_LOTE, RETENCAO_INTERVALO_S
+)
+
+DIA = 86400.0
+
+# Blocos que entram num arquivo já existente: os que ele já tem (ciclo interrompido
+# entre arquivar e apagar) não são copiados de novo
+SQL_MESCLAR_BLOCO = """
+    INSERT INTO blocos (porta, inicio, fim, quantidade, minimo, maximo, tempos, valores)
+    SELECT ?, ?, ?, ?, ?, ?, ?, ?
+    WHERE NOT EXISTS (SELECT 1 FROM blocos WHERE porta = ? AND inicio = ? AND fim = ?)
+"""
+
+class MotorRetencao:
+    """Aplica a política de retenção em segundo plano.
+
+    Blocos brutos mais antigos que `bruto_dias` são copiados, período a
+    período, para arquivos sqlite compactados em ARQUIVO_DIR (catalogados na
+    tabela arquivos, que as consultas usam para lê-los sob demanda) e só então
+    apagados do banco. Partições (ver PARTICIONAMENTO) encerradas são seladas
+    (checkpoint e journal DELETE, passando a ser abertas como imutáveis) e,
+    vencidas, compactadas inteiras, sem apagar linha a linha. Agregados de 1 s
+    expiram após `segundos_dias`. Todas as remoções são feitas em transações
+    pequenas, para não travar o gravador.
+    """
+
+    def __init__(self, bruto_dias: float = RETENCAO_BRUTO_DIAS,
+                 segundos_dias: float = RETENCAO_SEGUNDOS_DIAS,
+                 periodo: str = RETENCAO_PERIODO,
+                 lote: int = RETENCAO_LOTE,
+                 intervalo: float = RETENCAO_INTERVALO_S,
+                 pausa: float = 0.05,
+                 logger=None):
+        self.bruto_dias = bruto_dias
+        self.segundos_dias = segundos_dias
+        self.periodo = periodo
+        self.lote = lote
+        self.intervalo = intervalo
+        self.pausa = pausa
+        self.logger = logger or logging.getLogger('TorqView')
+        self.thread = None
+        self._parar = threading.Event()
+
+    def iniciar(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self._parar.clear()
+        self.thread = threading.Thread(target=self._executar, name="MotorRetencao", daemon=True)
+        self.thread.start()
+
+    def parar(self, timeout: float = 5.0):
+        self._parar.set()
+        if self.thread:
+            self.thread.join(timeout)
+
+    def _executar(self):
+        while not self._parar.is_set():
+            try:
+                self.executar_ciclo()
+            except Exception as e:
+                self.logger.error(f"Erro na retenção: {str(e)}")
+            self._parar.wait(self.intervalo)
+
+    def executar_ciclo(self, agora: float = None):
+        """Arquiva os períodos vencidos, poda os agregados de 1 s e o cache de arquivos."""
+        agora = time.time() if agora is None else agora
+        conn = conectar()
+        try:
+            fronteira, = conn.execute("SELECT MAX(fim) FROM arquivos").fetchone()
+            if fronteira is not None:
+                self._arquivar_atrasados(conn, fronteira)
+            self._selar_particoes(conn, agora)
+            if self.bruto_dias > 0:
+                self._arquivar_vencidos(conn, agora - self.bruto_dias * DIA)
+                self._arquivar_particoes(conn, agora - self.bruto_dias * DIA)
+            if self.segundos_dias > 0:
+                self._podar_segundos(conn, agora - self.segundos_dias * DIA)
+        finally:
+            conn.close()
+        removidas = limpar_cache_arquivos(agora=agora)
+        if removidas:
+            self.logger.info(f"Retenção: {removidas} cópias de arquivos removidas do cache")
+
+    def _arquivar_vencidos(self, conn, corte: float):
+        while not self._parar.is_set():
+            primeiro, = conn.execute("SELECT MIN(inicio) FROM blocos").fetchone()
+            if primeiro is None:
+                return
+            nome, inicio, fim = periodo_de(primeiro, self.periodo)
+            if fim > corte:
+                return
+            self._arquivar(conn, nome, inicio, fim)
+
+    def _arquivar_atrasados(self, conn, fronteira: float):
+        """Blocos abaixo da fronteira já arquivada entram no arquivo do seu período antes de sair do banco.
+
+        São os que chegaram atrasados (relógio ou fila do gravador) depois de
+        o período ser arquivado, e as sobras de um ciclo interrompido.
+        """
+        while not self._parar.is_set():
+            primeiro, = conn.execute("SELECT MIN(inicio) FROM blocos WHERE inicio < ?", (fronteira,)).fetchone()
+            if primeiro is None:
+                return
+            catalogado = conn.execute(
+                "SELECT periodo, inicio, fim FROM arquivos WHERE inicio <= ? AND fim > ?", (primeiro, primeiro)
+            ).fetchone()
+            self._arquivar(conn, *(catalogado or periodo_de(primeiro, self.periodo)))
+
+    def _arquivar(self, conn, nome: str, inicio: float, fim: float):
+        """Copia os blocos do período para blocos-<nome>.db.gz (somando aos que já estão lá) e os apaga do banco."""
+        ARQUIVO_DIR.mkdir(parents=True, exist_ok=True)
+        arquivo = f"blocos-{nome}.db.gz"
+        temporario = ARQUIVO_DIR / f"blocos-{nome}.db"
+        existente = (ARQUIVO_DIR / arquivo).exists()
+        if existente:
+            with gzip.open(ARQUIVO_DIR / arquivo, "rb") as origem, open(temporario, "wb") as saida:
+                shutil.copyfileobj(origem, saida)
+        else:
+            temporario.unlink(missing_ok=True)
+
+        # Só os blocos que existem agora: um que o gravador insira durante a cópia
+        # tem id maior, não é apagado e fica para _arquivar_atrasados
+        ultimo_id, = conn.execute("SELECT MAX(id) FROM blocos").fetchone()
+        destino = sqlite3.connect(temporario)
+        try:
+            criar_tabela_blocos(destino)
+            inseridos = destino.total_changes
+            cursor = conn.execute(
+                "SELECT porta, inicio, fim, quantidade, minimo, maximo, tempos, valores "
+                "FROM blocos WHERE inicio >= ? AND inicio < ? AND id <= ?",
+                (inicio, fim, ultimo_id if ultimo_id is not None else 0),
+            )
+            while True:
+                linhas = cursor.fetchmany(self.lote)
+                if not linhas:
+                    break
+                if existente:
+                    destino.executemany(SQL_MESCLAR_BLOCO, [linha + linha[:3] for linha in linhas])
+                else:
+                    destino.executemany(SQL_INSERIR_BLOCO, linhas)
+            destino.commit()
+            inseridos = destino.total_changes - inseridos
+            blocos, fim_dados, maximo, minimo = destino.execute(
+                "SELECT COUNT(*), MAX(fim), MAX(maximo), MIN(minimo) FROM blocos"
+            ).fetchone()
+        finally:
+            destino.close()
+
+        # Compacta e só então publica no catálogo: a partir daí as consultas
+        # leem o período do arquivo e os blocos podem sair do banco
+        compactado = ARQUIVO_DIR / f"{arquivo}.tmp"
+        with open(temporario, "rb") as origem, gzip.open(compactado, "wb") as saida:
+            shutil.copyfileobj(origem, saida)
+        os.replace(compactado, ARQUIVO_DIR / arquivo)
+        temporario.unlink()
+
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO arquivos (periodo, inicio, fim, fim_dados, maximo, minimo, blocos, arquivo) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (nome, inicio, fim, inicio if fim_dados is None else fim_dados,
+                 float('-inf') if maximo is None else maximo, float('inf') if minimo is None else minimo,
+                 blocos, arquivo),
+            )
+        if ultimo_id is not None:
+            self._apagar_blocos(conn, inicio, fim, ultimo_id)
+        self.logger.info(f"Retenção: {inseridos} blocos de {nome} arquivados em {arquivo}")
+
+    def _selar_particoes(self, conn, agora: float):
+        pendentes = conn.execute(
+            "SELECT periodo, arquivo FROM particoes WHERE selada = 0 AND fim + ? <= ?",
+            (MARGEM_SELO_PARTICAO, agora),
+        ).fetchall()
+        for periodo, arquivo in pendentes:
+            try:
+                particao = sqlite3.connect(PARTICOES_DIR / arquivo)
+                try:
+                    particao.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                    modo, = particao.execute("PRAGMA journal_mode = DELETE").fetchone()
+                finally:
+                    particao.close()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Retenção: partição {arquivo} ainda em uso: {str(e)}")
+                continue
+            if modo.lower() != "delete":
+                continue  # outra conexão ainda aberta; tenta no próximo ciclo
+            with conn:
+                conn.execute("UPDATE particoes SET selada = 1 WHERE periodo = ?", (periodo,))
+
+    def _arquivar_particoes(self, conn, corte: float):
+        vencidas = conn.execute(
+            "SELECT periodo, arquivo FROM particoes WHERE selada = 1 AND arquivo NOT LIKE '%.gz' AND fim <= ?",
+            (corte,),
+        ).fetchall()
+        for periodo, arquivo in vencidas:
+            if self._parar.is_set():
+                return
+            ARQUIVO_DIR.mkdir(parents=True, exist_ok=True)
+            compactado = ARQUIVO_DIR / f"{arquivo}.gz.tmp"
+            with open(PARTICOES_DIR / arquivo, "rb") as origem, gzip.open(compactado, "wb") as saida:
+                shutil.copyfileobj(origem, saida)
+            os.replace(compactado, ARQUIVO_DIR / f"{arquivo}.gz")
+            with conn:
+                conn.execute("UPDATE particoes SET arquivo = ? WHERE periodo = ?", (f"{arquivo}.gz", periodo))
+            self.logger.info(f"Retenção: partição {periodo} compactada em {arquivo}.gz")
+
+        # Remove as partições já compactadas (num ciclo seguinte, se algum leitor ainda as tinha abertas)
+        for arquivo, in conn.execute("SELECT arquivo FROM particoes WHERE arquivo LIKE '%.gz'").fetchall():
+            original = PARTICOES_DIR / arquivo.removesuffix(".gz")
+            try:
+                original.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    def _apagar_blocos(self, conn, inicio: float, fim: float, ultimo_id: int):
+        """Apaga os blocos do período já copiados (id até `ultimo_id`), em transações pequenas."""
+        while not self._parar.is_set():
+            with conn:
+                apagados = conn.execute(
+                    "DELETE FROM blocos WHERE id IN ("
+                    "SELECT id FROM blocos WHERE inicio >= ? AND inicio < ? AND id <= ? LIMIT ?)",
+                    (inicio, fim, ultimo_id, self.lote),
+                ).rowcount
+            if not apagados:
+                return
+            time.sleep(self.pausa)
+
+    def _podar_segundos(self, conn, corte: float):
+        primeiro, = conn.execute("SELECT MIN(balde) FROM agregados WHERE resolucao = 1").fetchone()
+        while primeiro is not None and primeiro < corte and not self._parar.is_set():
+            # `lote` segundos por transação (uma linha por porta e segundo)
+            ate = min(corte, primeiro + self.lote)
+            with conn:
+                conn.execute("DELETE FROM agregados WHERE resolucao = 1 AND balde < ?", (ate,))
+            primeiro = ate
+            time.sleep(self.pausa)
@@ -23,6 +23,8 @@ SOUND_PATH = "resources/sounds/alert.wav"
 LOG_FILE = LOGS_DIR / "torqview.log"
 PDF_DIR = BASE_DIR / "PDF"
 DB_PATH = DB_DIR / "torqview.db"
+ARQUIVO_DIR = DB_DIR / "arquivo"  # Blocos antigos compactados (ver app.retencao)
+PARTICOES_DIR = DB_DIR / "particoes"  # Um arquivo de blocos por período (ver PARTICIONAMENTO)
 
 # Configurações de segurança
 def get_admin_hash():
@@ -39,4 +41,94 @@ ADMIN_HASH = get_admin_hash()
 
 # Configurações adicionais (opcional)
 DEBUG_MODE = os.getenv("TORQVIEW_DEBUG", "False").lower() == "true"
-MAX_LOGIN_ATTEMPTS = int(os.getenv("MAX_LOGIN_ATTEMPTS", "3"))
\ No newline at end of file
+MAX_LOGIN_ATTEMPTS = int(os.getenv("MAX_LOGIN_ATTEMPTS", "3"))
+
+# Gravação de leituras em lote (thread de fundo)
+GRAVADOR_TAMANHO_LOTE = int(os.getenv("TORQVIEW_GRAVADOR_LOTE", "200"))
+GRAVADOR_INTERVALO_S = float(os.getenv("TORQVIEW_GRAVADOR_INTERVALO", "0.5"))
+GRAVADOR_CAPACIDADE_FILA = int(os.getenv("TORQVIEW_GRAVADOR_FILA", "20000"))  # Leituras aguardando gravação (um bloco conta suas linhas)
+GRAVADOR_INTERVALO_AVISO_S = float(os.getenv("TORQVIEW_GRAVADOR_INTERVALO_AVISO", "10"))  # Entre avisos de descarte
+
+# Armazenamento em blocos float32 por canal
+BLOCO_JANELA_S = float(os.getenv("TORQVIEW_BLOCO_JANELA", "10"))
+BLOCO_MAX_AMOSTRAS = int(os.getenv("TORQVIEW_BLOCO_MAX_AMOSTRAS", "2048"))
+
+# Gráfico de monitoramento
+GRAFICO_CAPACIDADE = int(os.getenv("TORQVIEW_GRAFICO_CAPACIDADE", "10000"))
+RENDER_FPS = float(os.getenv("TORQVIEW_RENDER_FPS", "30"))
+GRAFICO_NIVEIS_LOD = int(os.getenv("TORQVIEW_GRAFICO_NIVEIS_LOD", "4"))
+GRAFICO_FATOR_LOD = int(os.getenv("TORQVIEW_GRAFICO_FATOR_LOD", "8"))
+
+# Aquisição
+NUM_CANAIS = 4
+RELATORIO_AQUISICAO_S = float(os.getenv("TORQVIEW_RELATORIO_AQUISICAO", "60"))
+BACKEND_AQUISICAO = os.getenv("TORQVIEW_BACKEND_AQUISICAO", "threads").lower()  # "threads" ou "async"
+# Transporte entre threads: blocos de até N amostras ou T ms
+BLOCO_SINAL_AMOSTRAS = int(os.getenv("TORQVIEW_BLOCO_SINAL_AMOSTRAS", "64"))
+BLOCO_SINAL_MS = float(os.getenv("TORQVIEW_BLOCO_SINAL_MS", "50"))
+
+def ler_dispositivos(texto):
+    """Lê a lista de dispositivos no formato 'PORTA:ESCRAVO:CANAL,...'.
+
+    Ex.: 'COM1:1:1,COM1:2:2,COM2:1:3' = dois escravos no COM1 (canais 1 e 2)
+    e um no COM2 (canal 3).
+    """
+    dispositivos = []
+    for item in (parte.strip() for parte in texto.split(',')):
+        if not item:
+            continue
+        porta, slave, canal = item.rsplit(':', 2)
+        dispositivos.append({'porta': porta, 'slave': int(slave), 'canal': int(canal)})
+    return dispositivos
+
+DISPOSITIVOS_MODBUS = ler_dispositivos(os.getenv("TORQVIEW_DISPOSITIVOS", ""))
+
+# Detecção de picos por evento (aperto)
+PICO_LIMIAR = float(os.getenv("TORQVIEW_PICO_LIMIAR", "5.0"))
+PICO_HISTERESE = float(os.getenv("TORQVIEW_PICO_HISTERESE", "1.0"))
+PICO_REFRATARIO_S = float(os.getenv("TORQVIEW_PICO_REFRATARIO", "0.2"))
+
+# Consultas em segundo plano (conexões somente leitura)
+CONSULTAS_THREADS = int(os.getenv("TORQVIEW_CONSULTAS_THREADS", "2"))
+
+# Retenção: amostras brutas por N dias (0 = para sempre), depois arquivadas
+# compactadas, um arquivo por "dia" ou "mes"; agregados de 1 s por N dias,
+# os de 1 min e 1 h ficam para sempre
+RETENCAO_BRUTO_DIAS = float(os.getenv("TORQVIEW_RETENCAO_BRUTO_DIAS", "30"))
+RETENCAO_SEGUNDOS_DIAS = float(os.getenv("TORQVIEW_RETENCAO_SEGUNDOS_DIAS", "90"))
+RETENCAO_PERIODO = os.getenv("TORQVIEW_RETENCAO_PERIODO", "dia").lower()
+RETENCAO_LOTE = int(os.getenv("TORQVIEW_RETENCAO_LOTE", "500"))  # Linhas por transação
+RETENCAO_INTERVALO_S = float(os.getenv("TORQVIEW_RETENCAO_INTERVALO", "3600"))
+ARQUIVO_CACHE_HORAS = float(os.getenv("TORQVIEW_ARQUIVO_CACHE_HORAS", "24"))  # Cópias descompactadas para consulta
+
+# Particionamento dos blocos em arquivos por período: "nenhum", "dia" ou "mes"
+PARTICIONAMENTO = os.getenv("TORQVIEW_PARTICIONAMENTO", "nenhum").lower()
+PARTICOES_MMAP = int(os.getenv("TORQVIEW_PARTICOES_MMAP", str(256 * 1024 * 1024)))  # bytes por partição lida
+
+# Relatórios em lote (relatorios.py): turnos "HH:MM-HH:MM" separados por vírgula
+RELATORIOS_TURNOS = os.getenv("TORQVIEW_TURNOS", "06:00-14:00,14:00-22:00,22:00-06:00")
+RELATORIOS_PROCESSOS = int(os.getenv("TORQVIEW_RELATORIOS_PROCESSOS", "0"))  # 0 = um por CPU
+
+# Alarmes de limite: amostras seguidas acima (ou abaixo, para normalizar) do
+# limite do canal, e intervalo mínimo entre alertas sonoros/visuais
+ALARME_CONFIRMACAO = int(os.getenv("TORQVIEW_ALARME_CONFIRMACAO", "3"))
+ALARME_INTERVALO_ALERTA_S = float(os.getenv("TORQVIEW_ALARME_INTERVALO_ALERTA", "2.0"))
+
+# Ciclos de aperto: começam com |torque| >= início e terminam abaixo do fim (histerese)
+CICLO_LIMIAR_INICIO = float(os.getenv("TORQVIEW_CICLO_LIMIAR_INICIO", "5.0"))
+CICLO_LIMIAR_FIM = float(os.getenv("TORQVIEW_CICLO_LIMIAR_FIM", "2.0"))
+CICLO_DURACAO_MINIMA_S = float(os.getenv("TORQVIEW_CICLO_DURACAO_MINIMA", "0.05"))
+
+# Filtros por canal aplicados aos blocos antes de exibição e gravação (ver
+# app.filtros.criar_cadeia), ex.: "mediana:5,passa_baixas:20"; vazio = sem filtro.
+# TORQVIEW_FILTROS vale para todos os canais; TORQVIEW_FILTROS_CANAL<n> substitui no canal n
+FILTROS = os.getenv("TORQVIEW_FILTROS", "")
+FILTROS_CANAIS = {
+    canal: os.getenv(f"TORQVIEW_FILTROS_CANAL{canal}", FILTROS) for canal in range(1, NUM_CANAIS + 1)
+}
+
+# Aquisição em processo próprio, publicando as amostras num anel em memória
+# compartilhada que a GUI lê a cada BARRAMENTO_LEITURA_MS
+BARRAMENTO_COMPARTILHADO = os.getenv("TORQVIEW_BARRAMENTO", "False").lower() == "true"
+BARRAMENTO_CAPACIDADE = int(os.getenv("TORQVIEW_BARRAMENTO_CAPACIDADE", "65536"))  # linhas no anel
+BARRAMENTO_LEITURA_MS = int(os.getenv("TORQVIEW_BARRAMENTO_LEITURA_MS", "20"))
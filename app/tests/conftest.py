@@ -0,0 +1,34 @@
+import pytest
+from app import database, retencao
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """Banco, arquivos e partições num diretório temporário (nunca o db/ do projeto)."""
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "torqview.db")
+    monkeypatch.setattr(database, "ARQUIVO_DIR", tmp_path / "arquivo")
+    monkeypatch.setattr(database, "PARTICOES_DIR", tmp_path / "particoes")
+    monkeypatch.setattr(database, "ARQUIVO_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(retencao, "ARQUIVO_DIR", tmp_path / "arquivo")
+    monkeypatch.setattr(retencao, "PARTICOES_DIR", tmp_path / "particoes")
+    database.init_db()
+    return tmp_path
+
+def _gravar_blocos(amostras, janela: float = 10.0):
+    """Grava (timestamp, valor, porta) em blocos de até `janela` segundos por porta."""
+    abertos, linhas = {}, []
+    for t, valor, porta in sorted(amostras):
+        bloco = abertos.get(porta)
+        if bloco is None or not bloco.aceita(t, janela):
+            if bloco is not None:
+                linhas.append(bloco.linha())
+            bloco = abertos[porta] = database._BlocoAberto(porta)
+        bloco.adicionar(valor, t)
+    linhas += [bloco.linha() for bloco in abertos.values()]
+    conn = database.conectar()
+    with conn:
+        database._inserir_blocos(conn, linhas)
+    conn.close()
+
+@pytest.fixture
+def gravar(banco):
+    return _gravar_blocos
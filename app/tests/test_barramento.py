@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from app.barramento import AnelAmostras, LeitorBarramento
+
+@pytest.fixture
+def anel():
+    anel = AnelAmostras(capacidade=8, colunas=2)
+    yield anel
+    anel.fechar()
+
+def _bloco(inicio, n):
+    tempos = np.arange(inicio, inicio + n, dtype=float)
+    return np.column_stack((tempos, tempos * 10))
+
+def test_leitor_recebe_so_o_publicado_depois_de_criado(anel):
+    anel.publicar(_bloco(0, 3))
+    leitor = LeitorBarramento(anel)
+    assert leitor.ler() is None
+    anel.publicar(_bloco(3, 2))
+    np.testing.assert_array_equal(leitor.ler(), _bloco(3, 2))
+    assert leitor.ler() is None and leitor.perdidas == 0
+
+def test_leitura_que_da_a_volta_no_anel(anel):
+    leitor = LeitorBarramento(anel)
+    recebidos = []
+    for inicio in range(0, 60, 5):
+        anel.publicar(_bloco(inicio, 5))
+        recebidos.append(leitor.ler())
+    np.testing.assert_array_equal(np.concatenate(recebidos), _bloco(0, 60))
+    assert leitor.perdidas == 0
+
+def test_leitor_atrasado_conta_perdidas(anel):
+    leitor = LeitorBarramento(anel)
+    anel.publicar(_bloco(0, 20))
+    bloco = leitor.ler()
+    np.testing.assert_array_equal(bloco, _bloco(12, 8))
+    assert leitor.perdidas == 12
+
+def test_bloco_maior_que_o_anel(anel):
+    leitor = LeitorBarramento(anel)
+    anel.publicar(_bloco(0, 5))
+    assert len(leitor.ler()) == 5
+    anel.publicar(_bloco(5, 19))
+    np.testing.assert_array_equal(leitor.ler(), _bloco(16, 8))
+    assert anel.sequencia == 24 and leitor.perdidas == 11
+
+def test_bloco_lido_e_copia_propria(anel):
+    leitor = LeitorBarramento(anel)
+    anel.publicar(_bloco(0, 4))
+    bloco = leitor.ler()
+    anel.publicar(_bloco(4, 8))
+    np.testing.assert_array_equal(bloco, _bloco(0, 4))
+
+def test_outro_processo_abre_pelo_nome(anel):
+    leitor_remoto = AnelAmostras(anel.nome)
+    try:
+        assert (leitor_remoto.capacidade, leitor_remoto.colunas) == (8, 2)
+        leitor = LeitorBarramento(leitor_remoto)
+        anel.publicar(_bloco(0, 3))
+        np.testing.assert_array_equal(leitor.ler(), _bloco(0, 3))
+    finally:
+        leitor_remoto.fechar()
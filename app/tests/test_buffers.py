@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from app.buffers import MinMaxDeslizante, SerieDecimada
+
+def _extremos_ingenuos(valores, janela):
+    return [(min(valores[max(0, i - janela + 1):i + 1]), max(valores[max(0, i - janela + 1):i + 1]))
+            for i in range(len(valores))]
+
+@pytest.mark.parametrize("janela", [1, 5, 64])
+def test_minmax_deslizante_amostra_a_amostra(janela):
+    valores = np.random.default_rng(janela).normal(size=500).tolist()
+    extremos = MinMaxDeslizante(janela)
+    obtidos = []
+    for valor in valores:
+        extremos.adicionar(valor)
+        obtidos.append((extremos.minimo, extremos.maximo))
+    assert obtidos == _extremos_ingenuos(valores, janela)
+
+@pytest.mark.parametrize("janela", [1, 7, 100])
+def test_minmax_deslizante_em_blocos_equivale_a_amostras(janela):
+    rng = np.random.default_rng(janela)
+    valores = rng.integers(-50, 50, size=2000).astype(float)
+    extremos = MinMaxDeslizante(janela)
+    esperados = _extremos_ingenuos(valores.tolist(), janela)
+    i = 0
+    while i < len(valores):
+        n = int(rng.integers(1, 3 * janela + 2))
+        extremos.adicionar_bloco(valores[i:i + n])
+        i = min(i + n, len(valores))
+        assert (extremos.minimo, extremos.maximo) == esperados[i - 1]
+
+def test_minmax_deslizante_vazio_e_limpar():
+    extremos = MinMaxDeslizante(3)
+    assert extremos.minimo is None and extremos.maximo is None
+    extremos.adicionar_bloco([])
+    extremos.adicionar_bloco([1.0, 2.0])
+    extremos.limpar()
+    assert extremos.minimo is None and extremos.maximo is None
+
+def test_serie_decimada_blocos_equivalem_a_amostras():
+    xs = np.arange(5000, dtype=float)
+    ys = np.sin(xs / 37.0) * xs
+    uma_a_uma = SerieDecimada(256, niveis=3, fator=4)
+    for x, y in zip(xs, ys):
+        uma_a_uma.adicionar(x, y)
+    em_blocos = SerieDecimada(256, niveis=3, fator=4)
+    for i in range(0, len(xs), 333):
+        em_blocos.adicionar_bloco(xs[i:i + 333], ys[i:i + 333])
+
+    for a, b in zip(uma_a_uma.dados(), em_blocos.dados()):
+        np.testing.assert_array_equal(a, b)
+    for nivel_a, nivel_b in zip(uma_a_uma.niveis, em_blocos.niveis):
+        for a, b in zip(nivel_a.dados(), nivel_b.dados()):
+            np.testing.assert_array_equal(a, b)
+        assert nivel_a.parcial == nivel_b.parcial
+
+def test_serie_decimada_visao_respeita_orcamento_e_preserva_picos():
+    serie = SerieDecimada(1024, niveis=4, fator=8)
+    xs = np.arange(200_000, dtype=float)
+    ys = np.zeros_like(xs)
+    ys[150_123] = 99.0
+    ys[160_456] = -42.0
+    serie.adicionar_bloco(xs, ys)
+
+    x, y = serie.visao(xs[0], xs[-1], 300)
+    assert len(x) <= 2 * 300 + 2
+    assert y.max() == 99.0 and y.min() == -42.0
+
+def test_serie_decimada_visao_recente_usa_amostras_brutas():
+    serie = SerieDecimada(1024, niveis=2, fator=8)
+    xs = np.arange(5000, dtype=float)
+    serie.adicionar_bloco(xs, xs * 2)
+    x, y = serie.visao(4900, 4950, 300)
+    assert x[0] <= 4900 and x[-1] >= 4950
+    np.testing.assert_array_equal(y, x * 2)
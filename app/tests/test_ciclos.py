@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from app.ciclos import DetectorCiclos
+
+def _ciclos(detector, tempos, valores, tamanho):
+    ciclos = []
+    for i in range(0, len(valores), tamanho):
+        ciclos += detector.processar(tempos[i:i + tamanho], valores[i:i + tamanho])
+    return ciclos
+
+def test_caracteristicas_do_ciclo():
+    tempos = np.arange(0.0, 1.0, 0.1)
+    valores = np.array([0, 0, 10, 20, -40, 30, 10, 0, 0, 0], dtype=float)
+    ciclo, = DetectorCiclos(10, 5).processar(tempos, valores)
+    assert ciclo['inicio'] == pytest.approx(0.2)
+    assert ciclo['fim'] == pytest.approx(0.7)
+    assert ciclo['pico'] == -40.0
+    assert ciclo['instante_pico'] == pytest.approx(0.4)
+    assert ciclo['amostras'] == 5
+    assert ciclo['media'] == pytest.approx(6.0)
+    # Retângulos à esquerda: cada |valor| vale pelo intervalo desde a amostra anterior
+    assert ciclo['integral'] == pytest.approx(0.1 * (20 + 40 + 30 + 10))
+
+@pytest.mark.parametrize("tamanho", [1, 3, 50])
+def test_ciclos_em_blocos_equivalem_ao_sinal_inteiro(tamanho):
+    rng = np.random.default_rng(tamanho)
+    tempos = np.cumsum(rng.uniform(0.001, 0.01, size=2000))
+    envelope = np.abs(np.sin(tempos * 20)) * 50
+    valores = envelope * np.sign(np.sin(tempos * 3)) + rng.normal(scale=0.5, size=2000)
+    inteiro = DetectorCiclos(20, 10).processar(tempos, valores)
+    em_blocos = _ciclos(DetectorCiclos(20, 10), tempos, valores, tamanho)
+    assert len(inteiro) > 5
+    assert len(em_blocos) == len(inteiro)
+    for a, b in zip(em_blocos, inteiro):
+        assert a == pytest.approx(b)
+
+def test_duracao_minima_descarta_ciclos_curtos():
+    tempos = np.arange(0.0, 1.2, 0.1)
+    valores = np.array([0, 20, 0, 0, 20, 20, 20, 20, 0, 0, 0, 0], dtype=float)
+    ciclos = DetectorCiclos(10, 5, duracao_minima=0.25).processar(tempos, valores)
+    assert [c['inicio'] for c in ciclos] == [pytest.approx(0.4)]
+
+def test_limiar_fim_acima_do_inicio_e_limitado():
+    detector = DetectorCiclos(10, 50)
+    assert detector.limiar_fim == 10
@@ -0,0 +1,50 @@
+from app import database
+
+BASE = 1_700_000_000.0
+
+def _todas_as_paginas(tamanho, **filtros):
+    linhas, cursor = [], None
+    while True:
+        pagina, cursor = database.buscar_pagina_leituras(cursor=cursor, tamanho=tamanho, **filtros)
+        assert len(pagina) <= tamanho
+        linhas += pagina
+        if cursor is None:
+            return linhas
+
+def _amostras(n=500):
+    # Dois canais intercalados, com instantes repetidos entre eles
+    return [(BASE + i * 0.25, float(i % 97), f"Canal {1 + i % 2}") for i in range(n)] + \
+           [(BASE + i * 0.25, float(-i), "Canal 2") for i in range(0, n, 10)]
+
+def test_paginas_cobrem_tudo_sem_repetir(gravar):
+    amostras = _amostras()
+    gravar(amostras)
+    esperadas = sorted(((t, p, v) for t, v, p in amostras), reverse=True)
+    for tamanho in (1, 7, 200, 10_000):
+        linhas = _todas_as_paginas(tamanho)
+        assert [(database._para_epoch(texto), p, v) for v, p, texto in linhas] == esperadas
+
+def test_pagina_filtra_porta_e_intervalo(gravar):
+    amostras = _amostras()
+    gravar(amostras)
+    inicio, fim = BASE + 20, BASE + 60
+    linhas = _todas_as_paginas(
+        13, porta="Canal 2",
+        data_inicio=database._para_texto(inicio), data_fim=database._para_texto(fim),
+    )
+    esperadas = sorted(
+        ((t, v) for t, v, p in amostras if p == "Canal 2" and inicio <= t <= fim), reverse=True
+    )
+    assert [(database._para_epoch(texto), v) for v, _, texto in linhas] == esperadas
+
+def test_ultima_pagina_sem_cursor(gravar):
+    gravar([(BASE + i, 1.0, "Canal 1") for i in range(10)])
+    pagina, cursor = database.buscar_pagina_leituras(tamanho=4)
+    assert len(pagina) == 4 and cursor is not None
+    pagina, cursor = database.buscar_pagina_leituras(cursor=cursor, tamanho=6)
+    assert len(pagina) == 6 and cursor is not None
+    pagina, cursor = database.buscar_pagina_leituras(cursor=cursor, tamanho=6)
+    assert pagina == [] and cursor is None
+
+def test_banco_vazio(banco):
+    assert database.buscar_pagina_leituras() == ([], None)
@@ -0,0 +1,61 @@
+import numpy as np
+from app.picos import _SegmentadorLimiar, DetectorPicos, RastreadorPicos
+
+class _Eventos(_SegmentadorLimiar):
+    """Registra (início, fim, amostras) de cada evento."""
+
+    def _iniciar(self, inicio):
+        self._inicio, self._amostras = inicio, 0
+
+    def _acumular(self, tempos, valores, magnitude):
+        self._amostras += len(valores)
+
+    def _encerrar(self, fim):
+        return self._inicio, fim, self._amostras
+
+def _em_blocos(detector, tempos, valores, tamanho):
+    eventos = []
+    for i in range(0, len(valores), tamanho):
+        eventos += detector.processar(tempos[i:i + tamanho], valores[i:i + tamanho])
+    return eventos
+
+def test_segmentador_histerese_e_sinal():
+    tempos = np.arange(10, dtype=float)
+    valores = np.array([0, 5, 12, 8, 6, 4, 0, -11, -3, 0], dtype=float)
+    eventos = _Eventos(10, 5).processar(tempos, valores)
+    assert eventos == [(2.0, 5.0, 3), (7.0, 8.0, 1)]
+
+def test_segmentador_evento_atravessa_blocos():
+    rng = np.random.default_rng(1)
+    tempos = np.arange(3000, dtype=float)
+    valores = np.where(rng.random(3000) < 0.5, 0.0, 20.0) * np.sign(rng.normal(size=3000))
+    inteiro = _Eventos(10, 5).processar(tempos, valores)
+    for tamanho in (1, 7, 256):
+        assert _em_blocos(_Eventos(10, 5), tempos, valores, tamanho) == inteiro
+
+def test_segmentador_refratario():
+    tempos = np.arange(10, dtype=float)
+    valores = np.array([20, 0, 20, 0, 20, 0, 0, 0, 20, 0], dtype=float)
+    eventos = _Eventos(10, 5, refratario=3).processar(tempos, valores)
+    assert [inicio for inicio, _, _ in eventos] == [0.0, 4.0, 8.0]
+
+def test_segmentador_evento_aberto_nao_e_entregue():
+    detector = _Eventos(10, 5)
+    assert detector.processar(np.arange(3.0), np.array([20.0, 30.0, 40.0])) == []
+    assert detector.em_evento
+    assert detector.processar(np.arange(3.0, 5.0), np.array([1.0, 1.0])) == [(0.0, 3.0, 3)]
+
+def test_detector_picos_guarda_maior_modulo_com_sinal():
+    detector = DetectorPicos(limiar=10, histerese=2, refratario=0)
+    tempos = np.arange(8, dtype=float)
+    valores = np.array([0, 11, -30, 25, 7, 0, 9, 0], dtype=float)
+    assert _em_blocos(detector, tempos, valores, 2) == [(-30.0, 2.0)]
+
+def test_rastreador_picos_mantem_k_maiores_em_modulo():
+    rastreador = RastreadorPicos(k=2)
+    assert rastreador.registrar(1, (5.0, "Canal 1", "H", 0)) == ((5.0, "Canal 1", "H", 0), None)
+    rastreador.registrar(1, (-9.0, "Canal 1", "AH", 1))
+    assert rastreador.registrar(1, (3.0, "Canal 1", "H", 2)) == (None, None)
+    entrou, saiu = rastreador.registrar(1, (7.0, "Canal 1", "H", 3))
+    assert entrou[0] == 7.0 and saiu[0] == 5.0
+    assert [registro[0] for registro in rastreador.picos(1)] == [-9.0, 7.0]
@@ -0,0 +1,67 @@
+from app import database
+from app.retencao import MotorRetencao, DIA
+
+BASE = 1_700_006_400.0  # meia-noite UTC
+
+def _paginas():
+    linhas, cursor = [], None
+    while True:
+        pagina, cursor = database.buscar_pagina_leituras(cursor=cursor, tamanho=500)
+        linhas += pagina
+        if cursor is None:
+            return linhas
+
+def _motor():
+    return MotorRetencao(bruto_dias=2, segundos_dias=0, periodo="dia", lote=7, pausa=0)
+
+def _contar(sql):
+    conn = database.conectar()
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+def test_arquiva_dias_vencidos_sem_perder_leituras(gravar, banco):
+    amostras = [(BASE + d * DIA + i * 60.0, float(d * 100 + i), "Canal 1") for d in range(4) for i in range(50)]
+    gravar(amostras)
+    antes = _paginas()
+
+    _motor().executar_ciclo(agora=BASE + 4 * DIA)
+
+    assert sorted(p.name for p in (banco / "arquivo").iterdir()) == [
+        "blocos-2023-11-15.db.gz", "blocos-2023-11-16.db.gz"
+    ]
+    assert _contar("SELECT COUNT(*) FROM arquivos") == 2
+    assert _contar("SELECT MIN(inicio) FROM blocos") >= BASE + 2 * DIA
+    assert _paginas() == antes
+
+def test_bloco_atrasado_entra_no_arquivo_existente(gravar, banco):
+    gravar([(BASE + i * 60.0, 1.0, "Canal 1") for i in range(50)])
+    gravar([(BASE + 3 * DIA, 2.0, "Canal 1")])
+    motor = _motor()
+    motor.executar_ciclo(agora=BASE + 3 * DIA)
+
+    # Chega depois que o dia já foi arquivado
+    gravar([(BASE + 3600.5, -7.0, "Canal 2")])
+    motor.executar_ciclo(agora=BASE + 3 * DIA)
+
+    assert _contar(f"SELECT COUNT(*) FROM blocos WHERE inicio < {BASE + DIA}") == 0
+    assert _contar("SELECT blocos FROM arquivos") == 51
+    linhas = _paginas()
+    assert len(linhas) == 52
+    assert (-7.0, "Canal 2", database._para_texto(BASE + 3600.5)) in linhas
+
+def test_ciclo_repetido_nao_duplica(gravar, banco):
+    gravar([(BASE + i * 60.0, float(i), "Canal 1") for i in range(50)])
+    motor = _motor()
+    motor.executar_ciclo(agora=BASE + 3 * DIA)
+    antes = _paginas()
+    motor.executar_ciclo(agora=BASE + 3 * DIA)
+    assert _paginas() == antes
+    assert len(antes) == 50
+
+def test_poda_agregados_de_um_segundo(gravar, banco):
+    gravar([(BASE + d * DIA + i, 1.0, "Canal 1") for d in range(3) for i in range(10)])
+    MotorRetencao(bruto_dias=0, segundos_dias=1, lote=1000, pausa=0).executar_ciclo(agora=BASE + 2.5 * DIA)
+    assert _contar("SELECT MIN(balde) FROM agregados WHERE resolucao = 1") >= BASE + 1.5 * DIA
+    assert _contar("SELECT COUNT(*) FROM agregados WHERE resolucao = 60") == 3
@@ -0,0 +1,138 @@
+from bisect import bisect_right
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+class ModeloPicos(QAbstractTableModel):
+    """Tabela de picos ordenada por |valor|, atualizada linha a linha.
+
+    inserir()/remover() avisam a view só das linhas que mudaram, em vez de
+    recriar todos os itens a cada novo pico.
+    """
+
+    CABECALHOS = ["Pico (Nm)", "Porta", "Sentido", "Tempo"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._registros = []
+        self._chaves = []  # -|valor| de cada linha, para busca binária
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._registros)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.CABECALHOS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        registro = self._registros[index.row()]
+        if role == Qt.DisplayRole:
+            if index.column() == 0:
+                return f"{registro[0]:.2f}"
+            return registro[index.column()]
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.CABECALHOS[section]
+        return None
+
+    def inserir(self, registro):
+        chave = -abs(registro[0])
+        linha = bisect_right(self._chaves, chave)
+        self.beginInsertRows(QModelIndex(), linha, linha)
+        self._chaves.insert(linha, chave)
+        self._registros.insert(linha, registro)
+        self.endInsertRows()
+
+    def remover(self, registro):
+        for linha, atual in enumerate(self._registros):
+            if atual is registro:
+                self.beginRemoveRows(QModelIndex(), linha, linha)
+                del self._chaves[linha]
+                del self._registros[linha]
+                self.endRemoveRows()
+                return
+
+    def registros(self):
+        return list(self._registros)
+
+class ModeloLeiturasSQL(QAbstractTableModel):
+    """Tabela virtual de leituras, carregada do banco página a página.
+
+    As páginas são buscadas pelo ExecutorConsultas (fora da thread da GUI) só
+    quando a view pede mais linhas (canFetchMore/fetchMore), então só as linhas
+    já vistas ficam em memória. `buscar_pagina(cursor, conn=...)` devolve
+    (linhas, próximo cursor).
+    """
+
+    CABECALHOS = ["Valor", "Porta", "Data/Hora"]
+
+    def __init__(self, executor, chave, parent=None):
+        super().__init__(parent)
+        self._executor = executor
+        self._chave = chave
+        self._linhas = []
+        self._buscar_pagina = None
+        self._cursor = None
+        self._tem_mais = False
+        self._carregando = False
+        executor.concluida.connect(self._pagina_recebida)
+        executor.falhou.connect(self._pagina_falhou)
+
+    def consultar(self, buscar_pagina):
+        """Troca a consulta: descarta as linhas carregadas e pede a primeira página."""
+        self.beginResetModel()
+        self._linhas = []
+        self._buscar_pagina = buscar_pagina
+        self._cursor = None
+        self._tem_mais = True
+        self._carregando = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.CABECALHOS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            valor = self._linhas[index.row()][index.column()]
+            return f"{valor:.2f}" if index.column() == 0 else valor
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.CABECALHOS[section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._tem_mais and not self._carregando
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._carregando = True
+        self._executor.executar(self._chave, self._buscar_pagina, self._cursor)
+
+    def _pagina_recebida(self, chave, resultado):
+        if chave != self._chave:
+            return
+        linhas, self._cursor = resultado
+        self._carregando = False
+        self._tem_mais = self._cursor is not None
+        if linhas:
+            inicio = len(self._linhas)
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(linhas) - 1)
+            self._linhas.extend(linhas)
+            self.endInsertRows()
+
+    def _pagina_falhou(self, chave, erro):
+        if chave == self._chave:
+            self._carregando = False
+            self._tem_mais = False
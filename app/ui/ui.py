@@ -1,27 +1,46 @@
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout,
     QComboBox, QLCDNumber, QFrame, QFileDialog, QStackedLayout,
-    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
+    QTableWidget, QTableWidgetItem, QTableView, QHeaderView, QMessageBox,
     QSpinBox, QDialog, QGroupBox, QRadioButton, QTabWidget, QLineEdit, QGraphicsOpacityEffect,
-    QDateTimeEdit, QSplitter, QCheckBox, QFormLayout, QDoubleSpinBox, QApplication, QMainWindow
+    QDateTimeEdit, QSplitter, QCheckBox, QFormLayout, QDoubleSpinBox, QApplication, QMainWindow,
+    QProgressDialog
 )
-from PyQt5.QtCore import Qt, pyqtSignal, QObject
+from PyQt5.QtCore import Qt, pyqtSignal, QObject, QTimer
 from PyQt5.QtGui import QPixmap, QFont
-from datetime import datetime
-import random
+from datetime import datetime, timezone
+import time
+import numpy as np
 
 import pyqtgraph as pg
 from pyqtgraph import PlotWidget
 
 from .widgets import BotaoArredondado
+from .modelos import ModeloPicos, ModeloLeiturasSQL
+from app.buffers import SerieDecimada
 from app.logger import configurar_logs
-from app.controller import ModbusController,  SimuladorController, configurar_alerta_sonoro
-from ..pdf import gerar_pdf
+from app.controller import GerenciadorAquisicao, SimuladorController, configurar_alerta_sonoro
+from app.aquisicao_async import MotorAquisicaoAsync
+from app.amostras import COLUNA_TEMPO
+from app.picos import DetectorPicos, RastreadorPicos
+from app.estatisticas import EstatisticasStream
+from app.alarmes import MonitorAlarme, LimitadorAlertas
+from app.ciclos import DetectorCiclos
+from app.filtros import EstagioFiltros
+from app.barramento import ProcessoAquisicao
+from app.consultas import ExecutorConsultas
+from app.retencao import MotorRetencao
+from app.exportacao import ExportadorPdf
+from functools import partial
+from ..pdf import abrir_arquivo
 from ..settings import *
-from ..database import init_db, salvar_leitura, buscar_leituras, buscar_leituras_por_data
+from ..database import (
+    init_db, buscar_pagina_leituras, contar_leituras_por_data, GravadorLeituras,
+    SQL_INSERIR_ALARME, SQL_RECONHECER_ALARME, SQL_INSERIR_CICLO
+)
 
 class Comunicador(QObject):
-    atualizar_canais = pyqtSignal(list)  # Sinal para atualizar múltiplos canais
+    atualizar_canais = pyqtSignal(object)  # Bloco de amostras (ver app.amostras)
 
 class TorqView(QWidget):
     def __init__(self):
@@ -38,27 +57,71 @@ class TorqView(QWidget):
         self.conexao_serial_ativa = False
         self.thread_rodando = False
         self.intervalo_leitura = 1.0
+        self.inicio_sessao = None  # timestamp da primeira amostra (origem do eixo X)
         self.dados_coletados = []
-        self.dados_eixo_x = []
-        self.dados_eixo_y = []
         self.limite_registros = 10
         self.modo_admin = False
         self.dados_canais = {1: [], 2: [], 3: [], 4: []}
+        # Janela de pontos do gráfico por canal (memória fixa durante o turno)
+        # e pirâmide mín/máx para navegar pela sessão inteira com zoom
+        self.buffers_canais = {
+            canal: SerieDecimada(GRAFICO_CAPACIDADE, GRAFICO_NIVEIS_LOD, GRAFICO_FATOR_LOD)
+            for canal in range(1, 5)
+        }
+        self._seguir_grafico = True  # False depois que o usuário mexe no zoom/pan
         self.picos_canais = {1: None, 2: None, 3: None, 4: None}
         self.limites = {1: 1400, 2: 140, 3: 14, 4: 4}
 
         self.alerta_sonoro = configurar_alerta_sonoro()
         self.serial_controller = None
 
+        # Consultas ao banco rodam fora da thread da GUI
+        self.consultas = ExecutorConsultas(self.logger, parent=self)
+        self.consultas.concluida.connect(self.consulta_concluida)
+
         self.iniciar_interface()
         self.configurar_estilos()
 
         self.criar_tela_filtros()
 
         init_db()
+        self.gravador = GravadorLeituras(logger=self.logger)
+        self.gravador.iniciar()
+        # PDFs em segundo plano, a partir do banco (com o gravador descarregado antes)
+        self.exportador = ExportadorPdf(self.logger, parent=self, gravador=self.gravador)
+        self.exportador.progresso.connect(self.progresso_pdf)
+        self.exportador.concluido.connect(self.pdf_concluido)
+        self.exportador.falhou.connect(self.pdf_falhou)
+        self.exportador.cancelado.connect(self.pdf_falhou)
+        self.dialogo_pdf = None
+        # Arquivamento e poda do banco em segundo plano
+        self.retencao = MotorRetencao(logger=self.logger)
+        self.retencao.iniciar()
 
-        self.picos_registrados = []  # Lista para armazenar os picos (valor, porta, sentido, tempo)
-        self.limite_picos = 25  # Limite de registros na tabela
+        self.limite_picos = 25  # Picos mantidos por canal (top-K)
+        self.rastreador_picos = RastreadorPicos(self.limite_picos)
+        self.detectores_picos = {
+            canal: DetectorPicos(PICO_LIMIAR, PICO_HISTERESE, PICO_REFRATARIO_S)
+            for canal in range(1, NUM_CANAIS + 1)
+        }
+        # Filtros por canal (FILTROS_CANAIS), aplicados a cada bloco antes dos consumidores
+        self.filtros = EstagioFiltros.configurar(FILTROS_CANAIS, 1 / self.intervalo_leitura)
+        # Ciclos de aperto por canal, gravados como uma linha cada na tabela ciclos
+        self.detectores_ciclos = {
+            canal: DetectorCiclos(CICLO_LIMIAR_INICIO, CICLO_LIMIAR_FIM, CICLO_DURACAO_MINIMA_S)
+            for canal in range(1, NUM_CANAIS + 1)
+        }
+        self._ultimo_ciclo = None  # (canal, ciclo) a mostrar no próximo quadro
+        # Alarmes de limite por canal; som e destaque limitados a um por ALARME_INTERVALO_ALERTA_S
+        self.monitores_alarme = {
+            canal: MonitorAlarme(self.limites.get(canal, 0), ALARME_CONFIRMACAO)
+            for canal in range(1, NUM_CANAIS + 1)
+        }
+        self.limitador_alertas = LimitadorAlertas(ALARME_INTERVALO_ALERTA_S)
+        self._alarmes_novos = []  # canais que dispararam desde o último quadro
+        # Média, desvio, percentis e Cpk da sessão por canal, em memória constante
+        self.estatisticas_canais = {}
+        self._estatisticas_pendentes = False
 
         self.current_key = "Não lida"  # Armazena a key atual
         self.new_key = ""  # Armazena a nova key para gravação
@@ -66,6 +129,20 @@ class TorqView(QWidget):
         self._timers = []  # Para armazenar referências a timers
         self._shutting_down = False  # Flag de encerramento
 
+        # Renderização desacoplada da aquisição: as amostras só atualizam os
+        # buffers; o timer redesenha a tela em taxa fixa (RENDER_FPS).
+        self.ultimos_valores = {}
+        self._grafico_pendente = False
+        self._picos_alterados = []  # (entrou, saiu) a aplicar na tabela no próximo quadro
+        self.timer_render = QTimer(self)
+        self.timer_render.timeout.connect(self.renderizar)
+        self.timer_render.start(max(1, int(1000 / RENDER_FPS)))
+        self._timers.append(self.timer_render)
+        # Leitura do anel do processo de aquisição (só com BARRAMENTO_COMPARTILHADO)
+        self.timer_barramento = QTimer(self)
+        self.timer_barramento.timeout.connect(self.ler_barramento)
+        self._timers.append(self.timer_barramento)
+
     def __del__(self):
         if not self._shutting_down:
             self.close()
@@ -86,7 +163,7 @@ class TorqView(QWidget):
             }
             QPushButton.primary_button:hover { background-color: #ff4c4c; }
             QLCDNumber { background-color: #212121; color: #d32f2f; }
-            QTableWidget { background-color: #333; border-radius: 8px; }
+            QTableWidget, QTableView { background-color: #333; border-radius: 8px; }
             QHeaderView::section { background-color: #d32f2f; }
             QWidget#graph_widget { background-color: #252525; border-radius: 8px; }
             QLabel.stat_card {
@@ -322,6 +399,14 @@ class TorqView(QWidget):
         self.grafico.setLabel('left', 'Torque (Nm)')
         self.grafico.setLabel('bottom', 'Tempo (segundos)')
         self.curva = self.grafico.plot(pen=pg.mkPen(color='#d32f2f', width=2))
+        self.curva.setClipToView(True)
+        self.curva.setDownsampling(auto=True, method='peak')
+
+        # Zoom/pan manual congela o acompanhamento; o botão "A" do gráfico o retoma
+        view_box = self.grafico.getViewBox()
+        view_box.sigRangeChangedManually.connect(self.pausar_acompanhamento)
+        view_box.sigXRangeChanged.connect(self.marcar_grafico_pendente)
+        self.grafico.getPlotItem().autoBtn.clicked.connect(self.retomar_acompanhamento)
         
         # Container para os controles (LCD, botões, etc.)
         container_controles = QWidget()
@@ -334,6 +419,16 @@ class TorqView(QWidget):
         
         # Status e conexão
         self.rotulo_status = QLabel("Status: Aguardando conex\u00e3o...")
+
+        self.rotulo_ultimo_ciclo = QLabel("Último aperto: --")
+
+        # Alerta de limite (visível enquanto houver alarme não reconhecido)
+        self.rotulo_alarme = QLabel("")
+        self.rotulo_alarme.setStyleSheet("background-color: #d32f2f; color: white; font-weight: bold; padding: 4px;")
+        self.rotulo_alarme.setVisible(False)
+        self.botao_reconhecer = QPushButton("Reconhecer Alarmes")
+        self.botao_reconhecer.setEnabled(False)
+        self.botao_reconhecer.clicked.connect(self.reconhecer_alarmes)
         
         # Botões de conexão
         self.botao_conectar = QPushButton("Conectar")
@@ -346,7 +441,12 @@ class TorqView(QWidget):
         self.botao_desconectar.clicked.connect(self.desconectar_serial)
         
         self.seletor_porta = QComboBox()
-        self.seletor_porta.addItems(["COM1", "COM2", "COM3", "COM4", "Simulado"])
+        portas = ["COM1", "COM2", "COM3", "COM4"]
+        portas += [d['porta'] for d in DISPOSITIVOS_MODBUS if d['porta'] not in portas]
+        self.seletor_porta.addItems(portas)
+        if len({d['porta'] for d in DISPOSITIVOS_MODBUS}) > 1:
+            self.seletor_porta.addItem("Todos")  # todos os barramentos configurados
+        self.seletor_porta.addItem("Simulado")
         
         # Layout dos botões de conexão
         layout_conexao = QHBoxLayout()
@@ -361,6 +461,11 @@ class TorqView(QWidget):
         # Adiciona todos os controles ao layout
         layout_controles.addWidget(self.display_lcd)
         layout_controles.addWidget(self.rotulo_status)
+        layout_controles.addWidget(self.rotulo_ultimo_ciclo)
+        layout_alarme = QHBoxLayout()
+        layout_alarme.addWidget(self.rotulo_alarme, 1)
+        layout_alarme.addWidget(self.botao_reconhecer)
+        layout_controles.addLayout(layout_alarme)
         layout_controles.addLayout(layout_conexao)
         layout_controles.addWidget(self.botao_pdf)
         container_controles.setLayout(layout_controles)
@@ -375,14 +480,10 @@ class TorqView(QWidget):
         pagina.setLayout(layout_principal)
         self.pilha_telas.addWidget(pagina)
         
-        # Inicializa as listas de dados do gráfico
-        self.dados_eixo_x = []
-        self.dados_eixo_y = []
-
         # Cria a tabela de picos (abaixo do gráfico)
-        self.tabela_picos = QTableWidget()
-        self.tabela_picos.setColumnCount(4)
-        self.tabela_picos.setHorizontalHeaderLabels(["Pico (Nm)", "Porta", "Sentido", "Tempo"])
+        self.modelo_picos = ModeloPicos(self)
+        self.tabela_picos = QTableView()
+        self.tabela_picos.setModel(self.modelo_picos)
         self.tabela_picos.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.tabela_picos.setMaximumHeight(200)  # Altura fixa para não ocupar muito espaço
 
@@ -405,6 +506,19 @@ class TorqView(QWidget):
 
         layout_controles.addLayout(layout_canais)
 
+        # Estatísticas da sessão por canal (μ, σ, P5/P50/P95 e Cpk contra o limite do canal)
+        layout_estatisticas = QHBoxLayout()
+        self.rotulos_estatisticas = {}
+        for canal in range(1, 5):
+            rotulo = QLabel(f"Canal {canal}: --")
+            rotulo.setWordWrap(True)
+            self.rotulos_estatisticas[canal] = rotulo
+            layout_estatisticas.addWidget(rotulo)
+        botao_zerar = QPushButton("Zerar Estatísticas")
+        botao_zerar.clicked.connect(self.zerar_estatisticas)
+        layout_estatisticas.addWidget(botao_zerar)
+        layout_controles.addLayout(layout_estatisticas)
+
          # Crie um QTabWidget para organizar as abas
         tabs = QTabWidget()
         
@@ -426,30 +540,61 @@ class TorqView(QWidget):
 
     def conectar_serial(self):
         porta = self.seletor_porta.currentText()
-        if porta == "Simulado":
+        # Filtros recomeçam a cada conexão, na taxa do intervalo de leitura em vigor
+        self.filtros = EstagioFiltros.configurar(FILTROS_CANAIS, 1 / self.intervalo_leitura)
+        if porta == "Simulado" and not BARRAMENTO_COMPARTILHADO:
             self.simulador = SimuladorController(self.comunicador, self.intervalo_leitura)
             self.simulador.iniciar()
         else:
-            self.serial_controller = ModbusController(
-                porta = porta,
-                baud_rate = 19200,
-                comunicador = self.comunicador,
-                logger = self.logger
-            )
+            if porta == "Simulado":
+                self.serial_controller = ProcessoAquisicao("simulado", self.logger, intervalo=self.intervalo_leitura)
+            else:
+                # Dispositivos configurados (TORQVIEW_DISPOSITIVOS) para a porta escolhida;
+                # sem configuração, um único escravo 1 no Canal 1
+                if porta == "Todos":
+                    dispositivos = DISPOSITIVOS_MODBUS
+                else:
+                    dispositivos = [d for d in DISPOSITIVOS_MODBUS if d['porta'] == porta]
+                if not dispositivos:
+                    dispositivos = [{'porta': porta, 'slave': 1, 'canal': 1}]
+                parametros = dict(dispositivos=dispositivos, baud_rate=19200, intervalo=self.intervalo_leitura)
+
+                if BARRAMENTO_COMPARTILHADO:
+                    # Aquisição em processo próprio; as amostras chegam pelo anel em memória compartilhada
+                    self.serial_controller = ProcessoAquisicao(BACKEND_AQUISICAO, self.logger, **parametros)
+                else:
+                    # Backend de aquisição: threads (padrão) ou asyncio (TORQVIEW_BACKEND_AQUISICAO=async)
+                    backend = MotorAquisicaoAsync if BACKEND_AQUISICAO == "async" else GerenciadorAquisicao
+                    self.serial_controller = backend(comunicador=self.comunicador, logger=self.logger, **parametros)
             try:
                 self.serial_controller.conectar()
                 self.rotulo_status.setText(f"Conectado - {porta}")
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Falha na conexão Modbus:\n{str(e)}")
                 return
+            if isinstance(self.serial_controller, ProcessoAquisicao):
+                self.timer_barramento.start(BARRAMENTO_LEITURA_MS)
 
         self.botao_conectar.setEnabled(False)
         self.botao_desconectar.setEnabled(True)
         self.conexao_serial_ativa = True
 
+    def ler_barramento(self):
+        """Traz as amostras publicadas pelo processo de aquisição desde a última leitura."""
+        bloco = self.serial_controller.ler() if self.serial_controller is not None else None
+        if bloco is not None:
+            self.atualizar_canais(bloco)
+
+    def _drenar_barramento(self):
+        """Para a leitura do barramento depois de trazer o que o processo publicou até encerrar."""
+        if self.timer_barramento.isActive():
+            self.timer_barramento.stop()
+            self.ler_barramento()
+
     def desconectar_serial(self):
         if hasattr(self, 'serial_controller') and self.serial_controller:
             self.serial_controller.desconectar()
+        self._drenar_barramento()
         if hasattr(self, 'simulador') and self.simulador:
             self.simulador.parar()
         self.botao_conectar.setEnabled(True)
@@ -457,43 +602,171 @@ class TorqView(QWidget):
         self.rotulo_status.setText("Status: Desconectado")
         self.conexao_serial_ativa = False
 
-    def atualizar_canais(self, valores):
-        """Atualiza os valores dos 4 canais."""
-        for canal, valor in enumerate(valores, start=1):
-            if canal in self.displays:
-                self.displays[canal].display(valor)
-            
-            # Salva no banco de dados
-            salvar_leitura(valor, f"Canal {canal}")
+    def atualizar_canais(self, bloco):
+        """Recebe um bloco de amostras dos canais (o redesenho fica a cargo de renderizar)."""
+        if len(bloco) == 0:
+            return
+        # Filtra uma vez; gravação, gráfico, picos, ciclos e alarmes veem o mesmo sinal
+        bloco = self.filtros.processar(bloco)
+        tempos = bloco[:, COLUNA_TEMPO]
+        if self.inicio_sessao is None:
+            self.inicio_sessao = tempos[0]
+
+        # Enfileira o bloco inteiro para gravação (thread do gravador)
+        self.gravador.adicionar_bloco(bloco)
+
+        for canal in range(1, bloco.shape[1]):
+            valores = bloco[:, canal]
+            validos = ~np.isnan(valores)  # NaN = canal sem leitura naquela amostra
+            if not validos.any():
+                continue
+            tempos_canal = tempos[validos]
+            valores = valores[validos]
+            self.ultimos_valores[canal] = float(valores[-1])
             
-            # Atualiza dados do gráfico (usando Canal 1 como principal)
+            buffer = self.buffers_canais.get(canal)
+            if buffer is not None:
+                buffer.adicionar_bloco(tempos_canal - self.inicio_sessao, valores)
+
+            # Ciclos de aperto (limiares de início e fim com histerese)
+            for ciclo in self.detectores_ciclos[canal].processar(tempos_canal, valores):
+                self.gravador.registrar(SQL_INSERIR_CICLO, (
+                    f"Canal {canal}", ciclo['inicio'], ciclo['fim'], ciclo['pico'], ciclo['instante_pico'],
+                    ciclo['media'], ciclo['integral'], ciclo['amostras'],
+                ))
+                self._ultimo_ciclo = (canal, ciclo)
+
+            # Limite do canal (verificação vetorizada, com confirmação e trava)
+            monitor = self.monitores_alarme.get(canal)
+            if monitor is not None:
+                for valor, instante in monitor.processar(tempos_canal, valores):
+                    porta = f"Canal {canal}"
+                    self.gravador.registrar(SQL_INSERIR_ALARME, (porta, instante, valor, monitor.limite))
+                    self.logger.warning(f"Alarme: {porta} em {valor:.2f} Nm (limite {monitor.limite:.2f})")
+                    self._alarmes_novos.append(canal)
+
+            estatisticas = self.estatisticas_canais.get(canal)
+            if estatisticas is None:
+                estatisticas = self.estatisticas_canais[canal] = EstatisticasStream()
+            estatisticas.adicionar_bloco(valores)
+            self._estatisticas_pendentes = True
+
+            # Gráfico usa o Canal 1 como principal
             if canal == 1:
-                self.dados_eixo_y.append(valor)
-                self.dados_eixo_x.append(len(self.dados_eixo_y) * self.intervalo_leitura)
-                self.curva.setData(self.dados_eixo_x, self.dados_eixo_y)
-                
-                # Auto-ajuste dos eixos
-                if len(self.dados_eixo_y) > 0:
-                    self.grafico.setXRange(0, len(self.dados_eixo_y) * self.intervalo_leitura, padding=0.1)
-                    margem = 0.1
-                    valor_min = min(self.dados_eixo_y) * (1 - margem)
-                    valor_max = max(self.dados_eixo_y) * (1 + margem)
-                    self.grafico.setYRange(valor_min, valor_max)
-
-            # Detecção de picos por canal
-            if self.picos_canais[canal] is None or valor > self.picos_canais[canal]:
-                self.picos_canais[canal] = valor
-                tempo_atual = datetime.now().strftime("%M:%S")
+                self._grafico_pendente = True
+
+            # Detecção de picos por evento (limiar, histerese e tempo refratário)
+            for valor, instante in self.detectores_picos[canal].processar(tempos_canal, valores):
+                if self.picos_canais[canal] is None or abs(valor) > abs(self.picos_canais[canal]):
+                    self.picos_canais[canal] = valor
+                tempo_atual = datetime.fromtimestamp(instante).strftime("%M:%S")
                 sentido = "Horário" if valor >= 0 else "Anti-horário"
                 novo_pico = (valor, f"Canal {canal}", sentido, tempo_atual)
-                
-                self.picos_registrados.append(novo_pico)
-                self.picos_registrados.sort(reverse=True, key=lambda x: x[0])
-                
-                if len(self.picos_registrados) > self.limite_picos:
-                    self.picos_registrados = self.picos_registrados[:self.limite_picos]
-                
-                self.atualizar_tabela_picos()
+
+                entrou, saiu = self.rastreador_picos.registrar(canal, novo_pico)
+                if entrou is not None:
+                    self._picos_alterados.append((entrou, saiu))
+
+    def renderizar(self):
+        """Redesenha displays, gráfico e tabela de picos com o estado mais recente."""
+        for canal, valor in self.ultimos_valores.items():
+            if canal in self.displays:
+                self.displays[canal].display(valor)
+
+        if self._grafico_pendente:
+            self._grafico_pendente = False
+            self.desenhar_grafico()
+
+        if self._picos_alterados:
+            self.atualizar_tabela_picos()
+
+        if self._estatisticas_pendentes:
+            self._estatisticas_pendentes = False
+            self.atualizar_estatisticas()
+
+        if self._ultimo_ciclo is not None:
+            canal, ciclo = self._ultimo_ciclo
+            self._ultimo_ciclo = None
+            self.rotulo_ultimo_ciclo.setText(
+                f"Último aperto: Canal {canal}, pico {ciclo['pico']:.2f} Nm em {ciclo['fim'] - ciclo['inicio']:.2f} s"
+            )
+
+        if self._alarmes_novos and self.limitador_alertas.permitir():
+            self._alarmes_novos = []
+            self.mostrar_alarmes()
+
+    def mostrar_alarmes(self):
+        """Destaca os canais com alarme travado e toca o alerta (já limitado em taxa)."""
+        travados = [canal for canal, monitor in self.monitores_alarme.items() if monitor.travado]
+        for canal, display in self.displays.items():
+            display.setStyleSheet("color: white; background-color: #b71c1c;" if canal in travados else "")
+        self.rotulo_alarme.setText("ALARME: " + ", ".join(f"Canal {canal}" for canal in travados))
+        self.rotulo_alarme.setVisible(bool(travados))
+        self.botao_reconhecer.setEnabled(bool(travados))
+        if travados and self.alerta_sonoro is not None:
+            self.alerta_sonoro.play()
+
+    def reconhecer_alarmes(self):
+        agora = time.time()
+        for canal, monitor in self.monitores_alarme.items():
+            if monitor.travado:
+                monitor.reconhecer()
+                self.gravador.registrar(SQL_RECONHECER_ALARME, (agora, f"Canal {canal}"))
+        self._alarmes_novos = []
+        self.mostrar_alarmes()
+
+    def atualizar_estatisticas(self):
+        for canal, rotulo in self.rotulos_estatisticas.items():
+            estatisticas = self.estatisticas_canais.get(canal)
+            if estatisticas is None or estatisticas.contagem == 0:
+                rotulo.setText(f"Canal {canal}: --")
+                continue
+            quantis = estatisticas.resumo()['quantis']
+            cpk = estatisticas.cpk(self.limites.get(canal))
+            rotulo.setText(
+                f"Canal {canal}: μ {estatisticas.media:.2f}  σ {estatisticas.desvio:.2f}\n"
+                f"P5 {quantis[0.05]:.2f}  P50 {quantis[0.5]:.2f}  P95 {quantis[0.95]:.2f}  "
+                f"Cpk {'--' if cpk is None else f'{cpk:.2f}'}"
+            )
+
+    def zerar_estatisticas(self):
+        self.estatisticas_canais = {}
+        self._estatisticas_pendentes = True
+
+    def desenhar_grafico(self):
+        """Desenha o Canal 1 com o nível de detalhe adequado à faixa visível."""
+        buffer = self.buffers_canais[1]
+        if buffer.tamanho == 0:
+            return
+        view_box = self.grafico.getViewBox()
+
+        if self._seguir_grafico:
+            # Auto-ajuste dos eixos (mín/máx mantidos incrementalmente pelo buffer)
+            eixo_x, _ = buffer.dados()
+            x_inicio, x_fim = eixo_x[0], eixo_x[-1]
+            margem = 0.1
+            valor_min = buffer.extremos.minimo * (1 - margem)
+            valor_max = buffer.extremos.maximo * (1 + margem)
+            view_box.blockSignals(True)
+            self.grafico.setXRange(x_inicio, x_fim, padding=0.1)
+            self.grafico.setYRange(valor_min, valor_max)
+            view_box.blockSignals(False)
+        else:
+            x_inicio, x_fim = view_box.viewRange()[0]
+
+        pontos = max(1, int(view_box.width()))
+        self.curva.setData(*buffer.visao(x_inicio, x_fim, pontos))
+
+    def marcar_grafico_pendente(self, *args):
+        self._grafico_pendente = True
+
+    def pausar_acompanhamento(self, *args):
+        self._seguir_grafico = False
+        self._grafico_pendente = True
+
+    def retomar_acompanhamento(self):
+        self._seguir_grafico = True
+        self._grafico_pendente = True
 
     def criar_aba_controles(self):
         aba = QWidget()
@@ -523,27 +796,49 @@ class TorqView(QWidget):
         return aba
 
     def salvar_pdf(self):
-        if not buscar_leituras():
-            QMessageBox.warning(self, "Aviso", "Nenhum dado para gerar PDF.")
+        if self.exportador.ocupado:
+            QMessageBox.warning(self, "Aviso", "Já existe um PDF sendo gerado.")
             return
-
         caminho, _ = QFileDialog.getSaveFileName(self, "Salvar PDF", "", "PDF Files (*.pdf)")
-        if caminho:
-            # Busca os picos do banco em vez de usar valores aleatórios
-            picos_db = buscar_leituras(limite=5)  # Pega os 5 maiores picos
-            picos_formatados = [
-                [f"{valor:.2f}", porta, "Horário", timestamp]
-                for valor, porta, timestamp in picos_db
-            ]
-            
-            gerar_pdf(
-                caminho, 
-                self, 
-                [leitura[0] for leitura in buscar_leituras(limite=100)],  # Últimas 100 leituras
-                self.seletor_porta.currentText(), 
-                self.intervalo_leitura, 
-                picos_formatados  # Usa os picos reais
-            )
+        if not caminho:
+            return
+
+        # Todos os canais da sessão atual (desde a primeira amostra); sem sessão, todo o
+        # banco. O relatório sai do banco em segundo plano
+        data_inicio = None
+        if self.inicio_sessao is not None:
+            data_inicio = datetime.fromtimestamp(self.inicio_sessao, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        self.exportador.exportar(caminho, data_inicio=data_inicio, intervalo=self.intervalo_leitura)
+        self.dialogo_pdf = QProgressDialog("Gerando PDF...", "Cancelar", 0, 0, self)
+        self.dialogo_pdf.setWindowTitle("Gerar PDF")
+        self.dialogo_pdf.setMinimumDuration(500)
+        self.dialogo_pdf.canceled.connect(self.exportador.cancelar)
+        self.dialogo_pdf.show()
+
+    def progresso_pdf(self, lidas, total):
+        if self.dialogo_pdf is not None and total:
+            self.dialogo_pdf.setMaximum(total)
+            self.dialogo_pdf.setValue(min(lidas, total))
+
+    def _fechar_dialogo_pdf(self):
+        if self.dialogo_pdf is not None:
+            self.dialogo_pdf.canceled.disconnect()
+            self.dialogo_pdf.close()
+            self.dialogo_pdf = None
+
+    def pdf_concluido(self, caminho):
+        self._fechar_dialogo_pdf()
+        abrir_arquivo(caminho)
+
+    def pdf_falhou(self, mensagem=""):
+        self._fechar_dialogo_pdf()
+        if mensagem:
+            QMessageBox.warning(self, "Aviso", mensagem)
+
+    def consulta_concluida(self, chave, resultado):
+        """Resultados do ExecutorConsultas (as tabelas virtuais tratam os seus)."""
+        if chave == "total_resultados":
+            self.label_total_resultados.setText(f"~{resultado} leituras")
 
     def criar_tela_filtros(self):
         pagina = QWidget()
@@ -572,15 +867,18 @@ class TorqView(QWidget):
         botao_buscar.setStyleSheet("background-color: #4CAF50; color: white;")
         botao_buscar.clicked.connect(self.buscar_leituras_filtradas)
         
-        # Tabela de resultados
-        self.tabela_resultados = QTableWidget()
-        self.tabela_resultados.setColumnCount(3)
-        self.tabela_resultados.setHorizontalHeaderLabels(["Valor", "Porta", "Data/Hora"])
+        # Tabela de resultados (virtual: as páginas vêm do banco conforme a rolagem)
+        self.modelo_resultados = ModeloLeiturasSQL(self.consultas, "resultados", self)
+        self.tabela_resultados = QTableView()
+        self.tabela_resultados.setModel(self.modelo_resultados)
         self.tabela_resultados.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tabela_resultados.verticalHeader().setVisible(False)
+        self.label_total_resultados = QLabel("")
         
         # Layout principal
         layout.addWidget(grupo_data)
         layout.addWidget(botao_buscar)
+        layout.addWidget(self.label_total_resultados)
         layout.addWidget(self.tabela_resultados)
         pagina.setLayout(layout)
         
@@ -590,38 +888,26 @@ class TorqView(QWidget):
         # Obtém as datas selecionadas
         data_inicio = self.data_inicio.dateTime().toString("yyyy-MM-dd HH:mm:ss")
         data_fim = self.data_fim.dateTime().toString("yyyy-MM-dd HH:mm:ss")
+        porta = self.seletor_porta.currentText() if self.seletor_porta.currentText() not in ("Simulado", "Todos") else None
         
-        # Busca no banco de dados
-        leituras = buscar_leituras_por_data(
-            data_inicio=data_inicio,
-            data_fim=data_fim,
-            porta=self.seletor_porta.currentText() if self.seletor_porta.currentText() != "Simulado" else None
-        )
-        
-        # Preenche a tabela
-        self.tabela_resultados.setRowCount(len(leituras))
-        for row, (valor, porta, timestamp) in enumerate(leituras):
-            self.tabela_resultados.setItem(row, 0, QTableWidgetItem(f"{valor:.2f}"))
-            self.tabela_resultados.setItem(row, 1, QTableWidgetItem(porta))
-            self.tabela_resultados.setItem(row, 2, QTableWidgetItem(timestamp))
+        # Total estimado pelos blocos (barato); as linhas vêm sob demanda.
+        # Uma nova busca substitui (e interrompe) a anterior.
+        self.label_total_resultados.setText("Buscando...")
+        self.consultas.executar("total_resultados", contar_leituras_por_data, data_inicio, data_fim, porta)
+        self.modelo_resultados.consultar(partial(buscar_pagina_leituras, data_inicio, data_fim, porta))
 
     def criar_tela_historico(self):
         pagina = QWidget()
         layout = QVBoxLayout()
         
-        tabela = QTableWidget()
-        tabela.setColumnCount(3)
-        tabela.setHorizontalHeaderLabels(["Valor", "Porta", "Data/Hora"])
+        self.modelo_historico = ModeloLeiturasSQL(self.consultas, "historico", self)
+        tabela = QTableView()
+        tabela.setModel(self.modelo_historico)
         tabela.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        tabela.verticalHeader().setVisible(False)
         
-        # Busca as últimas 50 leituras
-        leituras = buscar_leituras(limite=50)
-        tabela.setRowCount(len(leituras))
-        
-        for row, (valor, porta, timestamp) in enumerate(leituras):
-            tabela.setItem(row, 0, QTableWidgetItem(f"{valor:.2f}"))
-            tabela.setItem(row, 1, QTableWidgetItem(porta))
-            tabela.setItem(row, 2, QTableWidgetItem(timestamp))
+        # Leituras mais recentes primeiro, carregadas conforme a rolagem
+        self.modelo_historico.consultar(partial(buscar_pagina_leituras, None, None, None))
         
         layout.addWidget(tabela)
         pagina.setLayout(layout)
@@ -646,6 +932,12 @@ class TorqView(QWidget):
             self.combo_baud = QComboBox()
             self.combo_baud.addItems(["9600", "19200", "38400", "57600", "115200"])
             layout_conexao.addRow("Baud Rate:", self.combo_baud)
+
+            self.spin_intervalo = QSpinBox()
+            self.spin_intervalo.setRange(5, 10000)
+            self.spin_intervalo.setSuffix(" ms")
+            self.spin_intervalo.setValue(int(round(self.intervalo_leitura * 1000)))
+            layout_conexao.addRow("Intervalo de leitura:", self.spin_intervalo)
             
             # Aba Canais
             tab_canais = QWidget()
@@ -691,10 +983,16 @@ class TorqView(QWidget):
             novo_baud = int(self.combo_baud.currentText())
             if hasattr(self, 'serial_controller') and self.serial_controller:
                 self.serial_controller.baudrate = novo_baud
+
+            # Salvar intervalo de leitura (vale a partir da próxima conexão)
+            self.intervalo_leitura = self.spin_intervalo.value() / 1000
             
             # Salvar limites dos canais
             for canal, spinbox in self.spinboxes_limites.items():
                 self.limites[canal] = spinbox.value()
+                if canal in self.monitores_alarme:
+                    self.monitores_alarme[canal].limite = spinbox.value()
+            self._estatisticas_pendentes = True  # Cpk usa os limites
             
             QMessageBox.information(self, "Sucesso", "Configurações salvas com sucesso!")
             dialog.accept()
@@ -710,17 +1008,17 @@ class TorqView(QWidget):
             QMessageBox.warning(self, "Erro", "Senha incorreta!")
 
     def atualizar_tabela_picos(self):
-        self.tabela_picos.setRowCount(len(self.picos_registrados))
-        for row, (valor, porta, sentido, tempo) in enumerate(self.picos_registrados):
-            self.tabela_picos.setItem(row, 0, QTableWidgetItem(f"{valor:.2f}"))
-            self.tabela_picos.setItem(row, 1, QTableWidgetItem(porta))
-            self.tabela_picos.setItem(row, 2, QTableWidgetItem(sentido))
-            self.tabela_picos.setItem(row, 3, QTableWidgetItem(tempo))
+        """Aplica no modelo só as linhas que entraram/saíram desde o último quadro."""
+        alterados, self._picos_alterados = self._picos_alterados, []
+        for entrou, saiu in alterados:
+            if saiu is not None:
+                self.modelo_picos.remover(saiu)
+            self.modelo_picos.inserir(entrou)
 
     def configurar_estilos(self):
         # ... (estilos existentes)
         self.setStyleSheet("""
-            QTableWidget#tabela_picos {
+            QTableView#tabela_picos {
                 background-color: #333;
                 border-radius: 8px;
             }
@@ -778,11 +1076,31 @@ class TorqView(QWidget):
                 self.simulador.parar()
             except Exception as e:
                 print(f"AVISO: Falha ao parar simulador - {str(e)}")
+
+        # As threads de aquisição já terminaram; seus últimos blocos chegam por sinal
+        # enfileirado e precisam passar por atualizar_canais antes de o gravador parar
+        QApplication.processEvents()
+        self._drenar_barramento()
         
         # Encerrar todos os timers
         for timer in getattr(self, '_timers', []):
             timer.stop()
-        
+
+        # Gravar as leituras pendentes e fechar a conexão do gravador
+        if getattr(self, 'gravador', None) is not None:
+            try:
+                self.gravador.parar()
+            except Exception as e:
+                print(f"AVISO: Falha ao finalizar gravação - {str(e)}")
+        if getattr(self, 'retencao', None) is not None:
+            self.retencao.parar()
+
+        # Interromper consultas e relatórios em andamento
+        if getattr(self, 'exportador', None) is not None:
+            self.exportador.parar()
+        if getattr(self, 'consultas', None) is not None:
+            self.consultas.encerrar()
+
         # Forçar processamento de eventos pendentes
         QApplication.processEvents()
         
@@ -0,0 +1,138 @@
+"""Geração de relatórios PDF em lote, sem interface gráfica.
+
+Exemplos:
+    python relatorios.py --intervalo "2025-01-01 06:00:00" "2025-01-01 14:00:00" --porta "Canal 1"
+    python relatorios.py --dia 2025-01-01 --turnos --porta COM3 --porta "Canal 4" -j 4
+
+As leituras são gravadas por canal ("Canal N"); uma porta serial em --porta
+vale pelos seus canais em TORQVIEW_DISPOSITIVOS. Cada combinação de
+intervalo e canal vira um PDF, gerado num processo do pool. Os horários
+(intervalos, dias e turnos) são do fuso local da máquina e convertidos para
+UTC, como no banco, antes das consultas; com --utc já são dados em UTC.
+"""
+import argparse
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from app.settings import PDF_DIR, RELATORIOS_TURNOS, RELATORIOS_PROCESSOS, DISPOSITIVOS_MODBUS
+from app.pdf import gerar_relatorio_periodo, RelatorioVazio
+
+FORMATO = "%Y-%m-%d %H:%M:%S"
+
+def turnos_do_dia(dia: str, turnos: str = RELATORIOS_TURNOS):
+    """Intervalos (inicio, fim) dos turnos do dia; turnos que viram a noite terminam no dia seguinte."""
+    base = datetime.strptime(dia, "%Y-%m-%d")
+    intervalos = []
+    for turno in (parte.strip() for parte in turnos.split(',')):
+        if not turno:
+            continue
+        de, ate = (datetime.strptime(hora, "%H:%M").time() for hora in turno.split('-'))
+        inicio = datetime.combine(base, de)
+        fim = datetime.combine(base, ate)
+        if fim <= inicio:
+            fim += timedelta(days=1)
+        intervalos.append((inicio.strftime(FORMATO), fim.strftime(FORMATO)))
+    return intervalos
+
+def canais_da_porta(porta: str):
+    """Canais gravados ("Canal N") de uma porta: o próprio canal ou os do barramento em DISPOSITIVOS_MODBUS."""
+    canal = re.fullmatch(r'canal\s*(\d+)', porta.strip(), re.IGNORECASE)
+    if canal:
+        return [f"Canal {int(canal.group(1))}"]
+    return [f"Canal {numero}" for numero in sorted({d['canal'] for d in DISPOSITIVOS_MODBUS if d['porta'] == porta})]
+
+def _normalizar(texto: str) -> str:
+    """Aceita 'YYYY-MM-DD', 'YYYY-MM-DD HH:MM' ou 'YYYY-MM-DD HH:MM:SS'."""
+    return datetime.fromisoformat(texto).strftime(FORMATO)
+
+def _para_utc(texto: str) -> str:
+    """Horário local (do fuso da máquina, com horário de verão) em texto UTC."""
+    return datetime.strptime(texto, FORMATO).astimezone(timezone.utc).strftime(FORMATO)
+
+def _nome_arquivo(inicio: str, fim: str, porta: str) -> str:
+    canal = re.sub(r'[^A-Za-z0-9]+', '_', porta).strip('_') if porta else "todas"
+    compacto = lambda texto: texto.replace('-', '').replace(':', '').replace(' ', '-')
+    return f"relatorio_{canal}_{compacto(inicio)}_{compacto(fim)}.pdf"
+
+def _gerar(caminho: str, inicio: str, fim: str, porta: str):
+    """Executado nos processos do pool: cada um abre sua própria conexão somente leitura."""
+    gerar_relatorio_periodo(caminho, inicio, fim, porta)
+    return caminho
+
+def gerar_lote(intervalos, portas, saida=PDF_DIR, processos=None, utc=False):
+    """Gera um PDF por (intervalo, porta) em paralelo.
+
+    Os intervalos são em horário local (o nome do arquivo também), ou UTC
+    com `utc`. Devolve {caminho: (situacao, mensagem)}, situacao "ok",
+    "vazio" (sem leituras no intervalo, nenhum arquivo gerado) ou "erro".
+    """
+    saida = Path(saida)
+    saida.mkdir(parents=True, exist_ok=True)
+    converter = (lambda texto: texto) if utc else _para_utc
+    tarefas = [
+        (str(saida / _nome_arquivo(inicio, fim, porta)), converter(inicio), converter(fim), porta)
+        for inicio, fim in intervalos
+        for porta in (portas or [None])
+    ]
+    resultados = {}
+    with ProcessPoolExecutor(max_workers=processos or None) as pool:
+        futuros = {pool.submit(_gerar, *tarefa): tarefa[0] for tarefa in tarefas}
+        for futuro in as_completed(futuros):
+            caminho = futuros[futuro]
+            try:
+                futuro.result()
+                resultados[caminho] = ("ok", "")
+            except RelatorioVazio as e:
+                resultados[caminho] = ("vazio", str(e))
+            except Exception as e:
+                resultados[caminho] = ("erro", str(e))
+    return resultados
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera relatórios PDF do TorqView em lote.")
+    parser.add_argument("--intervalo", nargs=2, action="append", default=[], metavar=("INICIO", "FIM"),
+                        help="intervalo do relatório (pode repetir)")
+    parser.add_argument("--dia", action="append", default=[], metavar="AAAA-MM-DD",
+                        help="dia inteiro, ou seus turnos com --turnos (pode repetir)")
+    parser.add_argument("--turnos", nargs="?", const=RELATORIOS_TURNOS, metavar="HH:MM-HH:MM,...",
+                        help=f"divide cada --dia em turnos (padrão: {RELATORIOS_TURNOS})")
+    parser.add_argument("--porta", action="append", default=[],
+                        help="um relatório por canal ('Canal N') ou por canal da porta serial "
+                             "(pode repetir); sem ela, todos juntos")
+    parser.add_argument("--utc", action="store_true",
+                        help="horários já em UTC (padrão: fuso local, convertido para UTC)")
+    parser.add_argument("--saida", default=str(PDF_DIR), help="pasta dos PDFs")
+    parser.add_argument("-j", "--processos", type=int, default=RELATORIOS_PROCESSOS,
+                        help="processos em paralelo (0 = um por CPU)")
+    args = parser.parse_args(argv)
+
+    try:
+        intervalos = [(_normalizar(inicio), _normalizar(fim)) for inicio, fim in args.intervalo]
+    except ValueError as e:
+        parser.error(f"data inválida em --intervalo: {e}")
+    for dia in args.dia:
+        if args.turnos:
+            intervalos += turnos_do_dia(dia, args.turnos)
+        else:
+            inicio = datetime.strptime(dia, "%Y-%m-%d")
+            intervalos.append((inicio.strftime(FORMATO), (inicio + timedelta(days=1)).strftime(FORMATO)))
+    if not intervalos:
+        parser.error("informe ao menos um --intervalo ou --dia")
+
+    canais = []
+    for porta in args.porta:
+        encontrados = canais_da_porta(porta)
+        if not encontrados:
+            parser.error(f"porta {porta} sem canais em TORQVIEW_DISPOSITIVOS; use 'Canal N'")
+        canais += [canal for canal in encontrados if canal not in canais]
+
+    resultados = gerar_lote(intervalos, canais, args.saida, args.processos, args.utc)
+    for caminho, (situacao, mensagem) in sorted(resultados.items()):
+        print(f"{situacao.upper():6}  {caminho}" + (f": {mensagem}" if mensagem else ""))
+    return 1 if any(situacao == "erro" for situacao, _ in resultados.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())